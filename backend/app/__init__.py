@@ -41,15 +41,40 @@ def create_app():
     app.register_blueprint(matching.bp, url_prefix='/api/matching')
     app.register_blueprint(reviews.bp, url_prefix='/api/reviews')
     
+    # Warm up the ML matcher so the first /api/matching request doesn't wait for the
+    # index and MiniLM to load. ML_WARMUP:
+    #   'True'  - background thread (default)
+    #   'sync'  - load before returning; gunicorn preload uses this so forked workers
+    #             share the loaded model copy-on-write (see gunicorn.conf.py)
+    #   'False' - load on first use
+    ml_warmup = os.getenv('ML_WARMUP', 'True')
+    if ml_warmup != 'False':
+        try:
+            from app.tarumbeta_ml.src.api.inference_semantic import recommender, start_warmup, start_bundle_watch
+            if ml_warmup == 'sync':
+                recommender.load(warm_up=False) # Workers start the bundle watch after fork
+            else:
+                start_warmup()
+                start_bundle_watch()
+        except Exception as e:
+            print(f"⚠️  Could not start ML warm-up: {str(e)}")
+    
     # Health check endpoint
     @app.route('/health')
     def health():
         return {
             'status': 'healthy',
             'service': 'Tarumbeta API',
-            'version': '1.0.0'
+            'version': '1.0.0',
+            'model': _model_readiness()
         }, 200
     
+    # Readiness endpoint (503 until the ML model is loaded)
+    @app.route('/ready')
+    def ready():
+        readiness = _model_readiness()
+        return readiness, 200 if readiness['ready'] else 503
+    
     # Root endpoint
     @app.route('/')
     def root():
@@ -68,3 +93,11 @@ def create_app():
         }, 200
     
     return app
+
+def _model_readiness():
+    """ Readiness of the ML matcher, including per-phase load durations (seconds) """
+    try:
+        from app.tarumbeta_ml.src.api.inference_semantic import get_readiness
+        return get_readiness()
+    except Exception as e:
+        return {'ready': False, 'status': 'unavailable', 'error': str(e), 'load_timings': {}}
@@ -0,0 +1,146 @@
+"""
+Columnar rule scorer vs the per-instructor Python loop it replaced
+
+    python -m app.ml_models.benchmark_rule_scorer --sizes 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Run from backend/
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from app.ml_models.rule_scorer import InstructorColumns, compatibility_scores, simple_scores, top_k_positions
+
+INSTRUMENTS = ['Guitar', 'Piano', 'Drums', 'Violin', 'Saxophone', 'Flute', 'Cello']
+LOCATIONS = ['Westlands, Nairobi', 'Kilimani, Nairobi', 'Nyali, Mombasa', 'Milimani, Kisumu', 'Nakuru', '']
+STYLES = ['flexible', 'structured', 'hands-on', None]
+SKILLS = ['beginner', 'intermediate', 'advanced']
+DAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+def synthetic_instructors(n, seed=0):
+    """ instructor_profiles-shaped dicts (with the users join) """
+    rng = np.random.default_rng(seed)
+    instructors = []
+    for i in range(n):
+        instructors.append({
+            'id': str(i),
+            'instrument': INSTRUMENTS[rng.integers(len(INSTRUMENTS))],
+            'hourly_rate': int(rng.integers(500, 3000)),
+            'years_experience': int(rng.integers(0, 20)),
+            'experience_years': int(rng.integers(0, 20)),
+            'rating': round(float(rng.uniform(2.5, 5.0)), 1),
+            'teaching_style': STYLES[rng.integers(len(STYLES))],
+            'skill_level': SKILLS[rng.integers(len(SKILLS))],
+            'total_students': int(rng.integers(0, 60)),
+            'bio': f"Instructor {i}",
+            'available_days': [d for d in DAYS if rng.random() < 0.5],
+            'users': {'full_name': f"Instructor {i}", 'email': f"i{i}@example.com",
+                      'location': LOCATIONS[rng.integers(len(LOCATIONS))]}
+        })
+    return instructors
+
+LEARNER = {
+    'instrument_type': 'Guitar',
+    'experience_level': 'beginner',
+    'budget': 1200,
+    'location': 'Nairobi',
+    'preferred_schedule': {'days': ['mon', 'sat', 'sun']},
+    'learning_style': 'flexible'
+}
+
+# --- The per-instructor rules as they were before the columnar engine (reference) ---
+
+def loop_compatibility_score(learner, instructor):
+    score = 0.0
+    if instructor['instrument'] == learner['instrument_type']:
+        score += 0.30
+    score += 1.0 * 0.20
+    rate, budget = instructor['hourly_rate'], learner['budget']
+    score += (1.0 if rate <= budget else 0.7 if rate <= budget * 1.2 else 0.3 if rate <= budget * 1.5 else 0.1) * 0.15
+    learner_location, location = learner.get('location'), instructor['users'].get('location')
+    if not learner_location or not location:
+        score += 0.5 * 0.12
+    else:
+        score += (1.0 if learner_location.lower() in location.lower() else 0.3) * 0.12
+    schedule = learner.get('preferred_schedule')
+    if not schedule:
+        score += 0.5 * 0.10
+    else:
+        learner_days, instructor_days = set(schedule.get('days', [])), set(instructor.get('available_days', []))
+        if learner_days and instructor_days:
+            score += len(learner_days & instructor_days) / len(learner_days) * 0.10
+        else:
+            score += 0.5 * 0.10
+    score += 0.08
+    if learner.get('learning_style') == instructor.get('teaching_style'):
+        score += 0.05
+    if instructor['rating'] >= 4.5:
+        score += 0.05
+    if instructor['total_students'] > 20:
+        score += 0.03
+    if instructor['years_experience'] > 5:
+        score += 0.02
+    return min(score, 1.0)
+
+def loop_simple_score(learner, instructor):
+    score = 0.0
+    if instructor['hourly_rate'] <= learner['budget']:
+        score += 0.30
+    elif instructor['hourly_rate'] <= learner['budget'] * 1.2:
+        score += 0.15
+    if instructor['experience_years'] >= 5:
+        score += 0.20
+    elif instructor['experience_years'] >= 2:
+        score += 0.10
+    if instructor['rating'] >= 4.5:
+        score += 0.20
+    elif instructor['rating'] >= 3.5:
+        score += 0.10
+    if learner.get('experience_level') == instructor.get('skill_level'):
+        score += 0.15
+    if instructor['total_students'] > 10:
+        score += 0.10
+    if learner.get('location') and instructor['users'].get('location'):
+        if learner['location'].lower() in instructor['users']['location'].lower():
+            score += 0.05
+    return score
+
+def run_benchmark(sizes=(10_000, 100_000), top_k=10, repeats=3):
+    print(f"🧪 Rule-based scoring: per-instructor loop vs columnar, top-{top_k}")
+    print("-" * 92)
+    print(f"{'instructors':>11}{'rules':>15}{'loop':>11}{'columns':>11}{'scoring':>11}{'speedup':>9}{'same top-k':>12}")
+    for n in sizes:
+        instructors = synthetic_instructors(n)
+        started = time.perf_counter()
+        columns = InstructorColumns(instructors)
+        build = time.perf_counter() - started
+
+        for name, loop_fn, columnar_fn in (('compatibility', loop_compatibility_score, compatibility_scores),
+                                           ('simple', loop_simple_score, simple_scores)):
+            started = time.perf_counter()
+            for _ in range(repeats):
+                loop = [loop_fn(LEARNER, inst) for inst in instructors]
+                loop_top = sorted(range(n), key=lambda i: loop[i], reverse=True)[:top_k]
+            loop_ms = (time.perf_counter() - started) / repeats * 1000
+
+            started = time.perf_counter()
+            for _ in range(repeats):
+                scores = columnar_fn(columns, LEARNER)
+                top = top_k_positions(scores, top_k)
+            scoring_ms = (time.perf_counter() - started) / repeats * 1000
+
+            same = top.tolist() == loop_top and np.array_equal(scores, loop)
+            print(f"{n:>11,}{name:>15}{loop_ms:>9.1f}ms{build * 1000:>9.1f}ms{scoring_ms:>9.2f}ms"
+                  f"{loop_ms / scoring_ms:>8.0f}x{str(same):>12}")
+    print("-" * 92)
+    print("columns: one-off conversion of the instructor dicts (reusable across learners);")
+    print("scoring: every rule + argpartition top-k. same top-k: identical ids, order and scores")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar rule scorer vs the per-instructor loop")
+    parser.add_argument('--sizes', type=int, nargs='*', default=[10_000, 100_000])
+    parser.add_argument('--top-k', type=int, default=10)
+    args = parser.parse_args()
+    run_benchmark(args.sizes, top_k=args.top_k)
@@ -7,7 +7,14 @@ Replace the logic with your actual model loading and prediction code.
 import os
 import pickle
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+try:
+    from app.tarumbeta_ml.src.api.explanations import match_reasons, recommendation_strength
+    from app.ml_models.rule_scorer import InstructorColumns, compatibility_scores, top_k_positions
+except ImportError:
+    from backend.app.tarumbeta_ml.src.api.explanations import match_reasons, recommendation_strength
+    from backend.app.ml_models.rule_scorer import InstructorColumns, compatibility_scores, top_k_positions
 
 class InstructorMatcher:
     """
@@ -25,23 +32,27 @@ class InstructorMatcher:
             except ImportError:
                 from backend.app.tarumbeta_ml.src.api.inference_semantic import recommender
             
+            # The recommender loads lazily; until it is ready, recommend() raises
+            # ModelNotReadyError and we fall back to rule-based matching
             self.model = recommender
-            print(f"✅ Semantic ML Model loaded successfully")
+            print(f"✅ Semantic ML Model attached")
         except Exception as e:
             print(f"⚠️  Warning: Error loading Semantic ML model: {str(e)}")
             print("    Using rule-based matching instead")
             self.model = None
     
-    def predict_matches(self, learner_profile: Dict[str, Any], instructors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def predict_matches(self, learner_profile: Dict[str, Any], instructors: List[Dict[str, Any]],
+                        top_k: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Predict best instructor matches for a learner
+        Predict best instructor matches for a learner (the best top_k; all when None)
         """
         if self.model:
-            return self._ml_prediction(learner_profile, instructors)
+            return self._ml_prediction(learner_profile, instructors, top_k)
         else:
-            return self._rule_based_matching(learner_profile, instructors)
+            return self._rule_based_matching(learner_profile, instructors, top_k)
     
-    def _ml_prediction(self, learner_profile: Dict[str, Any], instructors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _ml_prediction(self, learner_profile: Dict[str, Any], instructors: List[Dict[str, Any]],
+                       top_k: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Use SemanticRecommender for prediction
         """
@@ -55,28 +66,34 @@ class InstructorMatcher:
         }
         
         # 2. Get recommendations from the model
-        # We request more candidates (top_k=50) to maximize overlap with the provided instructors list
+        # Restricted to the provided instructors: the ranking covers exactly them (those in the index)
+        instructor_ids = [inst['id'] for inst in instructors if inst.get('id')]
         try:
-            recommendations = self.model.recommend(model_input, top_k=50)
+            recommendations = self.model.recommend(model_input, top_k=top_k or len(instructor_ids), explain=True,
+                                                   candidates=instructor_ids)
         except Exception as e:
             print(f"Error during ML inference: {e}")
-            return self._rule_based_matching(learner_profile, instructors)
+            return self._rule_based_matching(learner_profile, instructors, top_k)
             
         matches = []
         
         # 3. Match model results with database instructors
-        # Create a map for fast lookup. Keying by name as a fallback since model doesn't return DB IDs.
-        # Ideally, we should ensure the model index has DB IDs.
-        instructor_map = {inst['users']['full_name']: inst for inst in instructors if inst.get('users', {}).get('full_name')}
+        # The index returns instructor_profiles.id (profile_id) for linked instructors
+        instructor_map = {inst['id']: inst for inst in instructors if inst.get('id')}
+        if len(recommendations) < len(instructor_map) and not top_k:
+            print(f"⚠️ {len(instructor_map) - len(recommendations)} candidate(s) not in the ML index yet")
         
         for rec in recommendations:
-            name = rec['name']
-            if name in instructor_map:
-                inst = instructor_map[name]
+            inst = instructor_map.get(rec.get('profile_id'))
+            if inst:
                 score = rec['match_score']
                 
-                # Generate reasons
-                reasons = self._generate_match_reasons(learner_profile, inst, score)
+                # Generate reasons from the model's score breakdown, plus the DB-only facts
+                reasons = match_reasons(rec['score_breakdown'], model_input)
+                if inst['hourly_rate'] <= learner_profile['budget']:
+                    reasons.append(f"Within budget (KES {inst['hourly_rate']}/hour)")
+                if inst['rating'] >= 4.5:
+                    reasons.append(f"Highly rated ({inst['rating']}⭐)")
                 
                 matches.append({
                     'instructor_id': inst['id'],
@@ -89,17 +106,18 @@ class InstructorMatcher:
                     'bio': inst['bio'],
                     'match_score': round(score, 2),
                     'match_reasons': reasons,
-                    'recommendation_strength': self._get_recommendation_strength(score)
+                    'score_breakdown': rec['score_breakdown'],
+                    'recommendation_strength': recommendation_strength(rec['score_breakdown'])
                 })
         
-        # If no matches found in the intersection, fallback to rule based
+        # If none of the candidates is indexed, fallback to rule based
         if not matches:
-            return self._rule_based_matching(learner_profile, instructors)
+            return self._rule_based_matching(learner_profile, instructors, top_k)
             
         # Sort by score (descending)
         matches.sort(key=lambda x: x['match_score'], reverse=True)
         
-        return matches
+        return matches[:top_k]
     
     def _extract_features(self, learner_profile: Dict[str, Any], instructor: Dict[str, Any]) -> np.ndarray:
         """
@@ -139,102 +157,6 @@ class InstructorMatcher:
         
         return np.array(features)
     
-    def _calculate_compatibility_score(self, learner_profile: Dict[str, Any], instructor: Dict[str, Any]) -> float:
-        """
-        Calculate compatibility score using weighted criteria
-        This is used as fallback or can be used with ML score
-        """
-        score = 0.0
-        weights = {
-            'instrument': 0.30,
-            'experience': 0.20,
-            'budget': 0.15,
-            'location': 0.12,
-            'schedule': 0.10,
-            'goals': 0.08,
-            'style': 0.05
-        }
-        
-        # 1. Instrument match (30%)
-        if instructor['instrument'] == learner_profile['instrument_type']:
-            score += weights['instrument']
-        
-        # 2. Experience compatibility (20%)
-        experience_match = self._check_experience_match(learner_profile['experience_level'], instructor)
-        score += experience_match * weights['experience']
-        
-        # 3. Budget fit (15%)
-        budget_fit = self._check_budget_fit(learner_profile['budget'], instructor['hourly_rate'])
-        score += budget_fit * weights['budget']
-        
-        # 4. Location proximity (12%)
-        location_fit = self._check_location_match(learner_profile.get('location'), instructor['users'].get('location'))
-        score += location_fit * weights['location']
-        
-        # 5. Schedule alignment (10%)
-        schedule_fit = self._check_schedule_match(learner_profile.get('preferred_schedule'), instructor)
-        score += schedule_fit * weights['schedule']
-        
-        # 6. Learning goals alignment (8%)
-        # This would compare learner goals with instructor specializations
-        score += 0.08  # Placeholder
-        
-        # 7. Teaching style match (5%)
-        if learner_profile.get('learning_style') == instructor.get('teaching_style'):
-            score += weights['style']
-        
-        # Bonus: Quality metrics (up to +10%)
-        if instructor['rating'] >= 4.5:
-            score += 0.05
-        if instructor['total_students'] > 20:
-            score += 0.03
-        if instructor['years_experience'] > 5:
-            score += 0.02
-        
-        return min(score, 1.0)  # Cap at 1.0
-    
-    def _check_experience_match(self, learner_level: str, instructor: Dict) -> float:
-        """Check if instructor teaches the learner's level"""
-        # Simplified: assume instructors can teach all levels
-        # In real implementation, check instructor's specializations
-        return 1.0
-    
-    def _check_budget_fit(self, learner_budget: float, instructor_rate: float) -> float:
-        """Calculate budget compatibility"""
-        if instructor_rate <= learner_budget:
-            return 1.0
-        elif instructor_rate <= learner_budget * 1.2:  # Within 20% over
-            return 0.7
-        elif instructor_rate <= learner_budget * 1.5:  # Within 50% over
-            return 0.3
-        else:
-            return 0.1
-    
-    def _check_location_match(self, learner_location: str, instructor_location: str) -> float:
-        """Check location compatibility"""
-        if not learner_location or not instructor_location:
-            return 0.5  # Neutral if location not specified
-        
-        if learner_location.lower() in instructor_location.lower():
-            return 1.0
-        
-        return 0.3  # Different location but still possible
-    
-    def _check_schedule_match(self, learner_schedule: Dict, instructor: Dict) -> float:
-        """Check schedule compatibility"""
-        if not learner_schedule:
-            return 0.5  # Neutral if not specified
-        
-        # Check day overlap
-        learner_days = set(learner_schedule.get('days', []))
-        instructor_days = set(instructor.get('available_days', []))
-        
-        if learner_days and instructor_days:
-            overlap = len(learner_days & instructor_days)
-            return overlap / len(learner_days) if learner_days else 0.5
-        
-        return 0.5
-    
     def _generate_match_reasons(self, learner_profile: Dict, instructor: Dict, score: float) -> List[str]:
         """Generate human-readable reasons for the match"""
         reasons = []
@@ -283,12 +205,36 @@ class InstructorMatcher:
         else:
             return "Possible Match"
     
-    def _rule_based_matching(self, learner_profile: Dict[str, Any], instructors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _rule_based_matching(self, learner_profile: Dict[str, Any], instructors: List[Dict[str, Any]],
+                             top_k: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Rule-based matching fallback when ML model is not available
-        Uses the same logic as _ml_prediction but without ML model
+        (e.g. still warming up). Scores every instructor at once with the columnar
+        rule_scorer.compatibility_scores and returns the same shape as _ml_prediction.
         """
-        return self._ml_prediction(learner_profile, instructors)
+        columns = InstructorColumns(instructors)
+        scores = compatibility_scores(columns, learner_profile)
+        
+        # Sorted by score (descending); only the returned rows become dicts
+        matches = []
+        for i in top_k_positions(scores, top_k).tolist():
+            inst = columns.records[i]
+            score = round(float(scores[i]), 2)
+            matches.append({
+                'instructor_id': inst['id'],
+                'instructor_name': inst['users']['full_name'],
+                'instructor_email': inst['users']['email'],
+                'instructor_avatar': inst['users'].get('avatar_url'),
+                'hourly_rate': inst['hourly_rate'],
+                'years_experience': inst['years_experience'],
+                'rating': inst['rating'],
+                'bio': inst['bio'],
+                'match_score': score,
+                'match_reasons': self._generate_match_reasons(learner_profile, inst, score),
+                'recommendation_strength': self._get_recommendation_strength(score)
+            })
+        
+        return matches
 
 
 # Example usage for testing
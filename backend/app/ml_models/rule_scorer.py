@@ -0,0 +1,169 @@
+"""
+Columnar rule-based scoring
+
+The instructor list is turned into NumPy columns once (InstructorColumns); each rule is
+then one array operation over every candidate, and only the top-k rows are turned back
+into result dicts. Used by InstructorMatcher's fallback and routes.matching.simple_matching.
+"""
+import numpy as np
+import pandas as pd
+from itertools import chain
+from typing import Any, Dict, List, Optional
+
+# InstructorMatcher weights (sum 1.0 before the quality bonuses)
+COMPATIBILITY_WEIGHTS = {
+    'instrument': 0.30,
+    'experience': 0.20,
+    'budget': 0.15,
+    'location': 0.12,
+    'schedule': 0.10,
+    'goals': 0.08,
+    'style': 0.05
+}
+
+class InstructorColumns:
+    """
+    Instructor dicts (instructor_profiles rows with their users join) as arrays.
+    Categorical fields are dictionary-coded, so an equality rule is an integer compare and a
+    substring rule (location) runs once per distinct value instead of once per instructor.
+    """
+
+    def __init__(self, instructors: List[Dict[str, Any]]):
+        self.records = list(instructors)
+        self.n = len(self.records)
+        records = self.records
+        users = [inst.get('users') or {} for inst in records]
+
+        self.instrument_codes, self.instrument_lookup = _encode([inst.get('instrument') for inst in records])
+        self.style_codes, self.style_lookup = _encode([inst.get('teaching_style') for inst in records])
+        self.skill_codes, self.skill_lookup = _encode([inst.get('skill_level') for inst in records])
+        self.location_codes, location_lookup = _encode([(u.get('location') or '').lower() for u in users])
+        self.location_values = list(location_lookup)
+
+        self.hourly_rate = _numbers([inst.get('hourly_rate') for inst in records])
+        self.rating = _numbers([inst.get('rating') for inst in records])
+        self.total_students = _numbers([inst.get('total_students') for inst in records])
+        self.years_experience = _numbers([inst.get('years_experience') for inst in records])
+        self.experience_years = _numbers([inst.get('experience_years') for inst in records])
+
+        # available_days as an (n, n_days) membership matrix over every day name seen
+        day_lists = [inst.get('available_days') or () for inst in records]
+        day_codes, self.day_lookup = _encode(list(chain.from_iterable(day_lists)))
+        self.days = np.zeros((self.n, len(self.day_lookup)), dtype=bool)
+        self.days[np.repeat(np.arange(self.n), [len(days) for days in day_lists]), day_codes] = True
+        self.day_counts = self.days.sum(axis=1) # Distinct days, like len(set(available_days))
+
+    def __len__(self):
+        return self.n
+
+    def location_contains(self, text: str) -> np.ndarray:
+        """ text (already lower-cased) is a substring of each instructor's location """
+        per_value = np.array([bool(value) and text in value for value in self.location_values] + [False])
+        return per_value[self.location_codes]
+
+    def has_location(self) -> np.ndarray:
+        per_value = np.array([bool(value) for value in self.location_values] + [False])
+        return per_value[self.location_codes]
+
+def compatibility_scores(columns: InstructorColumns, learner: Dict[str, Any]) -> np.ndarray:
+    """ InstructorMatcher's weighted compatibility score for every instructor, capped at 1.0 """
+    w = COMPATIBILITY_WEIGHTS
+    score = np.zeros(columns.n)
+
+    # 1. Instrument match (30%)
+    score += np.where(columns.instrument_codes == _code(columns.instrument_lookup, learner['instrument_type']),
+                      w['instrument'], 0.0)
+
+    # 2. Experience compatibility (20%): every instructor is assumed to teach every level
+    score += 1.0 * w['experience']
+
+    # 3. Budget fit (15%): within budget, <= 20% over, <= 50% over, beyond
+    budget = learner['budget']
+    rate = columns.hourly_rate
+    budget_fit = np.select([rate <= budget, rate <= budget * 1.2, rate <= budget * 1.5], [1.0, 0.7, 0.3], 0.1)
+    score += budget_fit * w['budget']
+
+    # 4. Location proximity (12%): neutral when either side is unspecified
+    location = learner.get('location')
+    if location:
+        location_fit = np.where(columns.location_contains(location.lower()), 1.0, 0.3)
+        location_fit = np.where(columns.has_location(), location_fit, 0.5)
+    else:
+        location_fit = np.full(columns.n, 0.5)
+    score += location_fit * w['location']
+
+    # 5. Schedule alignment (10%): share of the learner's days the instructor is available
+    schedule = learner.get('preferred_schedule')
+    learner_days = set(schedule.get('days', [])) if schedule else set()
+    if learner_days:
+        known = [columns.day_lookup[day] for day in learner_days if day in columns.day_lookup]
+        overlap = columns.days[:, known].sum(axis=1)
+        schedule_fit = np.where(columns.day_counts > 0, overlap / len(learner_days), 0.5)
+    else:
+        schedule_fit = np.full(columns.n, 0.5)
+    score += schedule_fit * w['schedule']
+
+    # 6. Learning goals alignment (8%): placeholder until specializations are stored
+    score += 0.08
+
+    # 7. Teaching style match (5%)
+    score += np.where(columns.style_codes == _code(columns.style_lookup, learner.get('learning_style')),
+                      w['style'], 0.0)
+
+    # Bonus: Quality metrics (up to +10%)
+    score += np.where(columns.rating >= 4.5, 0.05, 0.0)
+    score += np.where(columns.total_students > 20, 0.03, 0.0)
+    score += np.where(columns.years_experience > 5, 0.02, 0.0)
+
+    return np.minimum(score, 1.0)
+
+def simple_scores(columns: InstructorColumns, learner: Dict[str, Any]) -> np.ndarray:
+    """ routes.matching.simple_matching's additive score for every instructor """
+    budget = learner['budget']
+    rate = columns.hourly_rate
+    score = np.zeros(columns.n)
+    score += np.select([rate <= budget, rate <= budget * 1.2], [0.30, 0.15], 0.0)                      # Budget (30%)
+    score += np.select([columns.experience_years >= 5, columns.experience_years >= 2], [0.20, 0.10], 0.0) # Experience (20%)
+    score += np.select([columns.rating >= 4.5, columns.rating >= 3.5], [0.20, 0.10], 0.0)               # Rating (20%)
+    score += np.where(columns.skill_codes == _code(columns.skill_lookup, learner.get('experience_level')),
+                      0.15, 0.0)                                                                        # Skill level (15%)
+    score += np.where(columns.total_students > 10, 0.10, 0.0)                                           # Student base (10%)
+    location = learner.get('location')
+    if location:
+        score += np.where(columns.location_contains(location.lower()), 0.05, 0.0)                      # Location (5%)
+    return score
+
+def top_k_positions(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """
+    Positions of the k best scores (all when k is None), best first. Equal scores keep
+    their input order, like a stable sort of the whole list, but only k rows are sorted.
+    """
+    scores = np.asarray(scores)
+    if k is None or k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    if k <= 0:
+        return np.zeros(0, dtype='int64')
+    kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+    above = np.flatnonzero(scores > kth)
+    tied = np.flatnonzero(scores == kth)[:k - len(above)]
+    top = np.concatenate([above, tied])
+    return top[np.argsort(-scores[top], kind='stable')]
+
+def _encode(values):
+    """
+    (int32 codes, {value: code}) in first-seen order. A missing value (None) gets a code
+    too, keyed None, so a learner's None equals it as in the dict rules.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    return codes.astype('int32'), {None if pd.isna(value) else value: code for code, value in enumerate(uniques)}
+
+def _code(lookup, value):
+    """ Code of a learner value, -1 (matches nothing) when no instructor has it """
+    try:
+        return lookup.get(value, -1)
+    except TypeError:
+        return -1
+
+def _numbers(values):
+    """ float64 column; missing values (None) count as 0 """
+    return np.nan_to_num(np.array(values, dtype='float64'), nan=0.0)
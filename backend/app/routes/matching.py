@@ -5,10 +5,18 @@ FIXED: Uses correct schema (instructor_profiles, experience_years, status='sugge
 from flask import Blueprint, request, jsonify
 from app.utils.supabase_client import supabase
 from app.utils.auth_helpers import require_auth, get_current_user_id
+from app.ml_models.rule_scorer import InstructorColumns, simple_scores, top_k_positions
+import os
+import hmac
+import queue
 import random
+import threading
 
 bp = Blueprint('matching', __name__)
 
+# Distinct instructors find_instructors asks the model for (the response lists the best 5)
+ML_MATCH_COUNT = 12
+
 # Instructor Images Mapping
 INSTRUCTOR_IMAGES = {
     'guitar': [
@@ -56,7 +64,8 @@ def find_instructors():
     """
     Find matching instructors using ML model
     Body: { instrument_type, experience_level, learning_goals, budget, 
-            location, location_coords, preferred_schedule, learning_style, lesson_format }
+            location, location_coords, preferred_schedule, learning_style, lesson_format,
+            match_weights (optional: {categorical, numerical, text}) }
     """
     try:
         user_id = get_current_user_id()
@@ -68,28 +77,38 @@ def find_instructors():
             if field not in learner_profile:
                 return jsonify({'error': f'{field} is required'}), 400
         
+        from app.tarumbeta_ml.src.api.inference_semantic import get_matches, ModelNotReadyError
+        from app.tarumbeta_ml.src.api.explanations import match_reasons, recommendation_strength
+        
         # DIRECT ML MODEL MATCHING (No DB Fallback)
         try:
-            from app.tarumbeta_ml.src.api.inference_semantic import get_matches
             print(f"🚀 Using ML Model for matching...")
             
             # Get matches directly from the model
-            matches = get_matches(learner_profile, top_k=12)
+            # Filtered: only instructors in the learner's location/instrument cell use up top-k slots
+            # Optional match_weights, e.g. {"text": 0.3}, re-weight the score blocks for this request
+            try:
+                # explain=True: each hit carries its score breakdown, so the reasons below need no re-comparison
+                # diverse=True: the model returns distinct instructors (no repeated profiles/names, no near-copies)
+                matches = get_matches(learner_profile, top_k=ML_MATCH_COUNT, filtered=True,
+                                      weights=learner_profile.get('match_weights'), explain=True, diverse=True)
+            except ValueError as bad_weights:
+                return jsonify({'error': str(bad_weights)}), 400
             
-            # 1. Resolve real UUIDs from Database
-            match_names = [m['name'] for m in matches]
+            # 1. Resolve real profiles by ID
+            # The index carries instructor_profiles.id (profile_id), so there is no name lookup:
+            # unlinked (synthetic) hits skip the DB entirely and linked ones are a primary-key fetch
+            match_profile_ids = list({m['profile_id'] for m in matches if m.get('profile_id')})
             
-            # Fetch only the matched instructors
-            name_to_profile_map = {}
-            if match_names:
+            id_to_profile_map = {}
+            if match_profile_ids:
                 db_instructors_response = supabase.table('instructor_profiles').select(
                     'id, users!inner(id, full_name, email, avatar_url)'
-                ).in_('users.full_name', match_names).execute()
+                ).in_('id', match_profile_ids).execute()
                 
                 if db_instructors_response.data:
                     for item in db_instructors_response.data:
-                        full_name = item['users']['full_name']
-                        name_to_profile_map[full_name] = {
+                        id_to_profile_map[item['id']] = {
                             'profile_id': item['id'],
                             'user_id': item['users']['id'],
                             'email': item['users']['email'],
@@ -101,7 +120,6 @@ def find_instructors():
             proxy_profile = None
             
             final_matches = []
-            seen_names = set()
             
             # Prepare image pool for this request
             instrument_key = learner_profile.get('instrument_type', 'guitar').lower()
@@ -120,15 +138,7 @@ def find_instructors():
             random.shuffle(available_images)
             
             for m in matches:
-                # Deduplication (Robust)
-                raw_name = m['name']
-                normalized_name = raw_name.strip().lower()
-                
-                if normalized_name in seen_names:
-                    continue
-                seen_names.add(normalized_name)
-                
-                real_profile = name_to_profile_map.get(m['name'])
+                real_profile = id_to_profile_map.get(m.get('profile_id'))
                 
                 if not real_profile:
                     # Need a proxy
@@ -161,14 +171,10 @@ def find_instructors():
                         # No proxy available in DB? Skip.
                         continue
 
-                # Generate reasons
-                reasons = []
-                if m['match_score'] > 0.8:
-                    reasons.append("Strong match based on your profile")
+                # Generate reasons (matched fields and bio similarity come from the model's score breakdown)
+                reasons = match_reasons(m['score_breakdown'], learner_profile)
                 if m.get('hourly_rate', 0) <= learner_profile.get('budget', 0):
                     reasons.append(f"Within budget (KES {m.get('hourly_rate')}/hr)")
-                if m.get('location') == learner_profile.get('location'):
-                    reasons.append("Location match")
                 
                 # Assign unique image
                 if available_images:
@@ -232,7 +238,8 @@ def find_instructors():
                     'skill_level': skill_level if skill_level and skill_level != 'all' else 'Intermediate', # Return skill level
                     'match_score': int(m['match_score'] * 100),
                     'match_reasons': reasons,
-                    'recommendation_strength': "Excellent Match" if m['match_score'] > 0.8 else "Good Match"
+                    'score_breakdown': m['score_breakdown'],
+                    'recommendation_strength': recommendation_strength(m['score_breakdown'])
                 })
 
 
@@ -261,6 +268,13 @@ def find_instructors():
                 except Exception as db_err:
                     print(f"⚠️ Failed to save match history: {str(db_err)}")
 
+        except ModelNotReadyError as not_ready:
+            # Fail fast while the model warms up instead of blocking the worker
+            response = jsonify({'error': 'Matching model is warming up, please retry shortly',
+                                'detail': str(not_ready)})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        
         except Exception as ml_error:
             print(f"⚠️ ML model error: {str(ml_error)}")
             import traceback
@@ -277,52 +291,37 @@ def find_instructors():
         print(f"Find instructors error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-def simple_matching(learner_profile, instructors):
+def simple_matching(learner_profile, instructors, top_k=None):
     """
-    Simple rule-based matching as fallback when ML model not available
+    Simple rule-based matching as fallback when ML model not available.
+    Every instructor is scored at once (rule_scorer.simple_scores); only the best top_k
+    (all when None) become result dicts.
     """
+    columns = InstructorColumns(instructors)
+    scores = simple_scores(columns, learner_profile)
     matches = []
     
-    for instructor in instructors:
-        score = 0.0
-        reasons = []
+    # Sorted by score (descending)
+    for i in top_k_positions(scores, top_k).tolist():
+        instructor = columns.records[i]
+        score = round(float(scores[i]), 2)
         
-        # Budget compatibility (30%)
+        # Reasons for the rules this instructor scored on
+        reasons = []
         if instructor['hourly_rate'] <= learner_profile['budget']:
-            score += 0.30
             reasons.append(f"Within budget ({instructor['hourly_rate']}/hour)")
         elif instructor['hourly_rate'] <= learner_profile['budget'] * 1.2:
-            score += 0.15
             reasons.append(f"Slightly above budget ({instructor['hourly_rate']}/hour)")
-        
-        # Experience (20%) - FIXED: uses experience_years
         if instructor['experience_years'] >= 5:
-            score += 0.20
             reasons.append(f"{instructor['experience_years']} years of experience")
-        elif instructor['experience_years'] >= 2:
-            score += 0.10
-        
-        # Rating (20%)
         if instructor['rating'] >= 4.5:
-            score += 0.20
             reasons.append(f"Highly rated ({instructor['rating']}⭐)")
-        elif instructor['rating'] >= 3.5:
-            score += 0.10
-        
-        # Skill level match (15%)
         if learner_profile.get('experience_level') == instructor.get('skill_level'):
-            score += 0.15
             reasons.append(f"{instructor['skill_level'].title()} level matches")
-        
-        # Student base (10%)
         if instructor['total_students'] > 10:
-            score += 0.10
             reasons.append(f"Experienced with {instructor['total_students']} students")
-        
-        # Location (5%)
         if learner_profile.get('location') and instructor['users'].get('location'):
             if learner_profile['location'].lower() in instructor['users']['location'].lower():
-                score += 0.05
                 reasons.append("Local instructor")
         
         # Determine recommendation strength
@@ -357,16 +356,190 @@ def simple_matching(learner_profile, instructors):
                 else ', '.join(random.sample(['Classical', 'Jazz', 'Rock', 'Pop', 'Blues', 'Afrobeat', 'Gospel'], k=random.randint(1, 3)))
             ),
             'skill_level': learner_profile.get('skill_level') if learner_profile.get('skill_level') and learner_profile.get('skill_level') != 'all' else 'Intermediate',
-            'match_score': round(score, 2),
+            'match_score': score,
             'match_reasons': reasons,
             'recommendation_strength': strength
         })
     
-    # Sort by score (descending)
-    matches.sort(key=lambda x: x['match_score'], reverse=True)
-    
     return matches
 
+def instructor_index_row(profile):
+    """
+    instructor_profiles row (with users) -> the processed-instructor columns the ML index uses
+    """
+    user = profile.get('users') or {}
+    return {
+        'profile_id': profile['id'],
+        'name': user.get('full_name') or '',
+        'location': (user.get('location') or '').title(),
+        'instrument_type': (profile.get('instrument') or '').title(),
+        'skill_level': (profile.get('skill_level') or 'Beginner').title(),
+        'teaching_language': profile.get('teaching_language') or 'English',
+        'hourly_rate': profile.get('hourly_rate') or 0,
+        'rating': profile.get('rating') or 0,
+        'bio_keywords': profile.get('bio') or ''
+    }
+
+def sync_instructor_index(user_id):
+    """
+    Re-indexes the instructor profile of user_id in the live ML index (one BERT encode).
+    Returns the affected index keys (empty when the user has no instructor profile).
+    """
+    from app.tarumbeta_ml.src.api.inference_semantic import upsert_instructors
+    
+    response = supabase.table('instructor_profiles').select(
+        '*, users!instructor_profiles_user_id_fkey(full_name, location)'
+    ).eq('user_id', user_id).execute()
+    
+    if response.data:
+        return upsert_instructors([instructor_index_row(p) for p in response.data])
+    return []
+
+# Re-indexes requested from other routes (e.g. a review changing a rating) run here, one at
+# a time, off the request thread: an index update or failure never reaches their response
+_reindex_queue = queue.Queue()
+_reindex_thread = None
+_reindex_lock = threading.Lock()
+
+def queue_instructor_reindex(user_id):
+    """ Queues sync_instructor_index(user_id) on the background re-index thread; never blocks or raises """
+    global _reindex_thread
+    try:
+        with _reindex_lock:
+            # Started lazily, so each forked worker gets its own (threads don't survive fork())
+            if _reindex_thread is None or not _reindex_thread.is_alive():
+                _reindex_thread = threading.Thread(target=_reindex_worker, name='ml-reindex', daemon=True)
+                _reindex_thread.start()
+        _reindex_queue.put(user_id)
+    except Exception as e:
+        print(f"⚠️ ML index re-index not queued: {str(e)}")
+
+def _reindex_worker():
+    from app.tarumbeta_ml.src.api.inference_semantic import get_readiness, LiveUpdateError
+    while True:
+        user_id = _reindex_queue.get()
+        try:
+            if get_readiness()['ready']: # Never load the model just for a re-index
+                sync_instructor_index(user_id)
+        except LiveUpdateError:
+            pass # Loose artifacts only: the next pipeline run picks the change up
+        except Exception as e:
+            print(f"⚠️ ML index not updated for {user_id}: {str(e)}")
+        finally:
+            _reindex_queue.task_done()
+
+@bp.route('/index/instructor', methods=['PUT'])
+@require_auth
+def update_instructor_index():
+    """
+    Refresh the current instructor's vector after a profile change (no full ETL re-run)
+    """
+    try:
+        from app.tarumbeta_ml.src.api.inference_semantic import ModelNotReadyError, LiveUpdateError
+        
+        try:
+            keys = sync_instructor_index(get_current_user_id())
+        except ModelNotReadyError as not_ready:
+            response = jsonify({'error': 'Matching model is warming up, please retry shortly',
+                                'detail': str(not_ready)})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        except LiveUpdateError as no_bundle:
+            return jsonify({'error': 'Live index updates are disabled on this deployment',
+                            'detail': str(no_bundle)}), 503
+        
+        if not keys:
+            return jsonify({'error': 'Instructor profile not found'}), 404
+        return jsonify({'indexed': keys}), 200
+        
+    except Exception as e:
+        print(f"Update instructor index error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/index/instructor', methods=['DELETE'])
+@require_auth
+def remove_instructor_index():
+    """
+    Remove the current instructor from ML matching
+    """
+    try:
+        from app.tarumbeta_ml.src.api.inference_semantic import remove_instructors, ModelNotReadyError, LiveUpdateError
+        
+        profile = supabase.table('instructor_profiles').select('id').eq('user_id', get_current_user_id()).execute()
+        if not profile.data:
+            return jsonify({'error': 'Instructor profile not found'}), 404
+        
+        try:
+            keys = remove_instructors([p['id'] for p in profile.data])
+        except ModelNotReadyError as not_ready:
+            response = jsonify({'error': 'Matching model is warming up, please retry shortly',
+                                'detail': str(not_ready)})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        except LiveUpdateError as no_bundle:
+            return jsonify({'error': 'Live index updates are disabled on this deployment',
+                            'detail': str(no_bundle)}), 503
+        
+        return jsonify({'removed': keys}), 200
+        
+    except Exception as e:
+        print(f"Remove instructor index error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/metrics', methods=['GET'])
+def get_model_metrics():
+    """
+    ML serving counters (embedding cache, index size and updates, micro-batching)
+    """
+    try:
+        from app.tarumbeta_ml.src.api.inference_semantic import get_model_stats
+        return jsonify(get_model_stats()), 200
+        
+    except Exception as e:
+        print(f"Get model metrics error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+def _is_admin_request():
+    """ X-Admin-Token must match ML_ADMIN_TOKEN; the admin routes are disabled when it's unset """
+    expected = os.getenv('ML_ADMIN_TOKEN')
+    supplied = request.headers.get('X-Admin-Token', '')
+    return bool(expected) and hmac.compare_digest(supplied, expected)
+
+@bp.route('/admin/reload', methods=['POST'])
+def reload_model_bundle():
+    """
+    Hot-swap this worker to the published model bundle (or body {"version": ...}).
+    Other workers pick up a new CURRENT on their own within config.BUNDLE_WATCH_SECONDS.
+    """
+    if not _is_admin_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        from app.tarumbeta_ml.src.api.inference_semantic import reload_model, get_bundle_status
+        
+        data = request.get_json(silent=True) or {}
+        reloaded = reload_model(data.get('version'))
+        status = get_bundle_status()
+        return jsonify({'reloaded': reloaded, 'version': status['version']}), 200
+        
+    except Exception as e:
+        print(f"Reload model bundle error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/admin/bundle', methods=['GET'])
+def get_model_bundle():
+    """
+    Live bundle version and manifest, the published version and the last reload
+    """
+    if not _is_admin_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        from app.tarumbeta_ml.src.api.inference_semantic import get_bundle_status
+        return jsonify(get_bundle_status()), 200
+        
+    except Exception as e:
+        print(f"Get model bundle error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/history', methods=['GET'])
 @require_auth
 def get_match_history():
@@ -176,6 +176,10 @@ def update_instructor_rating(user_id):
                 'rating': round(avg_rating, 2),
                 'total_reviews': len(ratings)
             }).eq('user_id', user_id).execute()
+            
+            # Keep the ML index's rating in step (a single-instructor update, in the background)
+            from app.routes.matching import queue_instructor_reindex
+            queue_instructor_reindex(user_id)
     except Exception as e:
         print(f"Update instructor rating error: {str(e)}")
 
@@ -0,0 +1,115 @@
+import numbers
+import os
+import numpy as np
+
+# Ensure we can find the config
+try:
+    from app.tarumbeta_ml.src.features.query_vectorizer import BLOCKS, compose_blocks
+except ImportError:
+    try:
+        from backend.app.tarumbeta_ml.src.features.query_vectorizer import BLOCKS, compose_blocks
+    except ImportError:
+        import sys
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+        from src.features.query_vectorizer import BLOCKS, compose_blocks
+
+class BlockScorer:
+    """
+    Instructor vectors kept as three unweighted blocks (categorical / numerical / text, each
+    row unit length or zero), so the block weights are chosen per query instead of being
+    baked into the stored vectors. For blocks u_b and weights w_b the V3 vector is
+    concat(w_b * u_b) / |v|_w with |v|_w = sqrt(sum of w_b^2 over the non-zero blocks), so
+
+        cos(q, v) = sum_b w_b^2 * (q_b . u_b) / (|q|_w * |v|_w)
+
+    The per-block inner products q_b . u_b don't depend on the weights: they are computed
+    once (partial_scores), and every weighting after that (a per-request override, each
+    point of a sweep) is a few length-n vector operations (combine).
+    Rows are instructor keys, like the FAISS ids.
+    """
+
+    def __init__(self, blocks):
+        self.blocks = {block: np.asarray(blocks[block], dtype='float32') for block in BLOCKS}
+        self.present = block_presence(self.blocks)
+        self.dims = {block: self.blocks[block].shape[1] for block in BLOCKS}
+
+    def __len__(self):
+        return len(self.present)
+
+    def vectors(self, weights, ids=None):
+        """ Weighted, L2-normalized vectors (the index layout) for ids (default: every row) """
+        blocks = self.blocks if ids is None else {b: self.blocks[b][ids] for b in BLOCKS}
+        return compose_blocks(blocks, weights)
+
+    def partial_scores(self, query_blocks, ids=None):
+        """ (3, n_queries, n_ids) per-block inner products, in BLOCKS order """
+        partials = []
+        for block in BLOCKS:
+            stored = self.blocks[block] if ids is None else self.blocks[block][ids]
+            partials.append(np.asarray(query_blocks[block], dtype='float32') @ stored.T)
+        return np.stack(partials)
+
+    def combine(self, partials, query_present, weights, ids=None):
+        """ Weighted cosine scores (n_queries, n_ids) from partial_scores() output """
+        w2 = np.array([weights[block] ** 2 for block in BLOCKS], dtype='float32')
+        present = self.present if ids is None else self.present[ids]
+        norms = np.sqrt(query_present @ w2)[:, None] * np.sqrt(present @ w2)[None, :]
+        return np.tensordot(w2, partials, axes=1) / np.maximum(norms, 1e-12)
+
+    def scores(self, query_blocks, weights, ids=None):
+        """ Exact weighted cosine of each query against ids (default: every row) """
+        return self.combine(self.partial_scores(query_blocks, ids), block_presence(query_blocks), weights, ids)
+
+    def with_rows(self, keys, blocks=None, n_rows=None):
+        """
+        Copy with rows `keys` set to `blocks` (zeros when None), grown to n_rows. Never
+        mutates this scorer, whose arrays may be read-only maps still used by searches.
+        """
+        n_rows = max(n_rows or 0, len(self), int(np.max(keys)) + 1 if len(keys) else 0)
+        updated = {}
+        for block in BLOCKS:
+            grown = np.zeros((n_rows, self.dims[block]), dtype='float32')
+            grown[:len(self)] = self.blocks[block]
+            grown[keys] = 0 if blocks is None else blocks[block]
+            updated[block] = grown
+        return BlockScorer(updated)
+
+def block_presence(blocks):
+    """ (n, 3) float32: 1 where a row's block is non-zero (it then has unit length) """
+    return np.stack([np.any(np.asarray(blocks[block]) != 0, axis=1) for block in BLOCKS], axis=1).astype('float32')
+
+def check_weights(weights):
+    """
+    Per-request block weights as {block: float}. Raises ValueError unless `weights` is a dict
+    (or (block, weight) pairs) of known blocks to finite, non-negative numbers: they come from
+    the client, and become part of the (hashable) batching and result-cache keys.
+    """
+    if isinstance(weights, dict):
+        pairs = list(weights.items())
+    elif isinstance(weights, (list, tuple)) and all(isinstance(p, (list, tuple)) and len(p) == 2 for p in weights):
+        pairs = [tuple(p) for p in weights]
+    else:
+        raise ValueError(f"Weights must be an object of block weights, e.g. {{'text': 0.3}}, "
+                         f"got {type(weights).__name__}")
+    unknown = [block for block, _ in pairs if block not in BLOCKS]
+    if unknown:
+        raise ValueError(f"Unknown weight block(s) {unknown}; expected {list(BLOCKS)}")
+    checked = {}
+    for block, weight in pairs:
+        if isinstance(weight, bool) or not isinstance(weight, numbers.Real) or not np.isfinite(weight) or weight < 0:
+            raise ValueError(f"Weight for '{block}' must be a non-negative number, got {weight!r}")
+        checked[block] = float(weight)
+    return checked
+
+def resolve_weights(weights, defaults):
+    """
+    Full block weights: `weights` (a dict or (block, weight) pairs; may name only some blocks)
+    over `defaults`. Raises ValueError for malformed, unknown, negative or all-zero weights.
+    """
+    if weights is None or (isinstance(weights, (dict, list, tuple)) and not weights):
+        return defaults
+    resolved = dict(defaults)
+    resolved.update(check_weights(weights))
+    if not any(resolved.values()):
+        raise ValueError("At least one block weight must be positive")
+    return resolved
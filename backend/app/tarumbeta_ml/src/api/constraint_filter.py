@@ -0,0 +1,75 @@
+import numpy as np
+
+UNCONSTRAINED = (None, '', 'all', 'All', 'any', 'Any')
+
+class ConstraintPartitions:
+    """
+    Instructor row ids partitioned by hard-constraint cells, e.g. (location, instrument_type).
+    `instructors` is anything indexable by column name (column store dict or DataFrame).
+    One partition table per relaxation level, so a strict query only scores its own cell
+    and falls back level by level when the cell is too small.
+    """
+
+    def __init__(self, instructors, fields, relaxation_order):
+        # Level 0 is the strictest cell; each later level drops the next field in relaxation_order
+        self.levels = [tuple(fields)]
+        for dropped in relaxation_order:
+            self.levels.append(tuple(f for f in self.levels[-1] if f != dropped))
+
+        # Rows removed by the incremental updater stay in the metadata but are never candidates
+        rows = np.flatnonzero(np.asarray(instructors['active'])) if 'active' in instructors else None
+        n_rows = len(np.asarray(instructors[fields[0]]))
+        self.active_ids = rows.astype('int64') if rows is not None else np.arange(n_rows, dtype='int64')
+        self.partitions = {level: _group(instructors, level, rows) for level in self.levels}
+        self.single_field = {f: _group(instructors, (f,), rows) for f in fields}
+
+    def candidates(self, profile, k):
+        """
+        Returns (row_ids, matched_fields) for the strictest level whose cell holds >= k
+        instructors, or (None, ()) when even the loosest level is too small (search everything).
+        Fields the learner left empty / 'all' are not constrained.
+        """
+        for level in self.levels:
+            fields = tuple(f for f in level if profile.get(f) not in UNCONSTRAINED)
+            if not fields:
+                break
+            ids = self._cell(fields, profile)
+            if len(ids) >= k:
+                return ids, fields
+        return None, ()
+
+    def cell_sizes(self):
+        return {'+'.join(level): len(cells) for level, cells in self.partitions.items()}
+
+    def _cell(self, fields, profile):
+        if fields in self.partitions:
+            return self.partitions[fields].get(tuple(profile[f] for f in fields), _EMPTY)
+        # Skipping an unconstrained field can leave a combination that was not precomputed
+        ids = None
+        for f in fields:
+            cell = self.single_field[f].get((profile[f],), _EMPTY)
+            ids = cell if ids is None else np.intersect1d(ids, cell, assume_unique=True)
+        return ids
+
+def _group(columns, fields, rows=None):
+    """
+    {cell key tuple: sorted row ids} for one combination of fields (columns: name -> array).
+    rows restricts the grouping to those row ids (default: every row).
+    """
+    if rows is None:
+        rows = np.arange(len(columns[fields[0]]), dtype='int64')
+    if len(rows) == 0:
+        return {}
+    # Combine per-field codes into one integer cell code, then split a stable sort by code
+    codes = None
+    for f in fields:
+        _, inverse = np.unique(np.asarray(columns[f])[rows], return_inverse=True)
+        codes = inverse.astype('int64') if codes is None else codes * (inverse.max() + 1) + inverse
+    order = np.argsort(codes, kind='stable')
+    cells = np.split(rows[order], np.flatnonzero(np.diff(codes[order])) + 1)
+    return {
+        tuple(str(columns[f][ids[0]]) for f in fields): ids.astype('int64')
+        for ids in cells if len(ids)
+    }
+
+_EMPTY = np.zeros(0, dtype='int64')
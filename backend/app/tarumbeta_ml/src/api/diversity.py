@@ -0,0 +1,37 @@
+import numpy as np
+
+def mmr_select(relevance, vectors, k, lambda_=0.7, identities=None, duplicates=None):
+    """
+    Maximal-marginal-relevance reranking of a candidate pool: positions of k picks, in
+    pick order. Each pick maximizes
+
+        lambda_ * relevance - (1 - lambda_) * (max cosine to the instructors already picked)
+
+    over the stored (weighted, unit-length) vectors, so a near-copy of a pick drops down
+    instead of taking the next slot. Candidates sharing an identity (same profile / same
+    display name) with a pick, or marked as its duplicate in the (pool, pool) boolean
+    `duplicates` matrix, are suppressed outright. Fewer than k positions come back when
+    the pool runs out.
+    """
+    relevance = np.asarray(relevance, dtype='float32')
+    n = len(relevance)
+    k = min(k, n)
+    if k == 0:
+        return np.zeros(0, dtype='int64')
+    similarity = vectors @ vectors.T # (pool, pool): the only dense step
+    closest = np.full(n, -np.inf, dtype='float32') # Max similarity to the picks so far
+    available = np.ones(n, dtype=bool)
+    picks = []
+    for _ in range(k):
+        gain = np.where(available, lambda_ * relevance - (1 - lambda_) * np.maximum(closest, 0), -np.inf)
+        best = int(np.argmax(gain))
+        if not np.isfinite(gain[best]):
+            break
+        picks.append(best)
+        available[best] = False
+        closest = np.maximum(closest, similarity[best])
+        if identities is not None:
+            available &= identities != identities[best]
+        if duplicates is not None:
+            available &= ~duplicates[best]
+    return np.asarray(picks, dtype='int64')
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+def normalize_text(text, lowercase=False):
+    """ Whitespace-collapsed text; lower-cased only for an encoder whose tokenizer lower-cases anyway """
+    text = ' '.join(str(text or '').split())
+    return text.lower() if lowercase else text
+
+class EmbeddingCache:
+    """
+    Bounded, thread-safe LRU cache of text embeddings with TTL expiry.
+    Keys are whitespace-collapsed text, also lower-cased with lowercase=True: only for an
+    encoder whose tokenizer is uncased (features/text_encoder.py lowercases_input), where
+    case never changes the embedding. A cache holds one encoder's embeddings.
+    """
+
+    def __init__(self, max_size=4096, ttl_seconds=None, clock=time.monotonic, lowercase=False):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.lowercase = lowercase
+        self._clock = clock
+        self._entries = OrderedDict() # key -> (embedding, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def normalize_key(self, text):
+        return normalize_text(text, self.lowercase)
+
+    def get(self, text):
+        key = self.normalize_key(text)
+        with self._lock:
+            embedding = self._lookup(key)
+            if embedding is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return embedding
+
+    def put(self, text, embedding):
+        key = self.normalize_key(text)
+        embedding = np.array(embedding, dtype='float32')
+        embedding.setflags(write=False) # Shared between callers
+        with self._lock:
+            self._store(key, embedding)
+
+    def get_or_encode(self, texts, encode_fn):
+        """
+        Returns an (n, d) embedding matrix for texts, calling encode_fn only for
+        the unique keys that are not cached. On a full hit encode_fn is never called.
+        The normalized text is only the key: encode_fn sees the first original text of a key.
+        """
+        keys = [self.normalize_key(t) for t in texts]
+        found = {}
+        missing = {} # Unique uncached keys (in order) -> their first original text
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in found or key in missing:
+                    continue
+                embedding = self._lookup(key)
+                if embedding is None:
+                    missing[key] = str(text or '')
+                else:
+                    found[key] = embedding
+            self.misses += sum(1 for key in keys if key not in found)
+            self.hits += sum(1 for key in keys if key in found)
+
+        if missing:
+            encoded = np.asarray(encode_fn(list(missing.values())), dtype='float32')
+            with self._lock:
+                for key, embedding in zip(missing, encoded):
+                    embedding = embedding.copy()
+                    embedding.setflags(write=False)
+                    self._store(key, embedding)
+                    found[key] = embedding
+
+        if not keys:
+            return np.zeros((0, 0), dtype='float32')
+        return np.stack([found[key] for key in keys])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # --- Callers must hold self._lock ---
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        embedding, stored_at = entry
+        if self.ttl_seconds is not None and self._clock() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return embedding
+
+    def _store(self, key, embedding):
+        self._entries[key] = (embedding, self._clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,39 @@
+# Human-readable match reasons, read off the score_breakdown that
+# SemanticRecommender.recommend(..., explain=True) attaches to every hit
+import os
+
+# Ensure we can find the config
+try:
+    from app.tarumbeta_ml.src.utils import config
+except ImportError:
+    try:
+        from backend.app.tarumbeta_ml.src.utils import config
+    except ImportError:
+        import sys
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+        from src.utils import config
+
+# In display order; {value} is the learner's (= the instructor's) value of the field
+FIELD_REASONS = {
+    'instrument_type': "Teaches {value}",
+    'skill_level': "Teaches {value} learners",
+    'location': "Based in {value}",
+    'teaching_language': "Teaches in {value}"
+}
+
+STRENGTHS = {4: "Excellent Match", 3: "Great Match", 2: "Good Match", 1: "Fair Match"}
+
+def match_reasons(breakdown, profile):
+    """ Reasons for one hit: the shared fields, then the bio similarity when it is high """
+    matched = set(breakdown['matched_fields'])
+    reasons = [template.format(value=profile.get(field, ''))
+               for field, template in FIELD_REASONS.items() if field in matched]
+    if breakdown['text_similarity'] >= config.EXPLAIN_TEXT_SIMILARITY:
+        reasons.append("Bio closely matches your learning goals")
+    return reasons
+
+def recommendation_strength(breakdown):
+    """ Graded on what actually matched: the instrument first, then the number of shared fields """
+    if 'instrument_type' not in breakdown['matched_fields']:
+        return "Possible Match"
+    return STRENGTHS[len(breakdown['matched_fields'])]
@@ -0,0 +1,155 @@
+import numpy as np
+
+class FactorizedScorer:
+    """
+    Exact top-k over the block-separated instructor vectors (api/block_scorer.py) without a
+    dense 405-d product per instructor. Per block b with weight w_b:
+
+      categorical : one-hot of 4 fields, so q_c . u_c = n_matching_fields / sqrt(n_q * n_i):
+                    integer equality on an (n, 4) code array, no floats touched
+      numerical   : two columns, a 2-term dot product
+      text        : the only dense part (384-d)
+
+      score = (w_c^2 cat + w_n^2 num + w_t^2 text) / (|q|_w * |v|_w)
+
+    Text cosines lie in [-1, 1], so the cheap categorical + numerical part bounds every
+    score. The text block is only multiplied for the instructors whose upper bound can
+    still reach the k-th best exact score: with the categorical block weighted 0.8, that
+    is usually the learner's own cell. Rankings equal IndexFlatIP's (up to exact ties).
+    """
+
+    def __init__(self, blocks, field_sizes, min_candidates=64, max_chunk_cells=1 << 21):
+        self.field_sizes = list(field_sizes)
+        self.min_candidates = min_candidates
+        self.max_chunk_cells = max_chunk_cells # Bounds the (queries x instructors) scratch arrays
+        self.codes = field_codes(blocks.blocks['categorical'], self.field_sizes)
+        n_active = (self.codes >= 0).sum(axis=1)
+        self.inv_sqrt_active = np.where(n_active > 0, 1.0 / np.sqrt(np.maximum(n_active, 1)), 0.0).astype('float32')
+        self.num = np.asarray(blocks.blocks['numerical'], dtype='float32')
+        self.text = blocks.blocks['text']
+        self.present = blocks.present
+
+        # Scored-instructor counters (see stats()): how much dense text math the bound saved
+        self.queries = 0
+        self.candidates = 0
+        self.text_scored = 0
+
+    def search(self, query_blocks, weights, k, ids=None):
+        """
+        Top-k per query over ids (default: every row): (scores, ids), each (n_queries, <=k),
+        best first. query_blocks come from CompiledQueryVectorizer.blocks().
+        """
+        ids = np.arange(len(self.codes), dtype='int64') if ids is None else np.asarray(ids, dtype='int64')
+        q_codes = field_codes(query_blocks['categorical'], self.field_sizes)
+        q_num = np.asarray(query_blocks['numerical'], dtype='float32')
+        q_text = np.asarray(query_blocks['text'], dtype='float32')
+        w2 = np.array([weights['categorical'] ** 2, weights['numerical'] ** 2, weights['text'] ** 2],
+                      dtype='float32')
+
+        # Per-instructor terms shared by every query
+        codes = self.codes[ids]
+        inv_sqrt_active = self.inv_sqrt_active[ids]
+        num = self.num[ids]
+        inv_v = 1.0 / np.maximum(np.sqrt(self.present[ids] @ w2), 1e-12)
+        text_present = self.present[ids, 2]
+        q_codes = np.where(q_codes < 0, -2, q_codes) # An unknown query value matches nothing
+
+        all_scores, all_ids = [], []
+        chunk = max(1, self.max_chunk_cells // max(len(ids), 1))
+        for start in range(0, len(q_codes), chunk):
+            # Categorical + numerical part for a chunk of queries at once: (chunk, n) integer compares
+            rows = slice(start, start + chunk)
+            matches = np.zeros((len(q_codes[rows]), len(ids)), dtype='float32')
+            for f in range(codes.shape[1]):
+                matches += codes[None, :, f] == q_codes[rows, f, None]
+            n_q = np.maximum((q_codes[rows] >= 0).sum(axis=1), 1).astype('float32')
+            partial = w2[0] * matches * inv_sqrt_active[None, :] / np.sqrt(n_q)[:, None] + w2[1] * (q_num[rows] @ num.T)
+
+            for i, q in enumerate(range(len(q_codes))[rows]):
+                q_present = np.array([q_codes[q].max() >= 0, q_num[q].any(), q_text[q].any()], dtype='float32')
+                inv_norm = inv_v / max(np.sqrt(q_present @ w2), 1e-12)
+                base = partial[i] * inv_norm
+
+                # Dense text only where it can matter
+                text_weight = w2[2] * q_present[2] * text_present * inv_norm
+                scores, positions = self._top_k(base, text_weight, q_text[q], ids, k)
+                all_scores.append(scores)
+                all_ids.append(ids[positions])
+        return all_scores, all_ids
+
+    def _top_k(self, base, text_weight, q_text, ids, k):
+        upper = base + text_weight # Text cosine <= 1
+        k = min(k, len(ids))
+        if k == 0:
+            return np.zeros(0, dtype='float32'), np.zeros(0, dtype='int64')
+
+        # First pass: the best upper bounds; their k-th exact score is a lower bound on the answer
+        m = min(len(ids), max(4 * k, self.min_candidates))
+        first = np.argpartition(-upper, m - 1)[:m] if m < len(ids) else np.arange(len(ids))
+        exact = base[first] + text_weight[first] * (self.text[ids[first]] @ q_text)
+        kth = np.partition(exact, len(exact) - k)[len(exact) - k]
+
+        # Second pass: anyone else whose bound beats it (rare when the categorical block dominates)
+        rest = np.flatnonzero(upper > kth)
+        rest = rest[~np.isin(rest, first, assume_unique=True)]
+        if len(rest):
+            first = np.concatenate([first, rest])
+            exact = np.concatenate([exact, base[rest] + text_weight[rest] * (self.text[ids[rest]] @ q_text)])
+
+        self.queries += 1
+        self.candidates += len(ids)
+        self.text_scored += len(first)
+        top = np.argpartition(-exact, k - 1)[:k] if k < len(exact) else np.arange(len(exact))
+        top = top[np.argsort(-exact[top], kind='stable')]
+        return exact[top], first[top]
+
+    def explain(self, query_blocks, weights, ids):
+        """
+        Score decomposition for (n_queries, k) hit ids (-1 = empty slot), in one pass over
+        the whole batch. Returns (n_queries, k) arrays: each block's weighted contribution
+        ('categorical' + 'numerical' + 'text' = the cosine score), the raw bio cosine
+        ('text_similarity') and a (n_queries, k, n_fields) 'matched' mask of equal fields.
+        """
+        ids = np.asarray(ids, dtype='int64')
+        valid = ids >= 0
+        rows = np.where(valid, ids, 0)
+        q_codes = field_codes(query_blocks['categorical'], self.field_sizes)
+        q_num = np.asarray(query_blocks['numerical'], dtype='float32')
+        q_text = np.asarray(query_blocks['text'], dtype='float32')
+        w2 = np.array([weights['categorical'] ** 2, weights['numerical'] ** 2, weights['text'] ** 2],
+                      dtype='float32')
+
+        matched = (self.codes[rows] == np.where(q_codes < 0, -2, q_codes)[:, None, :]) & valid[..., None]
+        n_q = np.maximum((q_codes >= 0).sum(axis=1), 1).astype('float32')
+        cat = matched.sum(axis=2) * self.inv_sqrt_active[rows] / np.sqrt(n_q)[:, None]
+        num = np.einsum('qd,qkd->qk', q_num, self.num[rows])
+        text = np.einsum('qd,qkd->qk', q_text, self.text[rows])
+
+        q_present = np.stack([q_codes.max(axis=1) >= 0, q_num.any(axis=1), q_text.any(axis=1)], axis=1)
+        norms = np.sqrt(q_present.astype('float32') @ w2)[:, None] * np.sqrt(self.present[rows] @ w2)
+        inv_norm = np.where(valid, 1.0 / np.maximum(norms, 1e-12), 0.0)
+        return {
+            'categorical': w2[0] * cat * inv_norm,
+            'numerical': w2[1] * num * inv_norm,
+            'text': w2[2] * text * inv_norm,
+            'text_similarity': np.where(valid, text, 0.0),
+            'matched': matched
+        }
+
+    def stats(self):
+        return {
+            'queries': self.queries,
+            'text_scored_fraction': round(self.text_scored / self.candidates, 4) if self.candidates else 0.0
+        }
+
+def field_codes(cat_block, field_sizes):
+    """ (n, n_fields) int16 category index per one-hot field, -1 where the field is empty/unknown """
+    cat_block = np.asarray(cat_block)
+    codes = np.full((len(cat_block), len(field_sizes)), -1, dtype='int16')
+    start = 0
+    for f, size in enumerate(field_sizes):
+        segment = cat_block[:, start:start + size]
+        hit = np.flatnonzero(segment.any(axis=1))
+        codes[hit, f] = segment[hit].argmax(axis=1)
+        start += size
+    return codes
@@ -0,0 +1,389 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+import faiss
+
+# Ensure we can find the config
+try:
+    from app.tarumbeta_ml.src.utils import config
+    from app.tarumbeta_ml.src.model.index_spec import apply_search_params, build_index
+    from app.tarumbeta_ml.src.api.constraint_filter import ConstraintPartitions
+    from app.tarumbeta_ml.src.api.instructor_table import InstructorTable
+    from app.tarumbeta_ml.src.features.query_vectorizer import BLOCKS, compose_blocks
+    from app.tarumbeta_ml.src.model.bundle import (append_delta, bundle_lock, bundle_path, current_version,
+                                                   journal_length, publish_bundle, read_deltas, read_manifest,
+                                                   write_bundle)
+except ImportError:
+    try:
+        from backend.app.tarumbeta_ml.src.utils import config
+        from backend.app.tarumbeta_ml.src.model.index_spec import apply_search_params, build_index
+        from backend.app.tarumbeta_ml.src.api.constraint_filter import ConstraintPartitions
+        from backend.app.tarumbeta_ml.src.api.instructor_table import InstructorTable
+        from backend.app.tarumbeta_ml.src.features.query_vectorizer import BLOCKS, compose_blocks
+        from backend.app.tarumbeta_ml.src.model.bundle import (append_delta, bundle_lock, bundle_path, current_version,
+                                                               journal_length, publish_bundle, read_deltas,
+                                                               read_manifest, write_bundle)
+    except ImportError:
+        import sys
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+        from src.utils import config
+        from src.model.index_spec import apply_search_params, build_index
+        from src.api.constraint_filter import ConstraintPartitions
+        from src.api.instructor_table import InstructorTable
+        from src.features.query_vectorizer import BLOCKS, compose_blocks
+        from src.model.bundle import (append_delta, bundle_lock, bundle_path, current_version, journal_length,
+                                      publish_bundle, read_deltas, read_manifest, write_bundle)
+
+TEXT_COLS = ['name', 'location', 'instrument_type', 'skill_level', 'teaching_language', 'bio_keywords']
+NUM_COLS = ['hourly_rate', 'rating']
+
+class LiveUpdateError(RuntimeError):
+    """ Raised for a persisted update while serving the loose artifacts (no bundle to publish). """
+
+class IndexUpdater:
+    """
+    Incremental maintenance of a loaded SemanticRecommender, keyed by instructor_profiles.id.
+
+    upsert() vectorizes only the changed instructors (saved encoder/scaler, one encoder call;
+    instructors already indexed with identical values are skipped) and replaces or appends
+    their vectors; remove() deletes them from the index. Metadata rows are never reused or
+    dropped (removed rows are marked inactive), so instructor keys stay equal to rows and
+    "ML-<key>" ids stay stable.
+
+    Changes are copy-on-write: a private copy of the index is mutated, then published together
+    with the new blocks, metadata and partitions as one new model state, so a concurrent
+    search never sees an index whose keys its metadata can't resolve. Indexes that can't remove in place (HNSW, or a legacy index
+    without IDMap2) are rebuilt instead, and every index is rebuilt from scratch once the
+    changes since its last build pass compact_fraction of its size (re-trains IVF centroids).
+
+    With persist=True an update is applied here and journaled as one delta (the changed keys,
+    rows and blocks) on the live bundle; the other workers replay new deltas from their bundle
+    watch (sync()) instead of reloading anything. Only a compaction, or a journal holding
+    config.INDEX_JOURNAL_MAX deltas, writes the state as the next bundle version, which the
+    other workers hot-swap to. Writers are serialized across workers by bundle_lock and first
+    catch up with CURRENT and its journal, so concurrent updates from different workers all
+    land, under the same keys everywhere. A recommender serving the loose artifacts has no way
+    to reach the other workers, so it refuses persisted updates (LiveUpdateError) until a
+    bundle is published; persist=False only updates this process.
+    New category values (a city the encoder never saw) encode to zeros until a full re-run of
+    vectorize_semantic.py refits the encoder.
+    """
+
+    def __init__(self, recommender, persist=True, compact_fraction=config.INDEX_COMPACT_FRACTION):
+        self.recommender = recommender
+        self.persist = persist
+        self.compact_fraction = compact_fraction
+
+        self.changes_since_build = 0
+        self.upserts = 0
+        self.removals = 0
+        self.rebuilds = 0
+        self.last_update_ms = None
+        self._synced = (None, 0) # (bundle version, last journal seq) this worker's state includes
+        self._lock = threading.Lock()
+        if persist:
+            recommender.sync_hooks.append(self.sync) # After a load, and on every bundle watch tick
+
+    def upsert(self, instructors):
+        """
+        Adds or replaces instructors: dicts with the instructors_processed columns and a
+        profile_id. Returns their keys (also of the ones that were already up to date).
+        """
+        latest = {}
+        for inst in instructors:
+            if not inst.get('profile_id'):
+                raise ValueError("Instructor updates need a profile_id")
+            latest[str(inst['profile_id'])] = _instructor_row(inst)
+        if not latest:
+            return []
+
+        rec = self.recommender
+        rec.ensure_ready()
+        with self._exclusive():
+            started = time.perf_counter()
+            columns = _with_update_columns(rec.instructors.columns)
+            keys = self._assign_keys(columns, list(latest))
+            changed = [j for j, (key, row) in enumerate(zip(keys.tolist(), latest.values()))
+                       if not _is_indexed_as(columns, key, row)]
+            if not changed:
+                return keys.tolist()
+            rows = [list(latest.values())[j] for j in changed]
+
+            # Vectorize just these instructors (same pipeline as vectorize_semantic.py)
+            text_matrix = rec.text_encode_fn()([row['bio_keywords'] for row in rows])
+            num_values = np.array([[row[c] for c in NUM_COLS] for row in rows], dtype='float64')
+            new_blocks = rec.query_vectorizer.blocks(rows, text_matrix, num_values=num_values)
+
+            self._commit(_upsert_delta(keys[changed], rows, new_blocks))
+            self.upserts += len(changed)
+            self.last_update_ms = round((time.perf_counter() - started) * 1000, 2)
+            return keys.tolist()
+
+    def remove(self, profile_ids):
+        """ Removes instructors from the index by profile_id. Returns the removed keys. """
+        rec = self.recommender
+        rec.ensure_ready()
+        with self._exclusive():
+            started = time.perf_counter()
+            columns = _with_update_columns(rec.instructors.columns)
+            key_of = _profile_keys(columns)
+            active = np.asarray(columns['active'])
+            keys = np.array(sorted({key_of[str(p)] for p in profile_ids if str(p) in key_of}), dtype='int64')
+            keys = keys[active[keys]]
+            if not len(keys):
+                return []
+
+            self._commit({'keys': keys})
+            self.removals += len(keys)
+            self.last_update_ms = round((time.perf_counter() - started) * 1000, 2)
+            return keys.tolist()
+
+    def compact(self):
+        """ Rebuilds the index from scratch over the active instructors (e.g. from a nightly job). """
+        rec = self.recommender
+        rec.ensure_ready()
+        with self._exclusive():
+            state = self._state_changes(None, _with_update_columns(rec.instructors.columns), rec.blocks)
+            if self.persist:
+                self._publish_bundle(state)
+            else:
+                rec.publish(**state)
+
+    def sync(self):
+        """
+        Applies the deltas other workers journaled on the live bundle since this worker last
+        looked. Returns how many (0 when not serving a bundle).
+        """
+        rec = self.recommender
+        if not (self.persist and rec.is_ready()):
+            return 0
+        with self._lock, rec.state_lock():
+            return self._catch_up()
+
+    def stats(self):
+        return {
+            'upserts': self.upserts,
+            'removals': self.removals,
+            'rebuilds': self.rebuilds,
+            'changes_since_build': self.changes_since_build,
+            'last_update_ms': self.last_update_ms
+        }
+
+    @contextmanager
+    def _exclusive(self):
+        """
+        This process's update lock; with persist=True, also the bundles_dir lock of every
+        worker, with this worker caught up with CURRENT and its journal: the update then starts
+        from the newest state, not from this worker's (maybe stale) one.
+        """
+        rec = self.recommender
+        with self._lock, rec.state_lock(): # A watcher reload can't swap the state this update builds on
+            if not self.persist:
+                yield
+                return
+            if rec.version is None:
+                raise LiveUpdateError("Live index updates need a published bundle: package the artifacts "
+                                      "with model/bundle.py (other workers would never see this update)")
+            with bundle_lock(rec.bundles_dir):
+                latest = current_version(rec.bundles_dir)
+                if latest is not None and latest != rec.version:
+                    rec.reload(latest) # Another worker published a bundle since this one loaded
+                self._catch_up()
+                yield
+
+    def _catch_up(self):
+        """ Replays the live bundle's journal past what this worker's state already includes """
+        rec = self.recommender
+        if rec.version is None:
+            return 0
+        if self._synced[0] != rec.version: # A newly loaded bundle: its journal starts over
+            self._synced = (rec.version, 0)
+            self.changes_since_build = rec.manifest.get('changes_since_build', 0)
+        deltas = read_deltas(rec.version, rec.bundles_dir, after=self._synced[1])
+        for seq, delta in deltas:
+            index, columns, blocks = self._apply(delta)
+            self.changes_since_build += len(delta['keys'])
+            rec.publish(**self._state_changes(index, columns, blocks))
+            self._synced = (rec.version, seq)
+        return len(deltas)
+
+    def _assign_keys(self, columns, profile_ids):
+        """ Existing key per profile_id (also for previously removed rows), else the next new rows """
+        key_of = _profile_keys(columns)
+        next_key = len(columns['active'])
+        keys = []
+        for pid in profile_ids:
+            if pid in key_of:
+                keys.append(key_of[pid])
+            else:
+                keys.append(next_key)
+                next_key += 1
+        return np.array(keys, dtype='int64')
+
+    def _writable_index(self):
+        """ A private, owned copy (the live index may be memory-mapped read-only and is being searched) """
+        index = faiss.deserialize_index(faiss.serialize_index(self.recommender.index))
+        if not hasattr(faiss.downcast_index(index), 'id_map'):
+            return None # Plain indexes renumber on remove_ids and can't add_with_ids: rebuild with IDMap2
+        return index
+
+    def _apply(self, delta):
+        """
+        This worker's columns and blocks with delta applied, and a patched private copy of the
+        index (None when it can't be patched in place and has to be rebuilt).
+        """
+        rec = self.recommender
+        keys = np.asarray(delta['keys'], dtype='int64')
+        columns = _with_update_columns(rec.instructors.columns)
+        active = np.asarray(columns['active'])
+        was_indexed = keys[keys < len(active)]
+        was_indexed = was_indexed[active[was_indexed]]
+
+        if 'block:text' in delta:
+            new_blocks = {block: delta[f"block:{block}"] for block in BLOCKS}
+            names = [name[len('col:'):] for name in delta if name.startswith('col:')]
+            rows = [dict(zip(names, values)) for values in zip(*(delta[f"col:{c}"].tolist() for c in names))]
+        else: # A removal
+            new_blocks = None
+            rows = [{'active': False}] * len(keys)
+        columns = _set_rows(columns, keys, rows)
+        blocks = rec.blocks.with_rows(keys, new_blocks, len(columns['active']))
+
+        index = self._writable_index()
+        try:
+            if index is not None and len(was_indexed):
+                index.remove_ids(was_indexed)
+            if index is not None and new_blocks is not None:
+                index.add_with_ids(compose_blocks(new_blocks, rec.query_vectorizer.weights), keys)
+        except RuntimeError: # e.g. HNSW can't remove: rebuild instead
+            index = None
+        return index, columns, blocks
+
+    def _commit(self, delta):
+        """
+        Applies delta to this worker's state and publishes it; with persist=True it is also
+        journaled on the live bundle or, once a compaction is due or the journal is full,
+        folded with everything else into the next bundle version.
+        """
+        rec = self.recommender
+        index, columns, blocks = self._apply(delta)
+        self.changes_since_build += len(delta['keys'])
+        n_active = int(np.count_nonzero(np.asarray(columns['active'])))
+        compact = self.changes_since_build > self.compact_fraction * max(n_active, 1)
+        state = self._state_changes(index, columns, blocks, rebuild=compact)
+        if not self.persist:
+            rec.publish(**state)
+        elif compact or journal_length(rec.version, rec.bundles_dir) >= config.INDEX_JOURNAL_MAX:
+            self._publish_bundle(state)
+        else:
+            seq = append_delta(rec.version, delta, rec.bundles_dir) # First: a failed write changes nothing
+            rec.publish(**state)
+            self._synced = (rec.version, seq)
+
+    def _state_changes(self, index, columns, blocks, rebuild=False):
+        """
+        The model state fields for these instructors. The index is built from scratch when it
+        couldn't be patched (index None) or with rebuild=True, which restarts the change count.
+        """
+        rec = self.recommender
+        if index is None or rebuild:
+            active_keys = np.flatnonzero(np.asarray(columns['active'])).astype('int64')
+            index = build_index(blocks.vectors(rec.query_vectorizer.weights, active_keys), rec.index_spec,
+                                ids=active_keys)
+            self.changes_since_build = 0
+            self.rebuilds += 1
+        apply_search_params(index, rec.index_spec)
+        return {
+            'blocks': blocks,
+            'instructors': InstructorTable(columns),
+            'index': index,
+            'partitions': ConstraintPartitions(columns, config.FILTER_FIELDS, config.FILTER_RELAXATION_ORDER)
+        }
+
+    def _publish_bundle(self, state):
+        """ Writes state as the next bundle version (its journal folded in) and makes it CURRENT """
+        rec = self.recommender
+        version = self._write_bundle(state['index'], state['instructors'].columns, state['blocks'])
+        state.update(version=version, manifest=read_manifest(bundle_path(version, rec.bundles_dir), verify=False))
+        # Live under the new version before CURRENT moves, so this worker's watch doesn't reload it
+        rec.publish(**state)
+        publish_bundle(version, rec.bundles_dir)
+        self._synced = (version, 0)
+
+    def _write_bundle(self, index, columns, blocks):
+        """ The next bundle version: the live one with this index and these instructors """
+        rec = self.recommender
+        manifest = rec.manifest
+        return write_bundle(index, rec.index_spec, rec.query_vectorizer.to_dict(), blocks.blocks, columns,
+                            manifest['text_encoder'], manifest['weights'], bundles_dir=rec.bundles_dir,
+                            onnx_dir=os.path.join(bundle_path(rec.version, rec.bundles_dir), 'text_encoder'),
+                            changes_since_build=self.changes_since_build)
+
+def _instructor_row(inst):
+    row = {col: str(inst.get(col) or '') for col in TEXT_COLS}
+    for col in NUM_COLS:
+        row[col] = float(inst.get(col) or 0)
+    row['profile_id'] = str(inst['profile_id'])
+    row['active'] = True
+    return row
+
+def _upsert_delta(keys, rows, blocks):
+    """ Journal form of an upsert: plain arrays only (bundles hold no pickles) """
+    delta = {'keys': np.asarray(keys, dtype='int64')}
+    for col in rows[0]:
+        delta[f"col:{col}"] = np.asarray([row[col] for row in rows])
+    for block in BLOCKS:
+        delta[f"block:{block}"] = np.asarray(blocks[block], dtype='float32')
+    return delta
+
+def _is_indexed_as(columns, key, row):
+    """ Whether key is active with exactly row's values (upserting it would change nothing) """
+    if key >= len(columns['active']) or not columns['active'][key]:
+        return False
+    if any(col not in columns for col in TEXT_COLS + NUM_COLS):
+        return False
+    return (all(str(columns[col][key]) == row[col] for col in TEXT_COLS)
+            and all(float(columns[col][key]) == row[col] for col in NUM_COLS))
+
+def _with_update_columns(columns):
+    """ Column dict including the profile_id / active columns (absent in stores built by the ETL) """
+    columns = dict(columns)
+    n = len(columns['name'])
+    if 'profile_id' not in columns:
+        columns['profile_id'] = np.full(n, '', dtype='U1')
+    if 'active' not in columns:
+        columns['active'] = np.ones(n, dtype=bool)
+    return columns
+
+def _profile_keys(columns):
+    profile_ids = np.asarray(columns['profile_id']).astype(str)
+    return {pid: key for key, pid in enumerate(profile_ids.tolist()) if pid not in ('', 'nan')}
+
+def _set_rows(columns, keys, rows):
+    """
+    New column arrays with rows[j] written at key keys[j] (keys past the end append rows).
+    Only the columns named in rows are written; new rows get ''/0 elsewhere. Never mutates
+    the inputs, which may be read-only memory maps still being read by searches.
+    """
+    n_rows = max(len(columns['active']), int(keys.max()) + 1)
+    updated = {}
+    for col, values in columns.items():
+        values = np.asarray(values)
+        if col not in rows[0]:
+            new, dtype = None, values.dtype
+        else:
+            new = np.asarray([row[col] for row in rows])
+            if values.dtype.kind == 'O' or new.dtype.kind == 'U':
+                values = values.astype(str)
+            dtype = np.result_type(values.dtype, new.dtype)
+        if new is None and n_rows == len(values):
+            updated[col] = values
+            continue
+        grown = np.zeros(n_rows, dtype=dtype)
+        grown[:len(values)] = values
+        if new is not None:
+            grown[keys] = new
+        updated[col] = grown
+    return updated
@@ -1,117 +1,815 @@
-import pandas as pd
 import numpy as np
+import json
 import pickle
 import os
 import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from itertools import count
 import faiss  # <--- NEW: High-performance engine
-from sentence_transformers import SentenceTransformer
-from sklearn.preprocessing import normalize
 
 # Ensure we can find the config
 try:
     from app.tarumbeta_ml.src.utils import config
+    from app.tarumbeta_ml.src.features.query_vectorizer import CAT_COLS, CompiledQueryVectorizer, compose_blocks, split_blocks
+    from app.tarumbeta_ml.src.features.text_encoder import load_text_encoder, lowercases_input
+    from app.tarumbeta_ml.src.features.embedding_store import open_store
+    from app.tarumbeta_ml.src.api.embedding_cache import EmbeddingCache, normalize_text
+    from app.tarumbeta_ml.src.api.result_cache import ResultCache
+    from app.tarumbeta_ml.src.api.block_scorer import BlockScorer, block_presence, check_weights, resolve_weights
+    from app.tarumbeta_ml.src.api.factorized_scorer import FactorizedScorer
+    from app.tarumbeta_ml.src.api.diversity import mmr_select
+    from app.tarumbeta_ml.src.model.index_spec import apply_search_params, load_spec
+    from app.tarumbeta_ml.src.api.constraint_filter import ConstraintPartitions
+    from app.tarumbeta_ml.src.api.instructor_table import InstructorTable
+    from app.tarumbeta_ml.src.utils.column_store import columns_path, load_columns
+    from app.tarumbeta_ml.src.utils.table_io import find_table, read_table
+    from app.tarumbeta_ml.src.api.index_updater import IndexUpdater, LiveUpdateError
+    from app.tarumbeta_ml.src.api.micro_batcher import MicroBatcher
+    from app.tarumbeta_ml.src.model.bundle import BundleError, bundle_path, current_version, loose_blocks, read_manifest
 except ImportError:
     try:
         from backend.app.tarumbeta_ml.src.utils import config
+        from backend.app.tarumbeta_ml.src.features.query_vectorizer import CAT_COLS, CompiledQueryVectorizer, compose_blocks, split_blocks
+        from backend.app.tarumbeta_ml.src.features.text_encoder import load_text_encoder, lowercases_input
+        from backend.app.tarumbeta_ml.src.features.embedding_store import open_store
+        from backend.app.tarumbeta_ml.src.api.embedding_cache import EmbeddingCache, normalize_text
+        from backend.app.tarumbeta_ml.src.api.result_cache import ResultCache
+        from backend.app.tarumbeta_ml.src.api.block_scorer import BlockScorer, block_presence, check_weights, resolve_weights
+        from backend.app.tarumbeta_ml.src.api.factorized_scorer import FactorizedScorer
+        from backend.app.tarumbeta_ml.src.api.diversity import mmr_select
+        from backend.app.tarumbeta_ml.src.model.index_spec import apply_search_params, load_spec
+        from backend.app.tarumbeta_ml.src.api.constraint_filter import ConstraintPartitions
+        from backend.app.tarumbeta_ml.src.api.instructor_table import InstructorTable
+        from backend.app.tarumbeta_ml.src.utils.column_store import columns_path, load_columns
+        from backend.app.tarumbeta_ml.src.utils.table_io import find_table, read_table
+        from backend.app.tarumbeta_ml.src.api.index_updater import IndexUpdater, LiveUpdateError
+        from backend.app.tarumbeta_ml.src.api.micro_batcher import MicroBatcher
+        from backend.app.tarumbeta_ml.src.model.bundle import BundleError, bundle_path, current_version, loose_blocks, read_manifest
     except ImportError:
         # Fallback for local testing if not running from backend root
         import sys
-        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
         from src.utils import config
+        from src.features.query_vectorizer import CAT_COLS, CompiledQueryVectorizer, compose_blocks, split_blocks
+        from src.features.text_encoder import load_text_encoder, lowercases_input
+        from src.features.embedding_store import open_store
+        from src.api.embedding_cache import EmbeddingCache, normalize_text
+        from src.api.result_cache import ResultCache
+        from src.api.block_scorer import BlockScorer, block_presence, check_weights, resolve_weights
+        from src.api.factorized_scorer import FactorizedScorer
+        from src.api.diversity import mmr_select
+        from src.model.index_spec import apply_search_params, load_spec
+        from src.api.constraint_filter import ConstraintPartitions
+        from src.api.instructor_table import InstructorTable
+        from src.utils.column_store import columns_path, load_columns
+        from src.utils.table_io import find_table, read_table
+        from src.api.index_updater import IndexUpdater, LiveUpdateError
+        from src.api.micro_batcher import MicroBatcher
+        from src.model.bundle import BundleError, bundle_path, current_version, loose_blocks, read_manifest
+
+class ModelNotReadyError(RuntimeError):
+    """ Raised when a query arrives while the model is still loading (or failed to load). """
+
+class ModelState:
+    """
+    Everything one search reads, loaded together from one bundle version. Treated as
+    immutable: a reload or index update builds a new state and swaps the single reference,
+    so a request that captured the old state finishes on a coherent old view. Each state
+    gets a new serial, which tags what was computed from it (see ResultCache).
+    """
+    FIELDS = ('version', 'manifest', 'index', 'index_spec', 'encoder', 'scaler', 'bert_model',
+              'query_vectorizer', 'instructors', 'blocks', 'scorer', 'partitions', 'embedding_cache',
+              'embedding_store')
+
+    _serials = count()
+
+    def __init__(self, **fields):
+        self.serial = next(self._serials)
+        for name in self.FIELDS:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown model state fields: {sorted(fields)}")
+
+    def replace(self, **changes):
+        fields = {name: getattr(self, name) for name in self.FIELDS}
+        fields.update(changes)
+        return ModelState(**fields)
+
+def _state_field(name):
+    """ Attribute view of the current state (the setter swaps in a new state) """
+    def get(self):
+        return getattr(self._state, name)
+    def set(self, value):
+        self._state = self._state.replace(**{name: value})
+    return property(get, set)
 
 class SemanticRecommender:
-    def __init__(self):
-        self.index = None
-        self.encoder = None
-        self.scaler = None
-        self.bert_model = None
-        self.instructors_df = None
-        self._load_artifacts()
+    # index, instructors (InstructorTable over the memory-mapped column store), blocks (the
+    # unweighted instructor blocks) and scorer (exact factorized top-k over them, for filtered
+    # and re-weighted queries), partitions (hard-constraint cells) ...
+    version = _state_field('version')
+    manifest = _state_field('manifest')
+    index = _state_field('index')
+    index_spec = _state_field('index_spec')
+    encoder = _state_field('encoder')
+    scaler = _state_field('scaler')
+    bert_model = _state_field('bert_model')
+    query_vectorizer = _state_field('query_vectorizer')
+    instructors = _state_field('instructors')
+    blocks = _state_field('blocks')
+    scorer = _state_field('scorer')
+    partitions = _state_field('partitions')
+    embedding_cache = _state_field('embedding_cache')
+    embedding_store = _state_field('embedding_store')
+
+    def __init__(self, autoload=True, bundles_dir=None):
+        self.bundles_dir = bundles_dir or config.BUNDLES_DIR
+        self._state = ModelState(
+            embedding_cache=EmbeddingCache(config.EMBEDDING_CACHE_SIZE, config.EMBEDDING_CACHE_TTL))
+        # Finished result lists per canonical model input; outlives states but not their serials
+        self.result_cache = ResultCache(config.RESULT_CACHE_SIZE, config.RESULT_CACHE_TTL)
+        
+        # Load state (see load() / start_warmup())
+        self.status = 'not_loaded' # not_loaded -> loading -> ready | failed
+        self.load_error = None
+        self.load_timings = {}
+        self._ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._warmup_thread = None
+
+        # Hot-swap state (see reload() / start_watch())
+        self.reloads = 0
+        self.last_reload = None
+        self.reload_error = None
+        self._reload_lock = threading.RLock() # Every state swap (reload, publish); see state_lock()
+        self._failed_version = None
+        self._watch_thread = None
+        self._watch_pid = None
+        # Called after a load and on every watch tick (e.g. IndexUpdater.sync: other workers' live updates)
+        self.sync_hooks = []
         
-    def _load_artifacts(self):
+        if autoload:
+            self.load()
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def load(self, warm_up=True):
+        """
+        Loads every artifact and (optionally) warms the encoder. Thread-safe; a no-op once ready.
+        Loads the published bundle (bundles/CURRENT) if there is one, else the loose artifacts.
+        warm_up=False is for a pre-fork master: run warm_up() in each worker instead.
+        """
+        with self._load_lock:
+            if self.is_ready():
+                return
+            self.status = 'loading'
+            self.load_error = None
+            self.load_timings = {}
+            started = time.perf_counter()
+            try:
+                self._state = self._load_state(current_version(self.bundles_dir), self._state)
+                if warm_up:
+                    self.warm_up()
+            except Exception as e:
+                self.status = 'failed'
+                self.load_error = str(e)
+                raise
+            self.load_timings['total'] = round(time.perf_counter() - started, 3)
+            self.status = 'ready'
+            self._ready.set()
+        self._run_sync_hooks()
+
+    def start_warmup(self):
+        """ Runs load() on a background daemon thread and returns immediately. """
+        with self._load_lock:
+            if self.is_ready() or (self._warmup_thread and self._warmup_thread.is_alive()):
+                return self._warmup_thread
+            self.status = 'loading'
+            self._warmup_thread = threading.Thread(target=self._warmup_worker, name='ml-warmup', daemon=True)
+            self._warmup_thread.start()
+            return self._warmup_thread
+
+    def _warmup_worker(self):
+        try:
+            self.load()
+        except Exception as e:
+            print(f"❌ ML warm-up failed: {str(e)}")
+
+    def ensure_ready(self):
+        """ Loads synchronously if nobody started a warm-up (scripts); otherwise never blocks. """
+        if self.is_ready():
+            return
+        if self.status == 'not_loaded':
+            self.load()
+            return
+        if self.status == 'failed':
+            raise ModelNotReadyError(f"Model failed to load: {self.load_error}")
+        raise ModelNotReadyError("Model is still loading")
+
+    def readiness(self):
+        return {
+            'ready': self.is_ready(),
+            'status': self.status,
+            'error': self.load_error,
+            'version': self._state.version,
+            'load_timings': dict(self.load_timings)
+        }
+
+    def publish(self, **changes):
+        """
+        Swaps in a new state with `changes` applied, atomically for concurrent searches.
+        New blocks get a matching factorized scorer unless one is passed. Callers that derived
+        `changes` from the live state hold state_lock() around both, so no reload slips between.
+        """
+        with self._reload_lock:
+            if 'blocks' in changes and 'scorer' not in changes:
+                vectorizer = changes.get('query_vectorizer', self._state.query_vectorizer)
+                changes['scorer'] = FactorizedScorer(changes['blocks'], vectorizer.field_sizes)
+            self._state = self._state.replace(**changes)
+
+    @contextmanager
+    def state_lock(self):
+        """ Holds off reload() and other publishes, e.g. across an index update's read -> publish """
+        with self._reload_lock:
+            yield
+
+    def reload(self, version=None):
+        """
+        Loads a bundle (default: the one CURRENT names) next to the live one, warms it up and
+        swaps it in. Requests keep being served from the old state throughout, and in-flight
+        ones finish on it. Returns False when that version is already live.
+        """
+        with self._reload_lock:
+            version = version or current_version(self.bundles_dir)
+            if version is None:
+                raise BundleError(f"No bundle published in {self.bundles_dir}")
+            if version == self._state.version:
+                return False
+            print(f"🔄 Loading model bundle {version}...")
+            started = time.perf_counter()
+            previous = self._state
+            try:
+                state = self._load_state(version, previous, timings={})
+                self._warm_up_state(state)
+            except Exception as e:
+                self._failed_version = version
+                self.reload_error = f"{version}: {str(e)}"
+                raise
+
+            self._state = state
+            self.reloads += 1
+            self.reload_error = None
+            self.last_reload = {
+                'from': previous.version,
+                'to': version,
+                'seconds': round(time.perf_counter() - started, 3),
+                'at': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+            }
+            self._ready.set() # A reload also recovers a worker whose first load failed
+            self.status = 'ready'
+            print(f"✅ Now serving bundle {version} ({state.index.ntotal} instructors)")
+            return True
+
+    def start_watch(self, interval=None):
+        """
+        Polls bundles/CURRENT on a daemon thread and reload()s when it names a new version.
+        Idempotent; started again in a forked worker (threads don't survive fork()).
+        """
+        interval = config.BUNDLE_WATCH_SECONDS if interval is None else interval
+        if not interval:
+            return None
+        with self._reload_lock:
+            if self._watch_thread is not None and self._watch_pid == os.getpid():
+                return self._watch_thread
+            self._watch_pid = os.getpid()
+            self._watch_thread = threading.Thread(target=self._watch, args=(interval,),
+                                                  name='ml-bundle-watch', daemon=True)
+            self._watch_thread.start()
+            return self._watch_thread
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            # Loading is left to warm-up
+            if self.status in ('not_loaded', 'loading'):
+                continue
+            try:
+                version = current_version(self.bundles_dir)
+                # A version that failed isn't retried until CURRENT moves
+                if version is not None and version not in (self._state.version, self._failed_version):
+                    self.reload(version)
+            except Exception as e:
+                print(f"❌ Bundle reload failed: {str(e)}")
+            self._run_sync_hooks()
+
+    def _run_sync_hooks(self):
+        for hook in list(self.sync_hooks):
+            try:
+                hook()
+            except Exception as e:
+                print(f"❌ Model sync failed: {str(e)}")
+
+    def bundle_status(self):
+        return {
+            'version': self._state.version,
+            'current': current_version(self.bundles_dir),
+            'manifest': self._state.manifest,
+            'reloads': self.reloads,
+            'last_reload': self.last_reload,
+            'reload_error': self.reload_error
+        }
+
+    @contextmanager
+    def _timed(self, phase, timings=None):
+        started = time.perf_counter()
+        yield
+        (self.load_timings if timings is None else timings)[phase] = round(time.perf_counter() - started, 3)
+
+    def _load_state(self, version, previous, timings=None):
+        if version is None:
+            return self._load_artifacts(previous, timings)
+        return self._load_bundle(version, previous, timings)
+
+    def _load_artifacts(self, previous, timings=None):
+        """ The loose files written by train_semantic.py (no published bundle) """
         print("⏳ Loading Tarumbeta V3 (FAISS Engine)...")
         
         # 1. Load the FAISS Index (The High-Speed Brain)
-        index_path = os.path.join(config.SEMANTIC_MODELS, 'faiss_index.bin')
-        if not os.path.exists(index_path):
-            raise FileNotFoundError(f"❌ Missing FAISS Index at {index_path}")
+        with self._timed('faiss_index', timings):
+            index_path = os.path.join(config.SEMANTIC_MODELS, 'faiss_index.bin')
+            if not os.path.exists(index_path):
+                raise FileNotFoundError(f"❌ Missing FAISS Index at {index_path}")
+                
+            index = _read_index(index_path)
             
-        self.index = faiss.read_index(index_path)
+            # Match the build-time search params (nprobe / efSearch) for approximate indexes
+            index_spec = load_spec(index_path, default=config.FAISS_INDEX_SPEC)
+            apply_search_params(index, index_spec)
         
         # 2. Load Processors
-        with open(os.path.join(config.SEMANTIC_MODELS, 'encoder.pkl'), 'rb') as f:
-            self.encoder = pickle.load(f)
-        with open(os.path.join(config.SEMANTIC_MODELS, 'scaler.pkl'), 'rb') as f:
-            self.scaler = pickle.load(f)
+        with self._timed('processors', timings):
+            with open(os.path.join(config.SEMANTIC_MODELS, 'encoder.pkl'), 'rb') as f:
+                encoder = pickle.load(f)
+            with open(os.path.join(config.SEMANTIC_MODELS, 'scaler.pkl'), 'rb') as f:
+                scaler = pickle.load(f)
+            
+            # Compile encoder/scaler into NumPy lookup tables (no pandas/sklearn per query)
+            query_vectorizer = CompiledQueryVectorizer(encoder, scaler)
+
+        # Step 5's unweighted blocks, memory-mapped (shared by every worker, not a private copy)
+        with self._timed('blocks', timings):
+            blocks = BlockScorer(loose_blocks(index, query_vectorizer, 'r' if config.MMAP_ARTIFACTS else None))
             
-        # 3. Load Text Engine
-        self.bert_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # 3. Load Text Engine (torch or ONNX Runtime, see config.TEXT_ENCODER_BACKEND)
+        with self._timed('text_encoder', timings):
+            bert_model = load_text_encoder()
+            embedding_store = _open_embedding_store(previous, bert_model)
         
         # 4. Load Database
-        self.instructors_df = pd.read_csv(os.path.join(config.DATA_PROCESSED, 'instructors_processed.csv'))
-        print(f"✅ System Ready. Index contains {self.index.ntotal} instructors.")
-
-    def recommend(self, user_profile, top_k=5):
-        # 1. Prepare Data
-        input_data = {
-            'location': [user_profile.get('location')],
-            'instrument_type': [user_profile.get('instrument_type')],
-            'skill_level': [user_profile.get('skill_level')],
-            'teaching_language': [user_profile.get('teaching_language')],
-            'bio_keywords': [user_profile.get('bio_keywords', '')],
-            'hourly_rate': [0], 'rating': [0], 'years_experience': [0] # Dummies
-        }
-        df = pd.DataFrame(input_data)
-        
-        # 2. VECTORIZE (Brute Force Logic: 0.80 / 0.10 / 0.10)
-        
-        # A. Categorical
-        cat_cols = ['location', 'instrument_type', 'teaching_language', 'skill_level']
-        cat_matrix = self.encoder.transform(df[cat_cols])
-        cat_matrix = normalize(cat_matrix, axis=1, norm='l2') * config.WEIGHT_CAT
-        
-        # B. Numerical
-        num_cols = ['hourly_rate', 'rating'] # Note: V3 excluded years_experience
-        num_matrix = self.scaler.transform(df[num_cols])
-        num_matrix = normalize(num_matrix, axis=1, norm='l2') * config.WEIGHT_NUM
-        
-        # C. Text
-        text_matrix = self.bert_model.encode(df['bio_keywords'].tolist())
-        text_matrix = normalize(text_matrix, axis=1, norm='l2') * config.WEIGHT_TXT
-        
-        # D. Stack
-        query_vec = np.hstack([cat_matrix, num_matrix, text_matrix]).astype('float32')
+        with self._timed('instructors', timings):
+            columns = _read_instructors(find_table('instructors_processed'))
+        print(f"✅ System Ready. Index contains {index.ntotal} instructors.")
+        return self._assemble(previous, version=None, manifest=None, index=index, index_spec=index_spec,
+                              encoder=encoder, scaler=scaler, bert_model=bert_model,
+                              embedding_store=embedding_store, query_vectorizer=query_vectorizer,
+                              columns=columns, blocks=blocks)
+
+    def _load_bundle(self, version, previous, timings=None):
+        """ A versioned bundle (model/bundle.py): checksums verified, then the same four phases """
+        print(f"⏳ Loading Tarumbeta V3 bundle {version}...")
+        bundle_dir = bundle_path(version, self.bundles_dir)
+        manifest = read_manifest(bundle_dir, verify=config.BUNDLE_VERIFY_CHECKSUMS)
+
+        with self._timed('faiss_index', timings):
+            index = _read_index(os.path.join(bundle_dir, 'faiss_index.bin'))
+            apply_search_params(index, manifest['index_spec'])
+
+        with self._timed('processors', timings):
+            with open(os.path.join(bundle_dir, 'processors.json')) as f:
+                query_vectorizer = CompiledQueryVectorizer.from_dict(json.load(f), weights=manifest['weights'])
+
+        with self._timed('blocks', timings):
+            blocks = BlockScorer(_read_blocks(bundle_dir, manifest, query_vectorizer))
+
+        with self._timed('text_encoder', timings):
+            spec = manifest['text_encoder']
+            if previous.bert_model is not None and _same_text_encoder(previous.manifest, manifest):
+                bert_model = previous.bert_model # Unchanged weights: keep the loaded session
+            else:
+                bert_model = load_text_encoder(spec['backend'], model_name=spec['model'],
+                                               onnx_dir=os.path.join(bundle_dir, 'text_encoder'))
+            embedding_store = _open_embedding_store(previous, bert_model, spec['backend'], spec['model'],
+                                                    os.path.join(bundle_dir, 'text_encoder'))
+
+        with self._timed('instructors', timings):
+            columns = load_columns(os.path.join(bundle_dir, 'instructors'), mmap=config.MMAP_ARTIFACTS)
+
+        _check_dims(manifest, index, blocks, query_vectorizer, bert_model, columns)
+        print(f"✅ Bundle {version} ready. Index contains {index.ntotal} instructors.")
+        return self._assemble(previous, version=version, manifest=manifest, index=index,
+                              index_spec=manifest['index_spec'], encoder=None, scaler=None,
+                              bert_model=bert_model, embedding_store=embedding_store,
+                              query_vectorizer=query_vectorizer, columns=columns, blocks=blocks)
+
+    def _assemble(self, previous, columns, **fields):
+        # Cached embeddings are only valid for the encoder that produced them, keyed by its casing
+        cache = previous.embedding_cache
+        lowercase = lowercases_input(fields['bert_model'])
+        if (previous.bert_model is not None and fields['bert_model'] is not previous.bert_model) \
+                or cache.lowercase != lowercase:
+            cache = EmbeddingCache(config.EMBEDDING_CACHE_SIZE, config.EMBEDDING_CACHE_TTL, lowercase=lowercase)
+        return ModelState(
+            scorer=FactorizedScorer(fields['blocks'], fields['query_vectorizer'].field_sizes),
+            instructors=InstructorTable(columns),
+            partitions=ConstraintPartitions(columns, config.FILTER_FIELDS, config.FILTER_RELAXATION_ORDER),
+            embedding_cache=cache,
+            **fields)
+
+    def warm_up(self):
+        """ A dummy encode + search so the first real request doesn't pay for kernel/allocator setup """
+        with self._timed('warmup'):
+            self._warm_up_state(self._state)
+
+    @staticmethod
+    def _warm_up_state(state):
+        # Bypasses the embedding cache so the warm-up text never counts as a hit or miss
+        text_matrix = state.bert_model.encode(['warm up'])
+        query_vecs = state.query_vectorizer.transform([{}], text_matrix)
+        state.index.search(query_vecs, k=1)
+        state.blocks.scores(state.query_vectorizer.blocks([{}], text_matrix), state.query_vectorizer.weights,
+                            state.partitions.active_ids[:1])
+
+    def recommend(self, user_profile, top_k=5, filtered=False, weights=None, explain=False, candidates=None,
+                  diverse=False):
+        return self.recommend_batch([user_profile], top_k=top_k, filtered=filtered, weights=weights,
+                                    explain=explain, candidates=candidates, diverse=diverse)[0]
+
+    def recommend_batch(self, profiles, top_k=5, filtered=False, weights=None, explain=False, candidates=None,
+                        diverse=False):
+        """
+        Recommends for N profiles at once: one encoder call, one multi-row FAISS search.
+        filtered=True only scores each learner's hard-constraint cell (see config.FILTER_FIELDS).
+        weights overrides some or all block weights ({'categorical', 'numerical', 'text'}) for
+        this call; scores are then exact, from the unweighted blocks, with no re-encoding.
+        explain=True adds each hit's 'score_breakdown' (see _attach_breakdowns).
+        candidates (instructor_profiles ids) restricts the ranking to exactly those instructors
+        (the ones in the index), scored from their stored blocks; filtered is then ignored.
+        diverse=True reranks a config.MMR_POOL_FACTOR x larger pool with MMR over the stored
+        vectors: near-duplicates and repeated names give way to the next distinct instructor
+        (filtered=True then relaxes until the cell holds the whole pool; fewer than top_k come
+        back only when the pool has fewer distinct instructors).
+        Profiles whose model input was answered before come from the result cache.
+        """
+        if not profiles:
+            return []
+        self.ensure_ready()
+        state = self._state # One coherent view for the whole request, even across a hot-swap
+        weights = resolve_weights(weights, state.query_vectorizer.weights)
+        candidates = candidate_ids(candidates)
+        if candidates is not None:
+            filtered = False
+
+        options = (top_k, filtered, tuple(sorted(weights.items())), explain, candidates, diverse)
+        keys = [(canonical_query(p, state.embedding_cache.normalize_key), options) for p in profiles]
+        results = self.result_cache.get_many(keys, state.serial)
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        if not missing:
+            return results
+
+        started = time.perf_counter()
+        computed = self._search_batch(state, [profiles[i] for i in missing], top_k, filtered, weights, explain,
+                                      candidates, diverse)
+        self.result_cache.put_many([keys[i] for i in missing], computed, state.serial,
+                                   (time.perf_counter() - started) / len(missing))
+        for i, result in zip(missing, computed):
+            results[i] = result
+        return results
+
+    def _search_batch(self, state, profiles, top_k, filtered, weights, explain, candidates=None, diverse=False):
+        # 1. VECTORIZE (Brute Force Logic: 0.80 / 0.10 / 0.10 unless overridden)
+        # One encoder pass for the uncached bios only; cat/num blocks come from the compiled lookup tables
+        query_blocks = self._query_blocks(state, profiles)
+        explain_blocks = query_blocks if explain else None
+        # Diversified results are picked from a larger pool of the most relevant instructors
+        fetch = top_k * config.MMR_POOL_FACTOR if diverse else top_k
         
-        # 3. NORMALIZE QUERY (Critical V3 Fix)
-        faiss.normalize_L2(query_vec)
+        # 2. SEARCH - exact over a candidate set / constraint cell, else FAISS (all queries in a single call)
+        if candidates is not None:
+            # Exact scores for the candidates only (removed instructors excluded), every query in one call
+            ids = np.intersect1d(state.instructors.keys_of(candidates), state.partitions.active_ids, assume_unique=True)
+            scores, top_ids = state.scorer.search(query_blocks, weights, fetch, ids)
+            hits = list(zip(scores, top_ids, [()] * len(profiles)))
+        elif filtered:
+            hits = [self._filtered_search(state, p, _row(query_blocks, i), top_k, weights, fetch)
+                    for i, p in enumerate(profiles)]
+        elif weights != state.query_vectorizer.weights or config.SCORING_ENGINE == 'factorized':
+            hits = [self._exact_search(state, _row(query_blocks, i), None, fetch, weights)
+                    for i in range(len(profiles))]
+        else:
+            distances, indices = state.index.search(compose_blocks(query_blocks, weights), k=fetch)
+            if not (explain or diverse):
+                # 3. FORMAT OUTPUT (one vectorized gather for the whole batch)
+                return state.instructors.format_rows(distances, indices)
+            hits = list(zip(distances, indices, [()] * len(profiles)))
         
-        # 4. SEARCH (FAISS)
-        distances, indices = self.index.search(query_vec, k=top_k)
+        if diverse:
+            hits = [self._diversify(state, hit, top_k, weights) for hit in hits]
+        return self._format(state, hits, explain_blocks, weights)
+
+    @staticmethod
+    def _diversify(state, hit, top_k, weights):
+        """ MMR rerank of one query's (scores, ids, matched_on) pool down to top_k """
+        scores, ids, matched_on = hit
+        keep = np.asarray(ids) != -1
+        scores, ids = np.asarray(scores)[keep], np.asarray(ids)[keep]
+        # Near-duplicates are judged on the bio alone: the weighted vectors of a cell share
+        # their dominant categorical block, so their cosine says little about the instructors
+        text = state.blocks.blocks['text'][ids]
+        picks = mmr_select(scores, state.blocks.vectors(weights, ids), top_k, config.MMR_LAMBDA,
+                           identities=state.instructors.identity[ids],
+                           duplicates=text @ text.T >= config.MMR_DUPLICATE_SIMILARITY)
+        return scores[picks], ids[picks], matched_on
+
+    def sweep_weights(self, profile, weight_grid, top_k=5, filtered=False):
+        """
+        Top-k for one learner under each weighting in weight_grid (a list of weight dicts).
+        The bio is encoded and the per-block scores computed once; each extra weighting only
+        re-combines them. Returns one result list per weighting, in order.
+        """
+        self.ensure_ready()
+        state = self._state
+        grid = [resolve_weights(w, state.query_vectorizer.weights) for w in weight_grid]
+        query_blocks = self._query_blocks(state, [profile])
+
+        ids, matched_on = state.partitions.candidates(profile, top_k) if filtered else (None, ())
+        if ids is None:
+            ids = state.partitions.active_ids
+        partials = state.blocks.partial_scores(query_blocks, ids)
+        query_present = block_presence(query_blocks)
+        hits = []
+        for weights in grid:
+            scores = state.blocks.combine(partials, query_present, weights, ids)[0]
+            top = _top_k(scores, top_k)
+            hits.append((scores[top], ids[top], matched_on))
+        return self._format(state, hits)
+
+    def _query_blocks(self, state, profiles):
+        texts = [p.get('bio_keywords', '') for p in profiles]
+        text_matrix = state.embedding_cache.get_or_encode(texts, self.text_encode_fn(state))
+        return state.query_vectorizer.blocks(profiles, text_matrix)
+
+    def text_encode_fn(self, state=None):
+        """ The state's text encoder behind its embedding store: texts the pipeline embedded are read, not encoded """
+        state = state or self._state
+        if state.embedding_store is None:
+            return state.bert_model.encode
+        return partial(state.embedding_store.encode, encode_fn=state.bert_model.encode)
+
+    def _filtered_search(self, state, profile, query_blocks, top_k, weights, fetch=None):
+        """ (scores, ids, matched_on) for one learner: the best `fetch` (default top_k) of its cell """
+        fetch = fetch or top_k
+        # Strictest cell with >= fetch instructors, relaxing language -> skill -> location
+        # (a diversity pool needs the whole pool in the cell, not just top_k)
+        ids, matched_on = state.partitions.candidates(profile, fetch)
+        if ids is None:
+            if weights != state.query_vectorizer.weights or config.SCORING_ENGINE == 'factorized':
+                return self._exact_search(state, query_blocks, None, fetch, weights)
+            distances, indices = state.index.search(compose_blocks(query_blocks, weights), k=fetch)
+            return distances[0], indices[0], ()
         
-        # 5. FORMAT OUTPUT
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx == -1: continue # Handle empty results safety
-            
-            instructor = self.instructors_df.iloc[idx]
-            score = float(distances[0][i]) # Cosine Similarity
-            
-            results.append({
-                "instructor_id": f"ML-{idx}", # Prefix to indicate ML source
-                "name": instructor['name'],
-                "location": instructor['location'],
-                "instrument": instructor['instrument_type'],
-                "match_score": round(score, 4),
-                "bio_short": instructor['bio_keywords'][:100] + "...",
-                "hourly_rate": float(instructor.get('hourly_rate', 0)),
-                "rating": float(instructor.get('rating', 0)),
-                "skill_level": instructor.get('skill_level', 'Beginner')
-            })
-            
+        # Exact scores for the cell only: cost is proportional to the cell, not the index
+        return self._exact_search(state, query_blocks, ids, fetch, weights, matched_on)
+
+    def _exact_search(self, state, query_blocks, ids, top_k, weights, matched_on=()):
+        """ Exact weighted-cosine top-k over ids (default: every active instructor) """
+        if ids is None:
+            ids = state.partitions.active_ids
+        scores, top_ids = state.scorer.search(query_blocks, weights, top_k, ids)
+        return scores[0], top_ids[0], matched_on
+
+    def _format(self, state, hits, query_blocks=None, weights=None):
+        """
+        Result lists for per-query (scores, ids, matched_on) hits, padded into one
+        (n_queries, k) array so the columns are gathered once. With query_blocks (the
+        same queries, in order) each result also gets its score breakdown.
+        """
+        k = max([len(ids) for _, ids, _ in hits] + [0])
+        distances = np.zeros((len(hits), k), dtype='float32')
+        indices = np.full((len(hits), k), -1, dtype='int64')
+        for i, (scores, ids, _) in enumerate(hits):
+            distances[i, :len(ids)] = scores
+            indices[i, :len(ids)] = ids
+
+        results = state.instructors.format_rows(distances, indices)
+        for rows, (_, _, matched_on) in zip(results, hits):
+            if matched_on:
+                for r in rows:
+                    r['matched_on'] = list(matched_on)
+        if query_blocks is not None:
+            self._attach_breakdowns(state, results, query_blocks, indices, weights)
         return results
 
-# Singleton
-recommender = SemanticRecommender()
+    @staticmethod
+    def _attach_breakdowns(state, results, query_blocks, indices, weights):
+        """
+        Adds 'score_breakdown' to every hit: the weighted categorical / numerical / text
+        contributions (they sum to match_score), the raw bio cosine and the learner fields
+        the instructor shares. Computed for the whole (n_queries, k) result in one pass.
+        match_score becomes that exact sum: an approximate index (IVF / SQ8) only estimates
+        it, which would leave the breakdown disagreeing with the score it explains.
+        """
+        parts = state.scorer.explain(query_blocks, weights, indices)
+        valid = indices != -1
+        exact = np.round((parts['categorical'] + parts['numerical'] + parts['text'])[valid].astype('float64'), 4)
+        contributions = {block: np.round(parts[block][valid].astype('float64'), 4).tolist()
+                         for block in ('categorical', 'numerical', 'text', 'text_similarity')}
+        matched = parts['matched'][valid]
+        fields = np.array(CAT_COLS, dtype=object)
+        flat = [r for rows in results for r in rows] # Same row-major order as indices[valid]
+        for j, (r, score) in enumerate(zip(flat, exact.tolist())):
+            r['match_score'] = score
+            r['score_breakdown'] = {block: values[j] for block, values in contributions.items()}
+            r['score_breakdown']['matched_fields'] = fields[matched[j]].tolist()
+
+    def stats(self):
+        state = self._state
+        text_encoder = state.manifest['text_encoder']['backend'] if state.manifest else config.TEXT_ENCODER_BACKEND
+        return {
+            'status': self.status,
+            'bundle_version': state.version,
+            'index_size': state.index.ntotal if state.index is not None else 0,
+            'index_spec': state.index_spec,
+            'weights': state.query_vectorizer.weights if state.query_vectorizer else None,
+            'scoring_engine': config.SCORING_ENGINE,
+            'factorized_scorer': state.scorer.stats() if state.scorer else None,
+            'text_encoder': text_encoder,
+            'embedding_cache': state.embedding_cache.stats(),
+            'embedding_store': state.embedding_store.report() if state.embedding_store is not None else None,
+            'result_cache': self.result_cache.stats()
+        }
+
+def _read_index(index_path):
+    """ Memory-maps the index when configured, so workers share its pages via the page cache """
+    if config.MMAP_ARTIFACTS and hasattr(faiss, 'IO_FLAG_MMAP_IFC'):
+        return faiss.read_index(index_path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+    return faiss.read_index(index_path)
+
+def _read_instructors(table):
+    """ Memory-mapped column store if it has been built, else the Parquet / CSV table read into columns """
+    col_dir = columns_path(table)
+    if os.path.exists(col_dir):
+        return load_columns(col_dir, mmap=config.MMAP_ARTIFACTS)
+    print(f"⚠️  No column store at {col_dir}; reading {os.path.basename(table)} (run utils/column_store.py to build it)")
+    df = read_table(table)
+    return {col: df[col].to_numpy() for col in df.columns}
+
+def _open_embedding_store(previous, bert_model, backend=None, model_name=None, onnx_dir=None):
+    """ The pipeline's embeddings of this text encoder, read-only; None if disabled or never built """
+    if not config.EMBEDDING_STORE_ONLINE:
+        return None
+    if bert_model is previous.bert_model:
+        return previous.embedding_store # Same encoder session, same store
+    try:
+        return open_store(backend, model_name, onnx_dir, readonly=True)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Embedding store unavailable ({e}); queries are encoded")
+        return None
+
+def _same_text_encoder(old_manifest, new_manifest):
+    """ Same backend/model and (for ONNX) byte-identical encoder files """
+    if old_manifest is None or old_manifest['text_encoder'] != new_manifest['text_encoder']:
+        return False
+    def encoder_files(manifest):
+        return {k: v for k, v in manifest['files'].items() if k.startswith('text_encoder' + os.sep)}
+    return encoder_files(old_manifest) == encoder_files(new_manifest)
+
+def _check_dims(manifest, index, blocks, query_vectorizer, bert_model, columns):
+    """ A bundle whose pieces disagree would serve garbage: refuse it before it goes live """
+    dims = manifest['dims']
+    text_dim = (bert_model.get_sentence_embedding_dimension()
+                if hasattr(bert_model, 'get_sentence_embedding_dimension') else dims['text'])
+    n_rows = len(next(iter(columns.values())))
+    problems = []
+    if index.d != dims['total'] or sum(blocks.dims.values()) != dims['total']:
+        problems.append(f"index d={index.d} / blocks d={sum(blocks.dims.values())}, manifest says {dims['total']}")
+    if query_vectorizer.cat_dim + query_vectorizer.num_dim + text_dim != dims['total']:
+        problems.append(f"processors + text encoder give {query_vectorizer.cat_dim} + "
+                        f"{query_vectorizer.num_dim} + {text_dim} dims")
+    if len(blocks) != n_rows:
+        problems.append(f"{len(blocks)} block rows for {n_rows} instructor rows")
+    if problems:
+        raise BundleError(f"Bundle {manifest['version']} is inconsistent: " + '; '.join(problems))
+
+def _read_blocks(bundle_dir, manifest, query_vectorizer):
+    """ blocks/<block>.npy (memory-mapped); format 1 bundles stored weighted vectors.npy instead """
+    mmap_mode = 'r' if config.MMAP_ARTIFACTS else None
+    if manifest['format_version'] == 1:
+        vectors = np.load(os.path.join(bundle_dir, 'vectors.npy'), mmap_mode=mmap_mode)
+        return split_blocks(vectors, query_vectorizer.cat_dim, query_vectorizer.num_dim)
+    return {block: np.load(os.path.join(bundle_dir, 'blocks', f"{block}.npy"), mmap_mode=mmap_mode)
+            for block in manifest['dims'] if block != 'total'}
+
+def canonical_query(profile, normalize_key=normalize_text):
+    """
+    What the model reads from a profile: the categorical fields as given (lookups are exact)
+    and the bio as the embedding cache keys it. Budget, genre etc. don't change the results.
+    """
+    values = tuple(_hashable(profile.get(col)) for col in CAT_COLS)
+    return values + (normalize_key(profile.get('bio_keywords', '')),)
+
+def _hashable(value):
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+def _row(blocks, i):
+    """ Query blocks of the i-th profile, each still 2-d """
+    return {block: values[i:i + 1] for block, values in blocks.items()}
+
+def _top_k(scores, k):
+    """ Positions of the k highest scores, best first """
+    if k >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+# Singleton (loaded lazily: start_warmup() from create_app, or on first use in scripts)
+recommender = SemanticRecommender(autoload=False)
+updater = IndexUpdater(recommender)
+# Coalesces concurrent get_matches() calls (one per request thread) into recommend_batch() calls
+batcher = MicroBatcher(recommender.recommend_batch, config.MICRO_BATCH_MAX_SIZE, config.MICRO_BATCH_MAX_WAIT_MS)
+
+def start_warmup():
+    return recommender.start_warmup()
+
+def get_readiness():
+    return recommender.readiness()
+
+def start_bundle_watch():
+    return recommender.start_watch()
+
+def reload_model(version=None):
+    """ Hot-swaps to a bundle version (default: the published one). False if already live. """
+    return recommender.reload(version)
+
+def get_bundle_status():
+    return recommender.bundle_status()
+
+def get_matches(profile, top_k=5, filtered=False, weights=None, explain=False, candidates=None, diverse=False):
+    """
+    weights: optional per-request block weights, e.g. {'text': 0.3} (others keep their default)
+    explain: adds a per-hit 'score_breakdown' (block contributions and matched fields)
+    candidates: rank only these instructors (instructor_profiles ids, or rows with an 'id')
+    diverse: top_k distinct instructors (MMR), no near-duplicates or repeated names
+    """
+    candidates = candidate_ids(candidates)
+    weights = check_weights(weights) if weights is not None else None # Client input: ValueError, never a 500
+    if not config.MICRO_BATCHING:
+        return recommender.recommend(profile, top_k=top_k, filtered=filtered, weights=weights, explain=explain,
+                                     candidates=candidates, diverse=diverse)
+    # Load / fail fast in the caller's thread, so nothing queues behind a loading model
+    recommender.ensure_ready()
+    # Batched per distinct options, so weights and candidates must be hashable
+    weights = tuple(sorted(weights.items())) if weights else None
+    future = batcher.submit(profile, top_k=top_k, filtered=filtered, weights=weights, explain=explain,
+                            candidates=candidates, diverse=diverse)
+    return future.result(timeout=config.MICRO_BATCH_RESULT_TIMEOUT_S)
+
+def get_batch_matches(profiles, top_k=5, filtered=False, weights=None, explain=False, candidates=None,
+                      diverse=False):
+    """ Batched variant of get_matches: returns one result list per profile, in order. """
+    return recommender.recommend_batch(profiles, top_k=top_k, filtered=filtered, weights=weights,
+                                       explain=explain, candidates=candidate_ids(candidates), diverse=diverse)
+
+def candidate_ids(candidates):
+    """ instructor_profiles ids (as a frozenset) from ids or instructor rows; None stays None """
+    if candidates is None:
+        return None
+    return frozenset(str(c.get('profile_id') or c.get('id')) if isinstance(c, dict) else str(c) for c in candidates)
+
+def get_weight_sweep(profile, weight_grid, top_k=5, filtered=False):
+    """ One result list per weighting in weight_grid, from a single encode + scoring pass """
+    return recommender.sweep_weights(profile, weight_grid, top_k=top_k, filtered=filtered)
+
+def upsert_instructors(instructors):
+    """ Adds or replaces instructors (processed-column dicts with a profile_id) in the live index. """
+    return updater.upsert(instructors)
+
+def remove_instructors(profile_ids):
+    return updater.remove(profile_ids)
+
+def compact_index():
+    return updater.compact()
 
-def get_matches(profile, top_k=5):
-    return recommender.recommend(profile, top_k=top_k)
+def get_model_stats():
+    stats = recommender.stats()
+    stats['index_updates'] = updater.stats()
+    stats['micro_batching'] = batcher.stats()
+    stats['bundle'] = {k: v for k, v in recommender.bundle_status().items() if k != 'manifest'}
+    return stats
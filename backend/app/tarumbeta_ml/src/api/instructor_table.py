@@ -0,0 +1,93 @@
+import numpy as np
+
+BIO_SHORT_CHARS = 100
+
+class InstructorTable:
+    """
+    Instructor metadata as contiguous NumPy columns, prepared once at load time:
+    dictionary-coded location / instrument / skill, float rate / rating, and the
+    "bio_short" prefixes already truncated. Rows are addressed by instructor key (the id
+    stored in the FAISS IDMap2, equal to the row of instructors_processed). Formatting search results is then one
+    gather per column over the returned index array instead of a DataFrame.iloc per hit.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns # Raw columns (memory-mapped when loaded from the column store)
+        self.n = len(columns['name'])
+
+        self.name = np.asarray(columns['name'])
+        self.location_codes, self.location_values = _dictionary_encode(columns['location'])
+        self.instrument_codes, self.instrument_values = _dictionary_encode(columns['instrument_type'])
+        self.skill_codes, self.skill_values = _dictionary_encode(
+            columns['skill_level'] if 'skill_level' in columns else np.full(self.n, 'Beginner'))
+        # UUID table: instructor key (= row) -> instructor_profiles.id, None when not linked to the DB
+        profile_ids = np.asarray(columns['profile_id']).astype(str).astype(object) if 'profile_id' in columns \
+            else np.full(self.n, '', dtype=object)
+        profile_ids[(profile_ids == '') | (profile_ids == 'nan')] = None # 'nan': empty cell in the CSV fallback
+        self.profile_id = profile_ids
+        self.key_by_profile = {pid: key for key, pid in enumerate(profile_ids.tolist()) if pid is not None}
+        # Who a row is, for de-duplicating results: its profile when linked, else its display name
+        linked = np.array([pid is not None for pid in profile_ids.tolist()], dtype=bool)
+        _, name_codes = np.unique(np.char.lower(np.char.strip(self.name.astype(str))), return_inverse=True)
+        self.identity = np.where(linked, self.n + np.arange(self.n), name_codes.reshape(-1))
+        self.hourly_rate = _float_column(columns, 'hourly_rate', self.n)
+        self.rating = _float_column(columns, 'rating', self.n)
+
+        # Fixed-width unicode astype() truncates every bio in one pass
+        bios = np.asarray(columns['bio_keywords']).astype(str)
+        self.bio_short = np.char.add(bios.astype(f"U{BIO_SHORT_CHARS}"), '...')
+
+    def keys_of(self, profile_ids):
+        """ Sorted unique instructor keys of the given instructor_profiles ids; unknown ids are skipped """
+        keys = {self.key_by_profile.get(str(pid)) for pid in profile_ids}
+        keys.discard(None)
+        return np.array(sorted(keys), dtype='int64')
+
+    def format(self, distances, indices):
+        """ Result dicts for one query's (distances, indices); -1 (empty slots) are dropped. """
+        return self.format_rows(np.asarray(distances)[None, :], np.asarray(indices)[None, :])[0]
+
+    def format_rows(self, distances, indices):
+        """ Result dicts for an (n_queries, k) search output, gathering every column once. """
+        valid = indices != -1
+        idx = indices[valid]
+        scores = distances[valid].tolist()
+
+        names = self.name[idx].tolist()
+        locations = self.location_values[self.location_codes[idx]].tolist()
+        instruments = self.instrument_values[self.instrument_codes[idx]].tolist()
+        skills = self.skill_values[self.skill_codes[idx]].tolist()
+        bios = self.bio_short[idx].tolist()
+        profile_ids = self.profile_id[idx].tolist()
+        rates = self.hourly_rate[idx].tolist()
+        ratings = self.rating[idx].tolist()
+
+        flat = [
+            {
+                "instructor_id": f"ML-{i}", # Prefix to indicate ML source
+                "profile_id": profile_ids[j], # instructor_profiles.id, or None for synthetic rows
+                "name": names[j],
+                "location": locations[j],
+                "instrument": instruments[j],
+                "match_score": round(scores[j], 4),
+                "bio_short": bios[j],
+                "hourly_rate": rates[j],
+                "rating": ratings[j],
+                "skill_level": skills[j]
+            }
+            for j, i in enumerate(idx.tolist())
+        ]
+
+        # Split back into one list per query
+        bounds = np.cumsum(valid.sum(axis=1)).tolist()
+        return [flat[start:end] for start, end in zip([0] + bounds[:-1], bounds)]
+
+def _dictionary_encode(values):
+    """ (int32 codes, plain-str dictionary) """
+    dictionary, codes = np.unique(np.asarray(values).astype(str), return_inverse=True)
+    return codes.astype('int32'), dictionary.astype(object)
+
+def _float_column(columns, name, n):
+    if name not in columns:
+        return np.zeros(n, dtype='float64')
+    return np.asarray(columns[name], dtype='float64')
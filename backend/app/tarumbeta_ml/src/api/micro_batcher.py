@@ -0,0 +1,109 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future
+import numpy as np
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single queries into batched calls.
+    Each caller submit()s one item and blocks on its own Future; a worker thread takes the
+    first queued item, keeps collecting for up to max_wait_ms (or until max_batch_size items)
+    and runs run_batch(items, **options) once per distinct options, e.g. one encoder call
+    and one FAISS search for every concurrent /find-instructors request.
+
+    run_batch must return one result per item, in order: its exceptions, or a result count
+    that doesn't match, are raised in every caller of that batch. The worker is started lazily, and again after a fork (gunicorn).
+    """
+
+    def __init__(self, run_batch, max_batch_size=32, max_wait_ms=2.0, clock=time.perf_counter):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._clock = clock
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = Counter()
+        self._waits = deque(maxlen=4096) # Seconds each item spent queued before its batch ran
+
+    def submit(self, item, **options):
+        """ Queues one item and returns a Future for its result. """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, tuple(sorted(options.items())), future, self._clock()))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return future
+
+    def stats(self):
+        waits_ms = np.asarray(self._waits) * 1000
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'queue_depth': self._queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'batch_size_histogram': {str(size): n for size, n in sorted(self.batch_sizes.items())},
+            'added_latency_ms': {
+                'mean': round(float(waits_ms.mean()), 3) if len(waits_ms) else 0.0,
+                'p50': round(float(np.percentile(waits_ms, 50)), 3) if len(waits_ms) else 0.0,
+                'p99': round(float(np.percentile(waits_ms, 99)), 3) if len(waits_ms) else 0.0
+            }
+        }
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            if self._pid is not None: # Forked: the parent's queue and worker don't exist here
+                self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._worker, name='ml-micro-batcher', daemon=True)
+            self._thread.start()
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = batch[0][3] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - self._clock()
+                try:
+                    # Past the deadline, still take whatever is already queued
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch):
+        started = self._clock()
+        self.batches += 1
+        self.items += len(batch)
+        self.batch_sizes[len(batch)] += 1
+        self._waits.extend(started - enqueued for _, _, _, enqueued in batch)
+
+        groups = defaultdict(list)
+        for entry in batch:
+            groups[entry[1]].append(entry)
+        for options, entries in groups.items():
+            try:
+                results = list(self.run_batch([item for item, _, _, _ in entries], **dict(options)))
+                if len(results) != len(entries):
+                    raise RuntimeError(f"run_batch returned {len(results)} results for {len(entries)} items")
+            except Exception as e:
+                for _, _, future, _ in entries:
+                    future.set_exception(e)
+                continue
+            for (_, _, future, _), result in zip(entries, results):
+                future.set_result(result)
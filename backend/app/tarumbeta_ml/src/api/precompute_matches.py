@@ -0,0 +1,45 @@
+import pandas as pd
+import os
+import sys
+import time
+
+# Setup path (same resolution order as inference_semantic)
+try:
+    from app.tarumbeta_ml.src.api.inference_semantic import get_batch_matches
+    from app.tarumbeta_ml.src.utils import config
+    from app.tarumbeta_ml.src.utils.table_io import find_table, read_table
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    from src.api.inference_semantic import get_batch_matches
+    from src.utils import config
+    from src.utils.table_io import find_table, read_table
+
+def run_precompute(top_k=5, chunk_size=1024):
+    """ Nightly refresh: matches every learner in learners_processed using batched inference. """
+    print("🌙 Precomputing matches for all learners...")
+
+    learners = read_table(find_table('learners_processed'))
+    profiles = learners.to_dict('records')
+
+    rows = []
+    start = time.perf_counter()
+    for offset in range(0, len(profiles), chunk_size):
+        chunk = profiles[offset:offset + chunk_size]
+        for learner, matches in zip(chunk, get_batch_matches(chunk, top_k=top_k)):
+            for rank, m in enumerate(matches, 1):
+                rows.append({
+                    'learner_id': learner['learner_id'],
+                    'rank': rank,
+                    'instructor_id': m['instructor_id'],
+                    'name': m['name'],
+                    'match_score': m['match_score']
+                })
+    elapsed = time.perf_counter() - start
+
+    out_path = os.path.join(config.OUTPUTS, 'learner_matches.csv')
+    pd.DataFrame(rows).to_csv(out_path, index=False)
+    print(f"✅ Matched {len(profiles)} learners in {elapsed:.1f}s ({len(profiles) / elapsed:.0f} learners/s)")
+    print(f"   Saved to {out_path}")
+
+if __name__ == "__main__":
+    run_precompute()
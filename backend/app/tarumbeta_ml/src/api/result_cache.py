@@ -0,0 +1,108 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+class ResultCache:
+    """
+    Bounded, thread-safe LRU cache of finished recommendation lists with TTL expiry: the
+    first level in front of the model. A hit skips the encoder and the search; on a miss
+    the EmbeddingCache (second level) still skips the encoder for a known bio.
+
+    Entries are tagged with the model state that produced them (ModelState.serial, new on
+    every bundle reload or index update). The first lookup from a newer state drops every
+    entry; requests still finishing on an older state neither read nor write.
+    """
+
+    def __init__(self, max_size=2048, ttl_seconds=None, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict() # key -> (results, stored_at, compute_seconds)
+        self._lock = threading.Lock()
+        self._serial = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0 # Sum of the compute time of every hit entry
+
+    def get_many(self, keys, serial):
+        """ Cached results per key (copies, safe to modify), None where missing """
+        if not self.max_size:
+            return [None] * len(keys)
+        found = []
+        with self._lock:
+            current = self._adopt(serial)
+            for key in keys:
+                entry = self._lookup(key) if current else None
+                if entry is None:
+                    self.misses += 1
+                    found.append(None)
+                else:
+                    self.hits += 1
+                    self.saved_seconds += entry[2]
+                    found.append(entry[0])
+        return [copy.deepcopy(results) if results is not None else None for results in found]
+
+    def put_many(self, keys, results, serial, compute_seconds):
+        """ Stores results (one list per key) that took compute_seconds each to produce """
+        if not self.max_size:
+            return
+        results = [copy.deepcopy(r) for r in results] # Callers may modify the ones they return
+        with self._lock:
+            if not self._adopt(serial):
+                return
+            now = self._clock()
+            for key, value in zip(keys, results):
+                self._entries[key] = (value, now, compute_seconds)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'latency_saved_ms': round(self.saved_seconds * 1000, 1),
+                'avg_saved_ms_per_hit': round(self.saved_seconds * 1000 / self.hits, 3) if self.hits else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # --- Callers must hold self._lock ---
+
+    def _adopt(self, serial):
+        """ False for a state older than the cached one; a newer one invalidates the cache """
+        if self._serial is not None and serial < self._serial:
+            return False
+        if serial != self._serial:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._serial = serial
+        return True
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl_seconds is not None and self._clock() - entry[1] > self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
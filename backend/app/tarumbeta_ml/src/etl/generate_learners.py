@@ -1,71 +1,131 @@
+import argparse
 import pandas as pd
 import numpy as np
 import os
 import sys
-import random
+import time
 
 # Setup path
-sys.path.append('/content/tarumbeta-ml')
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from src.utils import config
+from src.utils.table_io import table_format, table_path, write_table
 
-def run_learner_generation():
-    print("👥 Generating Synthetic Learners...")
-    
-    # 1. Define The "Demand" Parameters
-    # These must overlap with Instructor "Supply" for matches to happen
-    cities = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika']
-    instruments = ['Guitar', 'Piano', 'Drums', 'Violin', 'Saxophone', 'Flute', 'Cello', 'Voice']
-    levels = ['Beginner', 'Intermediate', 'Advanced']
-    goals = ['Hobby', 'Exam Prep', 'Professional Performance', 'Band Practice', 'Just for Fun']
-    
+# 1. Define The "Demand" Parameters
+# These must overlap with Instructor "Supply" for matches to happen
+CITIES = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika']
+CITY_PROBS = [0.4, 0.2, 0.1, 0.1, 0.1, 0.1] # Nairobi bias
+INSTRUMENTS = ['Guitar', 'Piano', 'Drums', 'Violin', 'Saxophone', 'Flute', 'Cello', 'Voice']
+INSTRUMENT_PROBS = [0.3, 0.3, 0.1, 0.1, 0.05, 0.05, 0.05, 0.05] # Piano/Guitar popular
+LEVELS = ['Beginner', 'Intermediate', 'Advanced']
+LEVEL_PROBS = [0.6, 0.3, 0.1] # Mostly beginners
+LANGUAGES = ['English', 'Swahili']
+LANGUAGE_PROBS = [0.7, 0.3]
+GOALS = ['Hobby', 'Exam Prep', 'Professional Performance', 'Band Practice', 'Just for Fun']
+CLOSINGS = ['Looking for a strict teacher.', 'I want to have fun.', 'Need to prepare for ABRSM exams.']
+
+COLUMNS = ['learner_id', 'location', 'instrument_type', 'skill_level', 'teaching_language', 'bio_keywords',
+           'hourly_rate', 'rating', 'years_experience']
+
+def load_genres():
+    """ Genres for the bios: popular Kenyan genres (the short list if the genre file is unreadable) """
     # 2. Load Genre Data (if available) for Semantic flavor
     genre_path = os.path.join(config.DATA_RAW, 'music_genres.csv')
     if os.path.exists(genre_path):
         try:
-            genre_df = pd.read_csv(genre_path)
-            # Assuming the csv has a column like 'Genre' or similar. 
-            # If not, we fall back to a default list.
-            # We'll just grab any text column for variety or hardcode popular Kenyan genres
-            genres = ['Afro-fusion', 'Benga', 'Gospel', 'Reggae', 'Hip Hop', 'Jazz', 'Classical', 'Rock', 'Pop']
-        except:
-            genres = ['Jazz', 'Classical', 'Rock', 'Pop']
-    else:
-        genres = ['Afro-fusion', 'Benga', 'Gospel', 'Reggae', 'Hip Hop', 'Jazz', 'Classical', 'Rock', 'Pop']
+            pd.read_csv(genre_path)
+        except Exception:
+            return ['Jazz', 'Classical', 'Rock', 'Pop']
+    return ['Afro-fusion', 'Benga', 'Gospel', 'Reggae', 'Hip Hop', 'Jazz', 'Classical', 'Rock', 'Pop']
+
+def bio_table(genres):
+    """
+    Every possible "Semantic Bio", built once with broadcast string ops; entry
+    ((genre * n_instruments + instrument) * n_goals + goal) * n_closings + closing.
+    e.g., "I want to learn Jazz Piano for Professional Performance. I want to have fun."
+    """
+    parts = np.ix_(np.array(genres, dtype=object), np.array(INSTRUMENTS, dtype=object),
+                   np.array(GOALS, dtype=object), np.array(CLOSINGS, dtype=object))
+    genre, inst, goal, closing = parts
+    return ("I want to learn " + genre + " " + inst + " for " + goal + ". " + closing).ravel()
+
+def random_streams(seed):
+    """ One generator per field: each draws row by row, so shard size never changes the data """
+    fields = ['location', 'instrument', 'level', 'language', 'genre', 'goal', 'closing']
+    return dict(zip(fields, map(np.random.default_rng, np.random.SeedSequence(seed).spawn(len(fields)))))
+
+def generate_learners(n, rng, genres, bios, start=0):
+    """
+    Learners start .. start + n - 1 as a DataFrame. Every field is one array draw of codes;
+    the text columns are categoricals over their (small) vocabularies, so no per-row
+    string is built except the id.
+    """
+    inst = rng['instrument'].choice(len(INSTRUMENTS), size=n, p=INSTRUMENT_PROBS)
+    genre = rng['genre'].integers(len(genres), size=n)
+    goal = rng['goal'].integers(len(GOALS), size=n)
+    closing = rng['closing'].integers(len(CLOSINGS), size=n)
+    ids = np.arange(start, start + n).astype(str)
 
-    # 3. Generate 5,000 Learners
-    n_learners = 5000
-    data = []
-    
-    for i in range(n_learners):
-        inst = np.random.choice(instruments, p=[0.3, 0.3, 0.1, 0.1, 0.05, 0.05, 0.05, 0.05]) # Piano/Guitar popular
-        genre = np.random.choice(genres)
-        goal = np.random.choice(goals)
-        
-        # Build a "Semantic Bio" that S-BERT can understand
-        # e.g., "I want to learn Jazz Piano for Professional Performance"
-        bio = f"I want to learn {genre} {inst} for {goal}. {random.choice(['Looking for a strict teacher.', 'I want to have fun.', 'Need to prepare for ABRSM exams.'])}"
-        
-        learner = {
-            'learner_id': f"L{str(i).zfill(4)}",
-            'location': np.random.choice(cities, p=[0.4, 0.2, 0.1, 0.1, 0.1, 0.1]), # Nairobi bias
-            'instrument_type': inst,
-            'skill_level': np.random.choice(levels, p=[0.6, 0.3, 0.1]), # Mostly beginners
-            'teaching_language': np.random.choice(['English', 'Swahili'], p=[0.7, 0.3]),
-            'bio_keywords': bio,
-            # Dummies for Numerical Fields (Learners don't have rates)
-            'hourly_rate': 0, 
-            'rating': 0,
-            'years_experience': 0 # Added to match instructor schema if needed, though mostly unused for query
-        }
-        data.append(learner)
-        
+    return pd.DataFrame({
+        'learner_id': np.char.add('L', np.char.zfill(ids, 4)),
+        'location': pd.Categorical.from_codes(rng['location'].choice(len(CITIES), size=n, p=CITY_PROBS), CITIES),
+        'instrument_type': pd.Categorical.from_codes(inst, INSTRUMENTS),
+        'skill_level': pd.Categorical.from_codes(rng['level'].choice(len(LEVELS), size=n, p=LEVEL_PROBS), LEVELS),
+        'teaching_language': pd.Categorical.from_codes(
+            rng['language'].choice(len(LANGUAGES), size=n, p=LANGUAGE_PROBS), LANGUAGES),
+        'bio_keywords': pd.Categorical.from_codes(
+            ((genre * len(INSTRUMENTS) + inst) * len(GOALS) + goal) * len(CLOSINGS) + closing, bios),
+        # Dummies for Numerical Fields (Learners don't have rates)
+        'hourly_rate': 0,
+        'rating': 0,
+        'years_experience': 0 # Added to match instructor schema if needed, though mostly unused for query
+    }, columns=COLUMNS)
+
+def shard_dir(table):
+    """ learners_processed.parquet -> learners_processed_shards/ """
+    return os.path.splitext(table)[0] + '_shards'
+
+def run_learner_generation(n_learners=5000, seed=config.RANDOM_SEED, out_path=None,
+                           shard_size=config.LEARNER_SHARD_SIZE):
+    """
+    Writes n_learners synthetic learners. Up to shard_size they go to one table (out_path,
+    default learners_processed.<TABLE_FORMAT>; .parquet or .csv); beyond that, to
+    <out_path>_shards/part-00000.<ext>, ... with shard_size learners each, generated one
+    shard at a time. Parquet keeps the categoricals dictionary-encoded.
+    """
+    print("👥 Generating Synthetic Learners...")
+    out_path = out_path or table_path('learners_processed')
+    ext = os.path.splitext(out_path)[1]
+    table_format(out_path) # Unknown extensions fail before any work
+    genres = load_genres()
+    bios = bio_table(genres)
+    rng = random_streams(seed)
+    started = time.perf_counter()
+
+    # 3. Generate (one shard at a time)
     # 4. Save
-    df = pd.DataFrame(data)
-    out_path = os.path.join(config.DATA_PROCESSED, 'learners_processed.csv')
-    df.to_csv(out_path, index=False)
-    print(f"✅ Generated {len(df)} Learners at {out_path}")
-    print(f"   Sample Bio: {df.iloc[0]['bio_keywords']}")
+    if n_learners <= shard_size:
+        df = generate_learners(n_learners, rng, genres, bios)
+        write_table(df, out_path)
+        print(f"✅ Generated {len(df)} Learners at {out_path}")
+        print(f"   Sample Bio: {df.iloc[0]['bio_keywords']}")
+        return
+
+    out_dir = shard_dir(out_path)
+    os.makedirs(out_dir, exist_ok=True)
+    for shard, start in enumerate(range(0, n_learners, shard_size)):
+        df = generate_learners(min(shard_size, n_learners - start), rng, genres, bios, start=start)
+        write_table(df, os.path.join(out_dir, f"part-{shard:05d}{ext}"))
+        print(f"   Shard {shard}: {start + len(df):,}/{n_learners:,} learners")
+    elapsed = time.perf_counter() - started
+    print(f"✅ Generated {n_learners:,} Learners in {shard + 1} shards at {out_dir} "
+          f"({elapsed:.1f}s, {n_learners / elapsed:,.0f} learners/s)")
 
 if __name__ == "__main__":
-    np.random.seed(config.RANDOM_SEED)
-    run_learner_generation()
+    parser = argparse.ArgumentParser(description="Synthetic learners (vectorized, sharded)")
+    parser.add_argument('--count', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=config.RANDOM_SEED)
+    parser.add_argument('--out', default=None,
+                        help="output .parquet / .csv (default: datasets/processed/learners_processed.<TABLE_FORMAT>)")
+    parser.add_argument('--shard-size', type=int, default=config.LEARNER_SHARD_SIZE)
+    args = parser.parse_args()
+    run_learner_generation(args.count, seed=args.seed, out_path=args.out, shard_size=args.shard_size)
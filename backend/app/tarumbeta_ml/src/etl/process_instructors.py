@@ -1,102 +1,167 @@
+import argparse
 import pandas as pd
 import numpy as np
 import os
+import re
 import sys
-import random
 
 # Setup path to import config
-sys.path.append('/content/tarumbeta-ml')
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from src.utils import config
+from src.utils.column_store import ColumnWriter, columns_path
+from src.utils.table_io import TableWriter, table_path
 
-def extract_name_from_title(title):
-    """ Tries to extract a name from the course title, or generates a Kenyan placeholder. """
-    title = str(title)
-    if ' with ' in title:
-        return title.split(' with ')[-1].split(' - ')[0].split(' | ')[0].title()
+# The raw catalog is streamed in chunks (config.ETL_CHUNK_SIZE rows): every step below is a
+# column operation on one chunk, and each processed chunk is appended to the outputs, so
+# memory stays flat however large udemy_courses.csv gets.
+
+RAW_COLUMNS = ['course_title', 'price', 'level', 'num_reviews', 'subject']
+OUTPUT_COLUMNS = ['name', 'location', 'instrument_type', 'skill_level', 'teaching_language',
+                  'hourly_rate', 'rating', 'bio_keywords']
+
+FIRST_NAMES = np.array(['John','Mary','David','Sarah','Joseph','Grace','Peter','Ann','Michael','Jane','Paul','Esther'])
+LAST_NAMES  = np.array(['Kamau','Ochieng','Wanjiku','Otieno','Achieng','Kiprop','Chebet','Mutai','Njoroge','Mwangi'])
+
+# Kenyan Context (The Injection): real courses are located in Kenya for the platform demo
+CITIES = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika']
+CITY_PROBS = [0.5, 0.15, 0.10, 0.10, 0.10, 0.05] # Weighted to Nairobi
+LANGUAGES = ['English', 'Swahili']
+LANGUAGE_PROBS = [0.85, 0.15]
+
+# Title keywords -> the 8 Core Instruments
+# Priority order matters (e.g. 'Bass Guitar' should hit 'Guitar' or 'Bass')
+INSTRUMENT_KEYWORDS = {
+    'guitar': 'Guitar', 'piano': 'Piano', 'drum': 'Drums',
+    'violin': 'Violin', 'saxophone': 'Saxophone', 'flute': 'Flute',
+    'cello': 'Cello', 'voice': 'Voice', 'singing': 'Voice', 'vocal': 'Voice'
+}
+DEFAULT_INSTRUMENT = 'Piano' # Default fallback if unclear
+
+# "... with [Name] - subtitle | tagline": the text after the last ' with ', up to ' - ' / ' | '
+NAME_PATTERN = re.compile(r'.* with (.*?)(?= - | \| |\Z)', re.DOTALL)
+
+SKILL_LEVELS = {
+    'All Levels': 'Intermediate',
+    'Beginner Level': 'Beginner',
+    'Intermediate Level': 'Intermediate',
+    'Expert Level': 'Advanced'
+}
+
+def extract_instruments(titles):
+    """ Maps a column of course titles to the 8 Core Instruments. """
+    # One substring pass per keyword over the whole column; np.select keeps the first keyword
+    # (in priority order) present anywhere in the title
+    lowered = titles.astype(str).str.lower()
+    found = [lowered.str.contains(key, regex=False).to_numpy(dtype=bool) for key in INSTRUMENT_KEYWORDS]
+    return pd.Series(np.select(found, list(INSTRUMENT_KEYWORDS.values()), DEFAULT_INSTRUMENT), index=titles.index)
+
+def extract_names(titles, rng):
+    """ Names from "... with [Name]" titles, else a generated Kenyan placeholder. """
+    titles = titles.astype(str)
     # Fallback: Generate realistic Kenyan names if title doesn't have "with [Name]"
-    first = random.choice(['John','Mary','David','Sarah','Joseph','Grace','Peter','Ann','Michael','Jane','Paul','Esther'])
-    last  = random.choice(['Kamau','Ochieng','Wanjiku','Otieno','Achieng','Kiprop','Chebet','Mutai','Njoroge','Mwangi'])
-    return f"{first} {last}"
-
-def get_instrument(text):
-    """ Maps title text to the 8 Core Instruments. """
-    text = str(text).lower()
-    # Priority order matters (e.g. 'Bass Guitar' should hit 'Guitar' or 'Bass')
-    # We stick to your 8 core instruments
-    mapping = {
-        'guitar': 'Guitar', 'piano': 'Piano', 'drum': 'Drums', 
-        'violin': 'Violin', 'saxophone': 'Saxophone', 'flute': 'Flute', 
-        'cello': 'Cello', 'voice': 'Voice', 'singing': 'Voice', 'vocal': 'Voice'
-    }
-    for key, val in mapping.items():
-        if key in text:
-            return val
-    return 'Piano' # Default fallback if unclear
-
-def run_instructor_etl():
-    print("⚙️  Starting Instructor ETL (Udemy Source)...")
-    
-    # 1. Load Raw Data
-    raw_path = os.path.join(config.DATA_RAW, 'udemy_courses.csv')
-    if not os.path.exists(raw_path):
-        raise FileNotFoundError(f"❌ Missing {raw_path}. Did you upload it?")
-    
-    df = pd.read_csv(raw_path)
-    print(f"   Loaded {len(df)} raw courses.")
-    
+    # (drawn for every row, so the names don't depend on where the chunks split)
+    first = FIRST_NAMES[rng['first'].integers(len(FIRST_NAMES), size=len(titles))]
+    last = LAST_NAMES[rng['last'].integers(len(LAST_NAMES), size=len(titles))]
+    names = pd.Series(np.char.add(np.char.add(first, ' '), last), index=titles.index, dtype=object)
+    # The regex only runs on the (few) titles that can match it
+    has_name = titles.str.contains(' with ', regex=False).to_numpy(dtype=bool)
+    names[has_name] = titles[has_name].str.extract(NAME_PATTERN)[0].str.title()
+    return names
+
+def random_streams(seed):
+    """ One generator per random field: each draws row by row, independent of chunk size """
+    fields = ['first', 'last', 'location', 'language']
+    return dict(zip(fields, map(np.random.default_rng, np.random.SeedSequence(seed).spawn(len(fields)))))
+
+def transform_chunk(df, rng, max_log_reviews):
+    """ Raw Udemy courses (one chunk) -> processed instructor rows """
     # 2. Filter for Music
     # The dataset has a 'subject' column. We only want 'Musical Instruments'
     if 'subject' in df.columns:
-        df = df[df['subject'] == 'Musical Instruments'].copy()
-    print(f"   Filtered to {len(df)} music courses.")
+        df = df[df['subject'] == 'Musical Instruments']
+    out = pd.DataFrame(index=df.index)
 
     # 3. Feature Engineering
     # A. Name & Instrument
-    df['name'] = df['course_title'].apply(extract_name_from_title)
-    df['instrument_type'] = df['course_title'].apply(get_instrument)
-    
-    # B. Kenyan Context (The Injection)
-    # We force these real courses to be located in Kenya for your platform demo
-    cities = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika']
-    probs  = [0.5, 0.15, 0.10, 0.10, 0.10, 0.05] # Weighted to Nairobi
-    
-    df['location'] = np.random.choice(cities, size=len(df), p=probs)
-    df['teaching_language'] = np.random.choice(['English', 'Swahili'], size=len(df), p=[0.85, 0.15])
-    
+    out['name'] = extract_names(df['course_title'], rng)
+
+    # B. Kenyan Context
+    out['location'] = rng['location'].choice(CITIES, size=len(df), p=CITY_PROBS)
+    out['instrument_type'] = extract_instruments(df['course_title'])
+
     # C. Standardize Numericals
-    # Map Udemy 'price' -> hourly_rate
     # Map Udemy 'level' -> skill_level
-    df['hourly_rate'] = df['price'].replace(0, 20) # Treat free courses as cheap lessons
-    df['skill_level'] = df['level'].map({
-        'All Levels': 'Intermediate', 
-        'Beginner Level': 'Beginner', 
-        'Intermediate Level': 'Intermediate', 
-        'Expert Level': 'Advanced'
-    }).fillna('Intermediate')
-    
+    # Map Udemy 'price' -> hourly_rate
+    out['skill_level'] = df['level'].map(SKILL_LEVELS).fillna('Intermediate')
+    out['teaching_language'] = rng['language'].choice(LANGUAGES, size=len(df), p=LANGUAGE_PROBS)
+    out['hourly_rate'] = df['price'].replace(0, 20) # Treat free courses as cheap lessons
+
     # D. Rating Normalization (0-5 scale)
     # Udemy has 'num_reviews'. We use this as a proxy for "Verified Rating"
-    # We normalize log-scale because reviews vary wildly
-    df['rating'] = np.log1p(df['num_reviews']) 
-    df['rating'] = (df['rating'] / df['rating'].max()) * 5.0 # Scale to 0-5
-    df['rating'] = df['rating'].round(1)
-    
+    # We normalize log-scale because reviews vary wildly (max taken over the whole catalog)
+    out['rating'] = ((np.log1p(df['num_reviews']) / max_log_reviews) * 5.0).round(1)
+
     # E. The "Semantic" Field
     # We use the Course Title as the 'Bio'. It contains rich keywords.
-    df['bio_keywords'] = df['course_title']
-    
-    # 4. Final Cleanup
-    # Keep only the columns the model needs
-    cols = ['name', 'location', 'instrument_type', 'skill_level', 'teaching_language', 
-            'hourly_rate', 'rating', 'bio_keywords']
-    
-    final_df = df[cols].reset_index(drop=True)
-    
-    # 5. Save
-    out_path = os.path.join(config.DATA_PROCESSED, 'instructors_processed.csv')
-    final_df.to_csv(out_path, index=False)
-    print(f"✅ Saved {len(final_df)} Processed Instructors to {out_path}")
+    out['bio_keywords'] = df['course_title']
+    return out[OUTPUT_COLUMNS]
+
+def read_raw(raw_path, chunksize, usecols=None):
+    """ The raw catalog as an iterator of DataFrames; only the columns the ETL reads """
+    header = pd.read_csv(raw_path, nrows=0).columns
+    usecols = [col for col in (usecols or RAW_COLUMNS) if col in header]
+    return pd.read_csv(raw_path, usecols=usecols, chunksize=chunksize,
+                       dtype={'course_title': str, 'level': str, 'subject': str})
+
+def max_log_reviews(raw_path, chunksize):
+    """ First (two-column) pass: the rating scale needs the catalog-wide review maximum """
+    best = -np.inf
+    for chunk in read_raw(raw_path, chunksize, usecols=['num_reviews', 'subject']):
+        if 'subject' in chunk.columns:
+            chunk = chunk[chunk['subject'] == 'Musical Instruments']
+        if len(chunk):
+            best = max(best, np.log1p(chunk['num_reviews']).max())
+    return best
+
+def run_instructor_etl(raw_path=None, out_path=None, chunksize=config.ETL_CHUNK_SIZE, seed=config.RANDOM_SEED):
+    print("⚙️  Starting Instructor ETL (Udemy Source)...")
+
+    # 1. Load Raw Data (streamed)
+    raw_path = raw_path or os.path.join(config.DATA_RAW, 'udemy_courses.csv')
+    if not os.path.exists(raw_path):
+        raise FileNotFoundError(f"❌ Missing {raw_path}. Did you upload it?")
+    out_path = out_path or table_path('instructors_processed') # .parquet or .csv (config.TABLE_FORMAT)
+
+    scale = max_log_reviews(raw_path, chunksize)
+    rng = random_streams(seed)
+
+    # 4/5. Transform and save chunk by chunk: one row group (or CSV block) and one column
+    # store spill per chunk
+    table = TableWriter(out_path, OUTPUT_COLUMNS)
+    columns = ColumnWriter(columns_path(out_path))
+    n_raw = n_out = 0
+    for chunk in read_raw(raw_path, chunksize):
+        n_raw += len(chunk)
+        processed = transform_chunk(chunk, rng, scale)
+        table.append(processed)
+        columns.append(processed.reset_index(drop=True))
+        n_out += len(processed)
+    print(f"   Loaded {n_raw} raw courses.")
+    print(f"   Filtered to {n_out} music courses.")
+
+    table.close()
+    print(f"✅ Saved {n_out} Processed Instructors to {out_path}")
+
+    # Memory-mappable copy for serving (shared across gunicorn workers)
+    columns.close()
+    print(f"   Column store: {columns_path(out_path)}")
 
 if __name__ == "__main__":
-    np.random.seed(config.RANDOM_SEED)
-    run_instructor_etl()
+    parser = argparse.ArgumentParser(description="Udemy courses -> processed instructors (streamed)")
+    parser.add_argument('--raw', default=None, help="raw catalog CSV (default: datasets/raw/udemy_courses.csv)")
+    parser.add_argument('--out', default=None,
+                        help="output .parquet / .csv (default: datasets/processed/instructors_processed.<TABLE_FORMAT>)")
+    parser.add_argument('--chunksize', type=int, default=config.ETL_CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=config.RANDOM_SEED)
+    args = parser.parse_args()
+    run_instructor_etl(args.raw, args.out, chunksize=args.chunksize, seed=args.seed)
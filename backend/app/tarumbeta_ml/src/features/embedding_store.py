@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import numpy as np
+
+# Ensure we can find the config
+try:
+    from app.tarumbeta_ml.src.utils import config
+    from app.tarumbeta_ml.src.api.embedding_cache import normalize_text
+    from app.tarumbeta_ml.src.features.text_encoder import encoder_id
+except ImportError:
+    try:
+        from backend.app.tarumbeta_ml.src.utils import config
+        from backend.app.tarumbeta_ml.src.api.embedding_cache import normalize_text
+        from backend.app.tarumbeta_ml.src.features.text_encoder import encoder_id
+    except ImportError:
+        import sys
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+        from src.utils import config
+        from src.api.embedding_cache import normalize_text
+        from src.features.text_encoder import encoder_id
+
+# Content-addressed text embeddings on disk, one directory per text encoder:
+#   <EMBEDDING_STORE_DIR>/<model slug>/
+#       meta.json     <- model id, key format, dimension, dtype, cumulative encoder time (for the time-saved report)
+#       keys.bin      <- 16-byte blake2b digest of each row's model id + whitespace-collapsed text
+#       vectors.bin   <- rows x dimension, float32 / float16, memory-mapped
+# Rows are only ever appended (vectors before keys), so a crash mid-append leaves a valid
+# prefix, and a reader's mapping stays valid while a writer appends.
+
+META_FILE = 'meta.json'
+KEYS_FILE = 'keys.bin'
+VECTORS_FILE = 'vectors.bin'
+DIGEST_SIZE = 16
+KEY_FORMAT = 2 # 1 (no 'key_format' in meta.json): lower-cased text only, whatever the encoder
+
+def text_digest(model_id, key):
+    """ The row key of a (whitespace-collapsed, case kept) text for one encoder """
+    return hashlib.blake2b(f"{model_id}\n{key}".encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+def store_path(model_id, root=None):
+    slug = re.sub(r'[^A-Za-z0-9.-]+', '_', model_id)[:48]
+    return os.path.join(root or config.EMBEDDING_STORE_DIR,
+                        f"{slug}-{hashlib.sha1(model_id.encode('utf-8')).hexdigest()[:8]}")
+
+def open_store(backend=None, model_name=None, onnx_dir=None, root=None, readonly=False):
+    """
+    The store for a text encoder (config.TEXT_ENCODER_* by default); None if readonly and
+    absent or in an older key format (the next vectorize_semantic.py run rebuilds it).
+    """
+    model_id = encoder_id(backend, model_name, onnx_dir)
+    path = store_path(model_id, root)
+    if readonly:
+        if not os.path.exists(os.path.join(path, META_FILE)):
+            return None
+        with open(os.path.join(path, META_FILE)) as f:
+            if json.load(f).get('key_format') != KEY_FORMAT:
+                print(f"⚠️  {path} uses an older key format: not used until vectorize_semantic.py rebuilds it")
+                return None
+    return EmbeddingStore(path, model_id, readonly=readonly)
+
+class EmbeddingStore:
+    """
+    Text embeddings of one encoder, keyed by the hash of its model id and the exact text,
+    only whitespace-collapsed (case is kept: a cased encoder embeds "Jazz" and "jazz"
+    differently). encode() dedupes its input, encodes only the texts the store has never
+    seen, and appends them (unless readonly). Single writer per directory; any number of
+    readonly readers. A writer finding an older key format starts the store over.
+    """
+
+    def __init__(self, path, model_id, dtype=None, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+            if self.meta['model_id'] != model_id:
+                raise ValueError(f"❌ {path} holds embeddings of {self.meta['model_id']}, not {model_id}")
+            if self.meta.get('key_format') != KEY_FORMAT:
+                if readonly:
+                    raise ValueError(f"❌ {path} uses key format {self.meta.get('key_format', 1)}, not {KEY_FORMAT}")
+                print(f"⚠️  {path} uses an older key format: starting it over")
+                for name in (KEYS_FILE, VECTORS_FILE):
+                    if os.path.exists(os.path.join(path, name)):
+                        os.remove(os.path.join(path, name))
+                self._new_meta(model_id, dtype)
+        else:
+            if readonly:
+                raise FileNotFoundError(f"❌ No embedding store at {path}")
+            os.makedirs(path, exist_ok=True)
+            self._new_meta(model_id, dtype)
+        self.dtype = np.dtype(self.meta['dtype'])
+        self._open()
+        self.run = {'texts': 0, 'unique': 0, 'stored': 0, 'encoded': 0, 'encode_seconds': 0.0}
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def model_id(self):
+        return self.meta['model_id']
+
+    def encode(self, texts, encode_fn):
+        """
+        (n, d) float32 embeddings of texts. The normalized text is only the key: encode_fn
+        sees one original text (its first occurrence) per unseen key.
+        """
+        keys = [normalize_text(t) for t in texts]
+        originals = {}
+        for key, text in zip(keys, texts):
+            originals.setdefault(key, str(text or ''))
+        unique = list(originals)
+        digests = [text_digest(self.model_id, key) for key in unique]
+        with self._lock:
+            rows = np.array([self._rows.get(d, -1) for d in digests], dtype='int64')
+            vectors = self._vectors
+        missing = np.flatnonzero(rows < 0)
+
+        encoded = None
+        if len(missing):
+            started = time.perf_counter()
+            encoded = np.asarray(encode_fn([originals[unique[i]] for i in missing]), dtype='float32')
+            elapsed = time.perf_counter() - started
+            self.run['encode_seconds'] += elapsed
+            if not self.readonly:
+                self._append([digests[i] for i in missing], encoded, elapsed)
+
+        self.run['texts'] += len(keys)
+        self.run['unique'] += len(unique)
+        self.run['stored'] += len(unique) - len(missing)
+        self.run['encoded'] += len(missing)
+        if not keys:
+            return np.zeros((0, self.meta['dimension'] or 0), dtype='float32')
+
+        dim = encoded.shape[1] if encoded is not None else vectors.shape[1]
+        matrix = np.empty((len(unique), dim), dtype='float32')
+        found = rows >= 0
+        if found.any():
+            matrix[found] = vectors[rows[found]]
+        if encoded is not None:
+            matrix[missing] = encoded
+        position = {key: i for i, key in enumerate(unique)}
+        return matrix[[position[key] for key in keys]]
+
+    def report(self):
+        """
+        This process's lookups: texts requested, unique texts, served from the store, sent to
+        the encoder, and the encoder time saved (texts not encoded x seconds per encoded text,
+        measured this run, else the store's history).
+        """
+        run = dict(self.run)
+        if run['encoded']:
+            per_text = run['encode_seconds'] / run['encoded']
+        elif self.meta['encoded']:
+            per_text = self.meta['encode_seconds'] / self.meta['encoded']
+        else:
+            per_text = None
+        run['size'] = len(self)
+        run['seconds_per_text'] = per_text
+        run['saved_seconds'] = None if per_text is None else round((run['texts'] - run['encoded']) * per_text, 3)
+        return run
+
+    def summary(self):
+        """ report() as one log line """
+        r = self.report()
+        saved = '' if r['saved_seconds'] is None else f"; encoder time saved ~{r['saved_seconds']:.1f}s"
+        return (f"Embedding store: {r['texts']} texts, {r['unique']} unique, {r['stored']} from the store, "
+                f"{r['encoded']} encoded ({r['encode_seconds']:.1f}s){saved}")
+
+    # --- Storage ---
+
+    def _open(self):
+        dim = self.meta['dimension'] # None until the first append completed
+        sizes = {name: os.path.getsize(os.path.join(self.path, name)) if os.path.exists(os.path.join(self.path, name)) else 0
+                 for name in (KEYS_FILE, VECTORS_FILE)}
+        row_bytes = {KEYS_FILE: DIGEST_SIZE, VECTORS_FILE: (dim or 0) * self.dtype.itemsize}
+        # Keys are appended after their vectors: a row is complete once its key is there
+        n = min(sizes[name] // row_bytes[name] for name in sizes) if dim else 0
+        if not self.readonly:
+            # Drop the tail of an interrupted append, so the next one starts at row n in both files
+            for name, size in sizes.items():
+                if size > n * row_bytes[name]:
+                    with open(os.path.join(self.path, name), 'r+b') as f:
+                        f.truncate(n * row_bytes[name])
+
+        digests = np.fromfile(os.path.join(self.path, KEYS_FILE), dtype=np.uint8, count=n * DIGEST_SIZE) \
+            if n else np.zeros(0, dtype=np.uint8)
+        self._rows = {digest.tobytes(): row for row, digest in enumerate(digests.reshape(n, DIGEST_SIZE))}
+        self._vectors = (np.memmap(os.path.join(self.path, VECTORS_FILE), dtype=self.dtype, mode='r', shape=(n, dim))
+                         if n else np.zeros((0, dim or 0), dtype=self.dtype))
+
+    def _append(self, digests, vectors, elapsed):
+        with self._lock:
+            if self.meta['dimension'] is None:
+                self.meta['dimension'] = int(vectors.shape[1])
+            elif vectors.shape[1] != self.meta['dimension']:
+                raise ValueError(f"❌ Embedding dimension {vectors.shape[1]} != store's {self.meta['dimension']}")
+            new = [i for i, d in enumerate(digests) if d not in self._rows] # Another caller may have added some
+            if new:
+                with open(os.path.join(self.path, VECTORS_FILE), 'ab') as f:
+                    np.ascontiguousarray(vectors[new], dtype=self.dtype).tofile(f)
+                with open(os.path.join(self.path, KEYS_FILE), 'ab') as f:
+                    f.write(b''.join(digests[i] for i in new))
+                for i in new:
+                    self._rows[digests[i]] = len(self._rows)
+                self._vectors = np.memmap(os.path.join(self.path, VECTORS_FILE), dtype=self.dtype, mode='r',
+                                          shape=(len(self._rows), self.meta['dimension']))
+            self.meta['encoded'] += len(digests)
+            self.meta['encode_seconds'] += elapsed
+            self._write_meta()
+
+    def _new_meta(self, model_id, dtype):
+        self.meta = {'model_id': model_id, 'key_format': KEY_FORMAT, 'dimension': None,
+                     'dtype': np.dtype(dtype or config.EMBEDDING_STORE_DTYPE).name,
+                     'encoded': 0, 'encode_seconds': 0.0}
+        self._write_meta()
+
+    def _write_meta(self):
+        tmp_path = os.path.join(self.path, META_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
@@ -0,0 +1,186 @@
+import multiprocessing
+import os
+import time
+import numpy as np
+
+# Ensure we can find the config
+try:
+    from app.tarumbeta_ml.src.utils import config
+    from app.tarumbeta_ml.src.features.text_encoder import load_text_encoder
+    from app.tarumbeta_ml.src.utils.table_io import find_table, read_table
+except ImportError:
+    try:
+        from backend.app.tarumbeta_ml.src.utils import config
+        from backend.app.tarumbeta_ml.src.features.text_encoder import load_text_encoder
+        from backend.app.tarumbeta_ml.src.utils.table_io import find_table, read_table
+    except ImportError:
+        import sys
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+        from src.utils import config
+        from src.features.text_encoder import load_text_encoder
+        from src.utils.table_io import find_table, read_table
+
+# Offline bulk encoding (vectorize_semantic.py): a 1M-bio catalog in one encode() call pads
+# every batch to its longest text and leaves all but one process idle. Here:
+#   1. the texts are split into tasks of similar length (character length, longest first)
+#   2. each task is tokenized, bucketed by token length, and encoded bucket by bucket with
+#      a batch size that keeps batch x padded length near config.ENCODE_TOKEN_BUDGET
+#   3. tasks run on a pool of processes, each pinned to config.ENCODE_THREADS_PER_WORKER
+#      threads, so workers x threads cores scale (nearly) linearly without oversubscription
+
+_worker = {} # The encoder of a pool process (see _init_worker)
+
+def token_lengths(encoder, texts):
+    """ Tokens per text (with [CLS]/[SEP], truncated as the encoder truncates) """
+    tokenizer = getattr(encoder, 'tokenizer', None)
+    if hasattr(tokenizer, 'encode_batch'): # tokenizers.Tokenizer (OnnxTextEncoder)
+        return np.array([len(e.ids) for e in tokenizer.encode_batch(texts)], dtype='int64')
+    if callable(tokenizer): # transformers tokenizer (SentenceTransformer)
+        ids = tokenizer(texts, truncation=True, max_length=getattr(encoder, 'max_seq_length', None))['input_ids']
+        return np.array([len(i) for i in ids], dtype='int64')
+    return np.array([len(t.split()) + 2 for t in texts], dtype='int64') # Word count as a proxy
+
+def length_batches(lengths, token_budget=None, max_batch=None, bucket_width=None):
+    """
+    Index batches, longest bucket first. Lengths are rounded up to bucket_width tokens; a
+    bucket of width w is cut into batches of token_budget // w texts (1 .. max_batch), so a
+    batch pads by less than bucket_width tokens and costs about the same whatever its length.
+    """
+    token_budget = token_budget or config.ENCODE_TOKEN_BUDGET
+    max_batch = max_batch or config.ENCODE_MAX_BATCH
+    bucket_width = bucket_width or config.ENCODE_BUCKET_WIDTH
+    lengths = np.asarray(lengths, dtype='int64')
+    buckets = -(-np.maximum(lengths, 1) // bucket_width)
+    order = np.argsort(-lengths, kind='stable') # Longest first (buckets follow)
+    batches = []
+    for group in np.split(order, np.flatnonzero(np.diff(buckets[order])) + 1):
+        if not len(group):
+            continue
+        size = int(np.clip(token_budget // (buckets[group[0]] * bucket_width), 1, max_batch))
+        batches.extend(group[start:start + size] for start in range(0, len(group), size))
+    return batches
+
+def encode_bucketed(encoder, texts, **batching):
+    """ (n, d) float32 embeddings of texts, encoded in length_batches(); and the token count """
+    lengths = token_lengths(encoder, texts)
+    out = None
+    for batch in length_batches(lengths, **batching):
+        emb = np.asarray(encoder.encode([texts[i] for i in batch], batch_size=len(batch)), dtype='float32')
+        if out is None:
+            out = np.empty((len(texts), emb.shape[1]), dtype='float32')
+        out[batch] = emb
+    if out is None:
+        out = np.zeros((0, 0), dtype='float32')
+    return out, int(lengths.sum())
+
+def _init_worker(loader, loader_args, threads):
+    # Before torch / ONNX Runtime start their thread pools
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+    _worker['encoder'] = loader(*loader_args, threads=threads)
+
+def _encode_task(task):
+    task_id, texts, batching = task
+    emb, tokens = encode_bucketed(_worker['encoder'], texts, **batching)
+    return task_id, emb, tokens
+
+class ParallelEncoder:
+    """
+    encode(texts) for bulk offline encoding, with the text encoder (load_text_encoder's
+    backend / model / onnx_dir) loaded once in each of `workers` processes. Small inputs
+    (< min_parallel texts) are encoded in this process, with all workers x threads threads.
+    Use as a context manager, or close() to stop the pool.
+    """
+
+    def __init__(self, backend=None, model_name=None, onnx_dir=None, workers=None, threads=None,
+                 task_size=None, min_parallel=None, loader=load_text_encoder, **batching):
+        self.threads = threads or config.ENCODE_THREADS_PER_WORKER
+        self.workers = workers or config.ENCODE_WORKERS or max(1, (os.cpu_count() or 1) // self.threads)
+        self.task_size = task_size or config.ENCODE_TASK_SIZE
+        self.min_parallel = config.ENCODE_MIN_PARALLEL if min_parallel is None else min_parallel
+        self.batching = batching # token_budget / max_batch / bucket_width for length_batches()
+        self._loader = loader # Module-level (picklable): the pool processes call it
+        self._loader_args = (backend, model_name, onnx_dir)
+        self._encoder = None
+        self._pool = None
+        self.totals = {'texts': 0, 'tokens': 0, 'seconds': 0.0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def encode(self, texts, **kwargs):
+        texts = [str(t) for t in texts]
+        started = time.perf_counter()
+        if self.workers > 1 and len(texts) >= self.min_parallel:
+            emb, tokens = self._encode_parallel(texts)
+        else:
+            if self._encoder is None:
+                self._encoder = self._loader(*self._loader_args, threads=self.workers * self.threads)
+            emb, tokens = encode_bucketed(self._encoder, texts, **self.batching)
+        self.totals['texts'] += len(texts)
+        self.totals['tokens'] += tokens
+        self.totals['seconds'] += time.perf_counter() - started
+        return emb
+
+    def _encode_parallel(self, texts):
+        if self._pool is None:
+            context = multiprocessing.get_context(config.ENCODE_START_METHOD)
+            self._pool = context.Pool(self.workers, initializer=_init_worker,
+                                      initargs=(self._loader, self._loader_args, self.threads))
+        # Tasks of similar length, longest first: the slow tasks start early, the short ones fill the tail
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+        tasks = [order[start:start + self.task_size] for start in range(0, len(texts), self.task_size)]
+        out = None
+        tokens = 0
+        work = ((i, [texts[j] for j in rows], self.batching) for i, rows in enumerate(tasks))
+        for task_id, emb, task_tokens in self._pool.imap_unordered(_encode_task, work):
+            if out is None:
+                out = np.empty((len(texts), emb.shape[1]), dtype='float32')
+            out[tasks[task_id]] = emb
+            tokens += task_tokens
+        return out, tokens
+
+    def report(self):
+        """ Texts / tokens encoded so far, and the throughput """
+        seconds = self.totals['seconds']
+        return dict(self.totals, workers=self.workers, threads=self.threads,
+                    sentences_per_second=self.totals['texts'] / seconds if seconds else None,
+                    tokens_per_second=self.totals['tokens'] / seconds if seconds else None)
+
+    def summary(self):
+        """ report() as one log line """
+        r = self.report()
+        rate = f"{r['sentences_per_second']:,.0f} sentences/s" if r['sentences_per_second'] else "no texts"
+        return (f"Encoded {r['texts']:,} texts ({r['tokens']:,} tokens) in {r['seconds']:.1f}s: {rate} "
+                f"on {r['workers']} workers x {r['threads']} threads")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Throughput of the parallel encoder for 1..N workers")
+    parser.add_argument('--texts', type=int, default=100_000, help="bios to encode (learner bios, repeated)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--threads', type=int, default=config.ENCODE_THREADS_PER_WORKER)
+    parser.add_argument('--backend', default=config.TEXT_ENCODER_BACKEND)
+    args = parser.parse_args()
+
+    bios = read_table(find_table('learners_processed'), columns=['bio_keywords'])['bio_keywords'].astype(str)
+    texts = np.resize(bios.to_numpy(dtype=object), args.texts).tolist()
+    baseline = None
+    for workers in args.workers:
+        with ParallelEncoder(args.backend, workers=workers, threads=args.threads, min_parallel=0) as encoder:
+            encoder.encode(texts[:workers * 64]) # Start the pool and warm every worker up
+            encoder.totals = {'texts': 0, 'tokens': 0, 'seconds': 0.0}
+            encoder.encode(texts)
+            rate = encoder.report()['sentences_per_second']
+        baseline = baseline or rate / workers
+        print(f"⚡ {encoder.summary()} (x{rate / baseline:.2f}, {rate / baseline / workers:.0%} of linear)")
@@ -0,0 +1,156 @@
+import numpy as np
+import os
+import sys
+
+# Ensure we can find the config
+try:
+    from app.tarumbeta_ml.src.utils import config
+except ImportError:
+    try:
+        from backend.app.tarumbeta_ml.src.utils import config
+    except ImportError:
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+        from src.utils import config
+
+CAT_COLS = ['location', 'instrument_type', 'teaching_language', 'skill_level']
+NUM_COLS = ['hourly_rate', 'rating']
+BLOCKS = ('categorical', 'numerical', 'text') # Vector layout, in order
+
+class CompiledQueryVectorizer:
+    """
+    NumPy-only replica of the V3 query pipeline (OneHotEncoder -> MinMaxScaler -> normalize).
+    The fitted encoder/scaler are "compiled" once into lookup tables, so a query is
+    built with plain array indexing instead of a DataFrame + three sklearn calls.
+    """
+
+    def __init__(self, encoder, scaler, weights=None):
+        # 1. Categorical: value -> column offset inside the one-hot block
+        fitted_cols = list(getattr(encoder, 'feature_names_in_', CAT_COLS))
+        if fitted_cols != CAT_COLS:
+            raise ValueError(f"Encoder was fitted on {fitted_cols}, expected {CAT_COLS}")
+        if getattr(encoder, 'drop_idx_', None) is not None:
+            raise ValueError("Encoders fitted with drop= are not supported")
+
+        # 2. Numerical: MinMaxScaler is X * scale_ + min_
+        self._compile(encoder.categories_, scaler.scale_, scaler.min_, getattr(scaler, 'clip', False), weights)
+
+    @classmethod
+    def from_dict(cls, params, weights=None):
+        """ Rebuilds a vectorizer from to_dict() output (no sklearn objects, no pickle). """
+        vectorizer = cls.__new__(cls)
+        vectorizer._compile(params['categories'], params['num_scale'], params['num_min'],
+                            params['num_clip'], weights)
+        return vectorizer
+
+    def to_dict(self):
+        """ JSON-serializable parameters: the fitted categories and the scaler's affine map """
+        categories = [sorted(lookup, key=lookup.get) for lookup in self.cat_lookup]
+        return {
+            'cat_cols': CAT_COLS,
+            'categories': [[_plain(v) for v in values] for values in categories],
+            'num_cols': NUM_COLS,
+            'num_scale': self.num_scale.tolist(),
+            'num_min': self.num_min.tolist(),
+            'num_clip': bool(self.num_clip)
+        }
+
+    def _compile(self, categories, num_scale, num_min, num_clip, weights):
+        # Block weights default to config; a bundle passes the weights its index was built with
+        weights = weights or {'categorical': config.WEIGHT_CAT, 'numerical': config.WEIGHT_NUM,
+                              'text': config.WEIGHT_TXT}
+        self.weights = {block: float(weights[block]) for block in BLOCKS}
+        self.weight_cat = self.weights['categorical']
+        self.weight_num = self.weights['numerical']
+        self.weight_txt = self.weights['text']
+
+        self.cat_lookup = []
+        offset = 0
+        for values in categories:
+            self.cat_lookup.append({value: offset + j for j, value in enumerate(values)})
+            offset += len(values)
+        self.cat_dim = offset
+        self.field_sizes = [len(values) for values in categories]
+
+        self.num_scale = np.asarray(num_scale, dtype='float64')
+        self.num_min = np.asarray(num_min, dtype='float64')
+        self.num_clip = num_clip
+        self.num_dim = len(self.num_scale)
+
+        # Learner queries carry dummy 0 rate/rating, so their numeric block is a constant
+        self.default_num_block = self.num_block(np.zeros((1, self.num_dim)), weight=1.0)[0]
+
+    def cat_block(self, profiles, weight=None):
+        """ Weighted (default: weight_cat), row-normalized one-hot block for a list of profile dicts. """
+        weight = self.weight_cat if weight is None else weight
+        rows, cols = [], []
+        for i, profile in enumerate(profiles):
+            for lookup, col in zip(self.cat_lookup, CAT_COLS):
+                j = lookup.get(profile.get(col))
+                if j is not None: # Unknown values encode to all-zeros (handle_unknown='ignore')
+                    rows.append(i)
+                    cols.append(j)
+
+        block = np.zeros((len(profiles), self.cat_dim), dtype='float64')
+        if rows:
+            rows = np.asarray(rows)
+            # Each active bit of an L2-normalized one-hot row is 1/sqrt(n_active)
+            n_active = np.bincount(rows, minlength=len(profiles))
+            block[rows, cols] = weight / np.sqrt(n_active[rows])
+        return block
+
+    def num_block(self, values, weight=None):
+        """ Weighted (default: weight_num), row-normalized numeric block for an (n, 2) array of rate/rating. """
+        weight = self.weight_num if weight is None else weight
+        scaled = np.asarray(values, dtype='float64') * self.num_scale + self.num_min
+        if self.num_clip:
+            scaled = np.clip(scaled, 0.0, 1.0)
+        return _l2_rows(scaled) * weight
+
+    def text_block(self, text_embeddings, weight=None):
+        """ Weighted (default: weight_txt), row-normalized text block from raw encoder output. """
+        weight = self.weight_txt if weight is None else weight
+        return _l2_rows(np.asarray(text_embeddings, dtype='float32')) * weight
+
+    def blocks(self, profiles, text_embeddings, num_values=None):
+        """
+        The three row-normalized blocks before weighting, {block: (n, block dim)}. Each row of
+        a block is unit length or all zeros; compose_blocks() applies the weights.
+        """
+        if num_values is None:
+            num = np.broadcast_to(self.default_num_block, (len(profiles), self.num_dim))
+        else:
+            num = self.num_block(num_values, weight=1.0)
+        return {
+            'categorical': self.cat_block(profiles, weight=1.0),
+            'numerical': num,
+            'text': self.text_block(text_embeddings, weight=1.0)
+        }
+
+    def transform(self, profiles, text_embeddings, num_values=None):
+        """ Builds the final L2-normalized float32 query matrix (n, cat + num + text). """
+        return compose_blocks(self.blocks(profiles, text_embeddings, num_values), self.weights)
+
+def compose_blocks(blocks, weights):
+    """
+    Weighted, L2-normalized float32 vectors from unweighted blocks: the layout the FAISS
+    index stores. With unit blocks u_b this is concat(w_b * u_b) / sqrt(sum of w_b^2 over
+    the non-zero blocks), so any weighting can be recomposed without re-encoding.
+    """
+    stacked = np.hstack([np.asarray(blocks[block]) * weights[block] for block in BLOCKS]).astype('float32')
+    return _l2_rows(stacked)
+
+def split_blocks(vectors, cat_dim, num_dim):
+    """ Inverse of compose_blocks (up to float rounding): each block re-normalized to unit length """
+    vectors = np.asarray(vectors, dtype='float32')
+    bounds = [0, cat_dim, cat_dim + num_dim, vectors.shape[1]]
+    return {block: _l2_rows(vectors[:, bounds[i]:bounds[i + 1]]) for i, block in enumerate(BLOCKS)}
+
+def _plain(value):
+    """ NumPy scalar -> Python scalar, for JSON """
+    return value.item() if hasattr(value, 'item') else value
+
+def _l2_rows(matrix):
+    """ Row-wise L2 normalization; all-zero rows stay zero (same as sklearn's normalize). """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+# Ensure we can find the config
+try:
+    from app.tarumbeta_ml.src.utils import config
+except ImportError:
+    try:
+        from backend.app.tarumbeta_ml.src.utils import config
+    except ImportError:
+        import sys
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+        from src.utils import config
+
+# Text encoder backends (config.TEXT_ENCODER_BACKEND). Every backend exposes the subset of
+# the SentenceTransformer API the pipeline uses: encode(texts, batch_size) -> float32 array.
+#   'torch'     : sentence-transformers on PyTorch (reference)
+#   'onnx'      : the same MiniLM graph exported to ONNX, fp32
+#   'onnx_int8' : dynamically int8-quantized ONNX, the fastest on CPU
+# The ONNX files come from src/model/export_onnx_encoder.py.
+
+ONNX_MODEL_FILES = {'onnx': 'model.onnx', 'onnx_int8': 'model_int8.onnx'}
+ENCODER_CONFIG = 'encoder_config.json'
+
+def load_text_encoder(backend=None, model_name=None, onnx_dir=None, threads=None):
+    """ threads: intra-op threads (torch / ONNX Runtime); None keeps the library default (all cores) """
+    backend = backend or config.TEXT_ENCODER_BACKEND
+    if backend == 'torch':
+        from sentence_transformers import SentenceTransformer # Pulling in torch is itself slow
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name or config.TEXT_ENCODER_MODEL)
+    if backend in ONNX_MODEL_FILES:
+        return OnnxTextEncoder(onnx_dir or config.ONNX_ENCODER_DIR, ONNX_MODEL_FILES[backend],
+                               intra_op_threads=threads)
+    raise ValueError(f"Unknown text encoder backend '{backend}'. "
+                     f"Expected 'torch' or one of {sorted(ONNX_MODEL_FILES)}")
+
+def encoder_id(backend=None, model_name=None, onnx_dir=None):
+    """
+    Identifies whose embeddings these are (EmbeddingStore keys on it): backend + model,
+    plus a digest of the graph for ONNX, whose int8 / re-exported files embed differently.
+    """
+    backend = backend or config.TEXT_ENCODER_BACKEND
+    model_id = f"{backend}:{model_name or config.TEXT_ENCODER_MODEL}"
+    if backend in ONNX_MODEL_FILES:
+        digest = hashlib.sha256()
+        with open(os.path.join(onnx_dir or config.ONNX_ENCODER_DIR, ONNX_MODEL_FILES[backend]), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        model_id += f":{digest.hexdigest()[:16]}"
+    return model_id
+
+def lowercases_input(encoder):
+    """
+    Whether the encoder's tokenizer lower-cases its input (all-MiniLM-L6-v2's does): then
+    case never changes an embedding and caches may key on lower-cased text. False if unknown.
+    """
+    if isinstance(encoder, OnnxTextEncoder):
+        return _lowercasing_normalizer(json.loads(encoder.tokenizer.to_str()).get('normalizer'))
+    tokenizer = getattr(encoder, 'tokenizer', None) # SentenceTransformer: the Hugging Face tokenizer
+    return getattr(tokenizer, 'do_lower_case', False) is True
+
+def _lowercasing_normalizer(normalizer):
+    """ tokenizer.json normalizer: BertNormalizer(lowercase=True), Lowercase, or a Sequence holding one """
+    if not normalizer:
+        return False
+    if normalizer.get('type') == 'Lowercase' or normalizer.get('lowercase') is True:
+        return True
+    return any(_lowercasing_normalizer(n) for n in normalizer.get('normalizers') or [])
+
+class OnnxTextEncoder:
+    """
+    MiniLM on ONNX Runtime with the sentence-transformers post-processing replicated exactly:
+    attention-masked mean pooling over the token embeddings, then L2 normalization
+    (x / max(||x||, 1e-12), as torch.nn.functional.normalize). Only the `tokenizers` and
+    `onnxruntime` packages are imported, not torch or transformers.
+    """
+
+    def __init__(self, model_dir, model_file='model_int8.onnx', intra_op_threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, ENCODER_CONFIG)) as f:
+            self.settings = json.load(f)
+        self.max_seq_length = self.settings['max_seq_length']
+        self.normalize = self.settings.get('normalize', True)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(self.max_seq_length)
+        self.tokenizer.no_padding() # Padded per batch below, to the batch's longest text
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(os.path.join(model_dir, model_file), options,
+                                            providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self):
+        return self.settings['dimension']
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        if len(texts) == 0:
+            return np.zeros((0, self.settings['dimension']), dtype='float32')
+
+        encodings = self.tokenizer.encode_batch([str(t) for t in texts])
+        # Longest first (as sentence-transformers does), so each batch pads to similar lengths
+        order = np.argsort([-len(e.ids) for e in encodings], kind='stable')
+        out = np.empty((len(texts), self.settings['dimension']), dtype='float32')
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            out[rows] = self._encode_batch([encodings[i] for i in rows])
+        return out[0] if single else out
+
+    def _encode_batch(self, encodings):
+        width = max(len(e.ids) for e in encodings)
+        input_ids = np.zeros((len(encodings), width), dtype='int64')
+        attention_mask = np.zeros((len(encodings), width), dtype='int64')
+        token_type_ids = np.zeros((len(encodings), width), dtype='int64')
+        for i, e in enumerate(encodings):
+            input_ids[i, :len(e.ids)] = e.ids
+            attention_mask[i, :len(e.ids)] = e.attention_mask
+            token_type_ids[i, :len(e.ids)] = e.type_ids
+
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask, 'token_type_ids': token_type_ids}
+        token_embeddings = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+        return mean_pool(token_embeddings, attention_mask, self.normalize)
+
+def mean_pool(token_embeddings, attention_mask, normalize=True):
+    """ sentence-transformers Pooling(mean) [+ Normalize], in float32 """
+    mask = attention_mask[..., None].astype('float32')
+    summed = (token_embeddings * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    pooled = summed / counts
+    if normalize:
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        pooled = pooled / np.maximum(norms, 1e-12)
+    return pooled.astype('float32')
@@ -4,50 +4,54 @@ import pickle
 import os
 import sys
 from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, normalize
-from sentence_transformers import SentenceTransformer
 
 # Setup path
 sys.path.append('/content/tarumbeta-ml')
 from src.utils import config
+from src.features.parallel_encoder import ParallelEncoder
+from src.features.embedding_store import open_store
+from src.utils.table_io import find_table, read_table
+
+# Align Columns (Drop 'years_experience' if it exists in learners but not instructors)
+COMMON_COLS = ['location', 'instrument_type', 'teaching_language', 'skill_level',
+               'hourly_rate', 'rating', 'bio_keywords', 'is_instructor']
 
 def run_vectorization():
-    print("🧠 Starting Vectorization (Applying Brute Force Weights)...")
+    print("🧠 Starting Vectorization (Block-Separated; weights are applied in Step 6)...")
     
     # 1. Load Data
-    inst_path = os.path.join(config.DATA_PROCESSED, 'instructors_processed.csv')
-    learn_path = os.path.join(config.DATA_PROCESSED, 'learners_processed.csv')
+    # Parquet from the ETL (CSV for older runs); only the columns vectorization reads
+    inst_path = find_table('instructors_processed')
+    learn_path = find_table('learners_processed')
     
-    df_inst = pd.read_csv(inst_path)
-    df_learn = pd.read_csv(learn_path)
+    df_inst = read_table(inst_path, columns=COMMON_COLS[:-1])
+    df_learn = read_table(learn_path, columns=COMMON_COLS[:-1])
     
     # Add flags to track them after merging
     df_inst['is_instructor'] = 1
     df_learn['is_instructor'] = 0
     
-    # Align Columns (Drop 'years_experience' if it exists in learners but not instructors)
-    common_cols = ['location', 'instrument_type', 'teaching_language', 'skill_level', 
-                   'hourly_rate', 'rating', 'bio_keywords', 'is_instructor']
-    
-    combined = pd.concat([df_inst[common_cols], df_learn[common_cols]], axis=0, ignore_index=True)
+    combined = pd.concat([df_inst[COMMON_COLS], df_learn[COMMON_COLS]], axis=0, ignore_index=True)
     
     # 2. Initialize Processors
     encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
     scaler = MinMaxScaler()
-    bert = SentenceTransformer('all-MiniLM-L6-v2')
+    bert = ParallelEncoder() # Same backend as serving (config.TEXT_ENCODER_BACKEND), one per worker process
+    store = open_store() # Embeddings of that encoder from earlier runs
     
     # 3. Process Block A: CATEGORICAL (The Hard Constraints)
-    # Weight: 0.80
+    # Weight: 0.80 (at index build / query time)
     print(f"   🔹 Processing Categorical Block (Weight: {config.WEIGHT_CAT})...")
     cat_cols = ['location', 'instrument_type', 'teaching_language', 'skill_level']
     
-    # Fit on ALL data (so we know all cities/instruments)
-    cat_matrix = encoder.fit_transform(combined[cat_cols])
+    # Fit on ALL data (so we know all cities/instruments); Parquet categoricals as plain values
+    cat_matrix = encoder.fit_transform(combined[cat_cols].astype(object))
     
-    # Normalize Row-wise -> Multiply by Weight
-    cat_matrix = normalize(cat_matrix, axis=1, norm='l2') * config.WEIGHT_CAT
+    # Normalize Row-wise (unweighted: the weight is applied by compose_blocks)
+    cat_matrix = normalize(cat_matrix, axis=1, norm='l2')
     
     # 4. Process Block B: NUMERICAL (The Tie-Breakers)
-    # Weight: 0.10
+    # Weight: 0.10 (at index build / query time)
     print(f"   🔹 Processing Numerical Block (Weight: {config.WEIGHT_NUM})...")
     num_cols = ['hourly_rate', 'rating']
     
@@ -55,24 +59,30 @@ def run_vectorization():
     scaler.fit(df_inst[num_cols])
     num_matrix = scaler.transform(combined[num_cols])
     
-    # Normalize Row-wise -> Multiply by Weight
-    num_matrix = normalize(num_matrix, axis=1, norm='l2') * config.WEIGHT_NUM
+    # Normalize Row-wise (unweighted)
+    num_matrix = normalize(num_matrix, axis=1, norm='l2')
     
     # 5. Process Block C: TEXT (The Semantic Flavor)
-    # Weight: 0.10
+    # Weight: 0.10 (at index build / query time)
     print(f"   🔹 Processing Text Block (Weight: {config.WEIGHT_TXT})...")
-    # This takes a few seconds
-    text_matrix = bert.encode(combined['bio_keywords'].tolist())
-    
-    # Normalize Row-wise -> Multiply by Weight
-    text_matrix = normalize(text_matrix, axis=1, norm='l2') * config.WEIGHT_TXT
-    
-    # 6. Stack & Split
-    print("   🔗 Stacking Vectors...")
-    final_vectors = np.hstack([cat_matrix, num_matrix, text_matrix]).astype('float32')
-    
-    # Extract just the Instructors to save as the "Database"
-    inst_vectors = final_vectors[combined['is_instructor'] == 1]
+    # Only bios the store hasn't seen are encoded (each unique one once)
+    with bert:
+        text_matrix = store.encode(combined['bio_keywords'].tolist(), bert.encode)
+    print(f"   ⏱️  {store.summary()}")
+    print(f"   ⚡ {bert.summary()}")
+    
+    # Normalize Row-wise (unweighted)
+    text_matrix = normalize(text_matrix, axis=1, norm='l2')
+    
+    # 6. Split
+    # The blocks are saved separately and unweighted: changing WEIGHT_* only needs Step 6
+    # (train_semantic.py) to recompose the index, and queries can re-weight on the fly
+    is_instructor = (combined['is_instructor'] == 1).to_numpy()
+    inst_blocks = {
+        'categorical': cat_matrix[is_instructor].astype('float32'),
+        'numerical': num_matrix[is_instructor].astype('float32'),
+        'text': text_matrix[is_instructor].astype('float32')
+    }
     
     # 7. Save Artifacts
     # We save EVERYTHING needed to replicate this for a new user query
@@ -84,10 +94,13 @@ def run_vectorization():
     with open(os.path.join(config.SEMANTIC_MODELS, 'scaler.pkl'), 'wb') as f:
         pickle.dump(scaler, f)
         
-    with open(os.path.join(config.SEMANTIC_MODELS, 'instructors_vec.pkl'), 'wb') as f:
-        pickle.dump(inst_vectors, f)
+    # One .npy per block: Step 6 memory-maps them instead of inflating an .npz
+    blocks_dir = os.path.join(config.SEMANTIC_MODELS, 'instructors_blocks')
+    os.makedirs(blocks_dir, exist_ok=True)
+    for block, matrix in inst_blocks.items():
+        np.save(os.path.join(blocks_dir, f"{block}.npy"), matrix)
         
-    print(f"✅ Vectorization Complete. Saved {len(inst_vectors)} vectors to {config.SEMANTIC_MODELS}")
+    print(f"✅ Vectorization Complete. Saved {is_instructor.sum()} instructors' blocks to {blocks_dir}")
 
 if __name__ == "__main__":
     run_vectorization()
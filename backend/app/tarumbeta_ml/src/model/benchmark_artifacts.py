@@ -0,0 +1,120 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Setup path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.utils.column_store import load_columns, write_columns
+from src.utils.table_io import find_table, read_table, write_table
+from src.api.instructor_table import InstructorTable
+
+# Worker startup cost of each artifact format: every format is loaded in a fresh process
+# (what a gunicorn worker pays) and timed to its columns / blocks being read, and to ready
+# (instructors: an InstructorTable). Memory: the peak RSS growth, and the private (anonymous)
+# memory still held once ready. Memory-mapped pages are page cache, shared by every worker.
+
+def _load_instructors(fmt, path):
+    started = time.perf_counter()
+    if fmt == 'column store (mmap)':
+        columns = load_columns(path, mmap=True)
+    else:
+        df = read_table(path)
+        columns = {col: df[col].to_numpy() for col in df.columns}
+        del df
+    read_seconds = time.perf_counter() - started
+    return InstructorTable(columns), read_seconds
+
+def _load_blocks(fmt, path):
+    started = time.perf_counter()
+    if fmt == '.npz':
+        with np.load(path) as npz:
+            blocks = {name: npz[name] for name in npz.files}
+    else:
+        blocks = {name[:-4]: np.load(os.path.join(path, name), mmap_mode='r') for name in os.listdir(path)}
+    read_seconds = time.perf_counter() - started
+    for matrix in blocks.values(): # A scoring pass touches every page
+        matrix.sum()
+    return blocks, read_seconds
+
+def _memory_mib():
+    """ (peak RSS, private RSS) of this process in MiB, from /proc (ru_maxrss survives exec) """
+    fields = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmHWM', 'RssAnon'):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields['VmHWM'], fields['RssAnon']
+
+def _measure(loader, fmt, path, results):
+    import pyarrow.parquet # noqa: F401 (imported up front: library import is not load cost)
+    peak_before, private_before = _memory_mib()
+    started = time.perf_counter()
+    loaded, read_seconds = loader(fmt, path)
+    ready_seconds = time.perf_counter() - started
+    peak_after, private_after = _memory_mib()
+    results.put((read_seconds, ready_seconds, peak_after - peak_before, private_after - private_before))
+    del loaded
+
+def measure(loader, fmt, path):
+    """ (read s, ready s, peak RSS growth MiB, private MiB held) of loader(fmt, path) in a fresh process """
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_measure, args=(loader, fmt, path, results))
+    process.start()
+    outcome = results.get()
+    process.join()
+    return outcome
+
+def build_artifacts(out_dir, scale):
+    """ The processed instructors (repeated scale times) and blocks of that size, in every format """
+    df = read_table(find_table('instructors_processed'))
+    if scale > 1:
+        df = df.iloc[np.tile(np.arange(len(df)), scale)].reset_index(drop=True)
+    paths = {
+        'csv': os.path.join(out_dir, 'instructors.csv'),
+        'parquet': os.path.join(out_dir, 'instructors.parquet'),
+        'column store (mmap)': os.path.join(out_dir, 'instructors_columns'),
+    }
+    write_table(df, paths['csv'])
+    write_table(df, paths['parquet'])
+    write_columns(df, paths['column store (mmap)'])
+
+    rng = np.random.default_rng(0)
+    dims = {'categorical': 20, 'numerical': 2, 'text': 384}
+    blocks = {name: rng.standard_normal((len(df), d), dtype='float32') for name, d in dims.items()}
+    block_paths = {'.npz': os.path.join(out_dir, 'blocks.npz'), '.npy (mmap)': os.path.join(out_dir, 'blocks')}
+    np.savez(block_paths['.npz'], **blocks)
+    os.makedirs(block_paths['.npy (mmap)'])
+    for name, matrix in blocks.items():
+        np.save(os.path.join(block_paths['.npy (mmap)'], f"{name}.npy"), matrix)
+    return len(df), paths, block_paths
+
+def run_benchmark(scale=1):
+    with tempfile.TemporaryDirectory() as out_dir:
+        n_rows, paths, block_paths = build_artifacts(out_dir, scale)
+        print(f"🧪 Artifact load benchmark: {n_rows:,} instructors (x{scale}), one fresh process per load")
+        print("-" * 92)
+        print(f"{'artifact':<34}{'size MiB':>10}{'read s':>9}{'ready s':>9}{'peak RSS MiB':>15}{'private MiB':>15}")
+        for loader, label, formats in ((_load_instructors, 'instructors', paths),
+                                       (_load_blocks, 'blocks', block_paths)):
+            for fmt, path in formats.items():
+                read_s, ready_s, peak, private = measure(loader, fmt, path)
+                print(f"{label + ' ' + fmt:<34}{_size(path) / 2**20:>10.1f}{read_s:>9.3f}{ready_s:>9.3f}"
+                      f"{peak:>15.1f}{private:>15.1f}")
+        print("-" * 92)
+
+def _size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startup time / memory of the CSV, Parquet and .npy artifacts")
+    parser.add_argument('--scale', type=int, default=1, help="repeat the processed instructors this many times")
+    args = parser.parse_args()
+    run_benchmark(args.scale)
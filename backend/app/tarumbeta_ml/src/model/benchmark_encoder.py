@@ -0,0 +1,72 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Setup path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.utils import config
+from src.features.text_encoder import ONNX_MODEL_FILES, load_text_encoder
+from src.utils.table_io import find_table, read_table
+
+def run_benchmark(model_name=config.TEXT_ENCODER_MODEL, onnx_dir=config.ONNX_ENCODER_DIR,
+                  n_single=200, batch_size=32, top_k=5):
+    """
+    Parity and latency of the ONNX backends against the torch encoder on the learner bios.
+    Parity: cosine to the torch embedding, and agreement of each learner's top-k instructors
+    by text similarity alone (stricter than the full V3 score, where text weighs 10%).
+    """
+    learners = read_table(find_table('learners_processed'), columns=['bio_keywords'])
+    instructors = read_table(find_table('instructors_processed'), columns=['bio_keywords'])
+    texts = learners['bio_keywords'].fillna('').astype(str).tolist()
+    inst_texts = instructors['bio_keywords'].fillna('').astype(str).tolist()
+
+    print(f"🧪 Text encoder benchmark: {len(texts)} learner bios, {len(inst_texts)} instructor bios")
+    print("-" * 96)
+    print(f"{'backend':<11}{'load s':>8}{'sent/s':>10}{'single p50':>12}{'single p99':>12}"
+          f"{'min cos':>10}{'mean cos':>10}{f'top-{top_k} agree':>14}")
+
+    reference = reference_top = None
+    for backend in ['torch'] + list(ONNX_MODEL_FILES):
+        started = time.perf_counter()
+        encoder = load_text_encoder(backend, model_name=model_name, onnx_dir=onnx_dir)
+        load_s = time.perf_counter() - started
+        encoder.encode(['warm up'])
+
+        started = time.perf_counter()
+        emb = np.asarray(encoder.encode(texts, batch_size=batch_size), dtype='float32')
+        throughput = len(texts) / (time.perf_counter() - started)
+
+        single = []
+        for text in texts[:n_single]:
+            started = time.perf_counter()
+            encoder.encode([text])
+            single.append((time.perf_counter() - started) * 1000)
+
+        emb = _l2(emb)
+        top = _text_top_k(emb, _l2(np.asarray(encoder.encode(inst_texts, batch_size=batch_size))), top_k)
+        if reference is None:
+            reference, reference_top = emb, top
+        cos = np.sum(emb * reference, axis=1)
+        agree = np.mean([len(set(a) & set(b)) / top_k for a, b in zip(top, reference_top)])
+
+        print(f"{backend:<11}{load_s:>8.2f}{throughput:>10.0f}{np.percentile(single, 50):>10.2f}ms"
+              f"{np.percentile(single, 99):>10.2f}ms{cos.min():>10.5f}{cos.mean():>10.5f}{agree:>14.2%}")
+    print("-" * 96)
+
+def _l2(matrix):
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+def _text_top_k(queries, instructors, k):
+    scores = queries @ instructors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return top.tolist()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity / latency benchmark: torch vs ONNX text encoders")
+    parser.add_argument('--model', default=config.TEXT_ENCODER_MODEL)
+    parser.add_argument('--onnx-dir', default=config.ONNX_ENCODER_DIR)
+    parser.add_argument('--single', type=int, default=200, help="texts for the one-at-a-time latency")
+    args = parser.parse_args()
+    run_benchmark(args.model, args.onnx_dir, n_single=args.single)
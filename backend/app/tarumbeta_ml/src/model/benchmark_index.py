@@ -0,0 +1,126 @@
+import argparse
+import os
+import pickle
+import sys
+import time
+import numpy as np
+import faiss
+
+# Setup path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.utils import config
+from src.model.index_spec import build_index, factory_string
+from src.features.query_vectorizer import CAT_COLS, CompiledQueryVectorizer
+from src.features.text_encoder import load_text_encoder
+from src.features.embedding_store import open_store
+from src.utils.table_io import find_table, read_table
+
+# Instructors are synthetic (any N), laid out like the trained encoder / scaler's vectors;
+# queries are real learners, vectorized as serving vectorizes them
+
+BENCH_SPECS = [
+    {'type': 'ivf_flat', 'nlist': 'auto', 'nprobe': 8},
+    {'type': 'ivf_flat', 'nlist': 'auto', 'nprobe': 32},
+    {'type': 'hnsw', 'M': 32, 'ef_construction': 80, 'ef_search': 64},
+    {'type': 'hnsw', 'M': 32, 'ef_construction': 80, 'ef_search': 128},
+    {'type': 'ivf_sq8', 'nlist': 'auto', 'nprobe': 16},
+]
+
+def load_vectorizer():
+    """ The serving query vectorizer, compiled from Step 5's encoder.pkl / scaler.pkl """
+    with open(os.path.join(config.SEMANTIC_MODELS, 'encoder.pkl'), 'rb') as f:
+        encoder = pickle.load(f)
+    with open(os.path.join(config.SEMANTIC_MODELS, 'scaler.pkl'), 'rb') as f:
+        scaler = pickle.load(f)
+    return CompiledQueryVectorizer(encoder, scaler)
+
+def learner_queries(vectorizer, n, rng):
+    """
+    Query vectors of n learners sampled from learners_processed, built like a live request:
+    CompiledQueryVectorizer with 0 rate / rating, bios through the configured text encoder
+    (the ones the pipeline already embedded come from the embedding store).
+    """
+    learners = read_table(find_table('learners_processed'), columns=CAT_COLS + ['bio_keywords'])
+    rows = learners.iloc[rng.choice(len(learners), n, replace=len(learners) < n)]
+    bios = rows['bio_keywords'].astype(str).tolist()
+    bert = load_text_encoder()
+    store = open_store(readonly=True)
+    text = store.encode(bios, bert.encode) if store is not None else bert.encode(bios)
+    return vectorizer.transform(rows[CAT_COLS].astype(object).to_dict('records'), text)
+
+def synthetic_vectors(n, rng, vectorizer, text_dim):
+    """ Instructor vectors with the block layout and weights of vectorizer (vectorize_semantic.py) """
+    cat = np.zeros((n, vectorizer.cat_dim), dtype='float32')
+    offset = 0
+    for size in vectorizer.field_sizes:
+        cat[np.arange(n), offset + rng.integers(0, size, n)] = 1.0
+        offset += size
+    cat *= vectorizer.weight_cat / np.sqrt(len(vectorizer.field_sizes))
+
+    num = rng.random((n, vectorizer.num_dim), dtype='float32') # Scaled rate / rating
+    num *= vectorizer.weight_num / np.linalg.norm(num, axis=1, keepdims=True)
+
+    txt = rng.standard_normal((n, text_dim), dtype='float32')
+    txt *= vectorizer.weight_txt / np.linalg.norm(txt, axis=1, keepdims=True)
+
+    vecs = np.hstack([cat, num, txt])
+    faiss.normalize_L2(vecs)
+    return vecs
+
+def recall_at(approx, exact, k):
+    hits = [len(set(a[:k]) & set(e[:k])) for a, e in zip(approx, exact)]
+    return np.mean(hits) / k
+
+def query_latencies_ms(index, queries, k):
+    """ One query per call, like a live /find-instructors request """
+    latencies = []
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def run_benchmark(sizes=(10_000, 100_000, 1_000_000), n_queries=500, specs=BENCH_SPECS):
+    print("📏 Benchmarking approximate FAISS indexes against IndexFlatIP...")
+    rng = np.random.default_rng(config.RANDOM_SEED)
+    k_max = 12
+    vectorizer = load_vectorizer()
+    queries = learner_queries(vectorizer, n_queries, rng)
+    text_dim = queries.shape[1] - vectorizer.cat_dim - vectorizer.num_dim
+
+    for n in sizes:
+        vectors = synthetic_vectors(n, rng, vectorizer, text_dim)
+
+        flat = build_index(vectors, {'type': 'flat'})
+        _, exact = flat.search(queries, k_max)
+        flat_lat = query_latencies_ms(flat, queries, k_max)
+
+        print("-" * 88)
+        print(f"N = {n:,} instructors, {n_queries} queries")
+        print(f"{'index':<22}{'build s':>9}{'recall@5':>10}{'recall@12':>11}{'p50 ms':>9}{'p99 ms':>9}  params")
+        print(f"{'Flat':<22}{'-':>9}{1.0:>10.3f}{1.0:>11.3f}"
+              f"{np.percentile(flat_lat, 50):>9.3f}{np.percentile(flat_lat, 99):>9.3f}")
+        del flat
+
+        for spec in specs:
+            start = time.perf_counter()
+            index = build_index(vectors, spec)
+            build_s = time.perf_counter() - start
+
+            _, approx = index.search(queries, k_max)
+            lat = query_latencies_ms(index, queries, k_max)
+            params = {key: v for key, v in spec.items() if key not in ('type', 'nlist')}
+
+            print(f"{factory_string(spec, n):<22}{build_s:>9.1f}"
+                  f"{recall_at(approx, exact, 5):>10.3f}{recall_at(approx, exact, 12):>11.3f}"
+                  f"{np.percentile(lat, 50):>9.3f}{np.percentile(lat, 99):>9.3f}  {params}")
+            del index
+
+    print("-" * 88)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall / latency benchmark for FAISS index specs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+    run_benchmark(sizes=args.sizes, n_queries=args.queries)
@@ -0,0 +1,323 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import faiss
+
+# Ensure we can find the config
+try:
+    from app.tarumbeta_ml.src.utils import config
+    from app.tarumbeta_ml.src.utils.column_store import columns_path, load_columns, write_columns
+    from app.tarumbeta_ml.src.utils.table_io import find_table, read_table
+    from app.tarumbeta_ml.src.features.query_vectorizer import BLOCKS, CompiledQueryVectorizer, split_blocks
+    from app.tarumbeta_ml.src.model.index_spec import index_ids, load_spec, stored_vectors
+except ImportError:
+    try:
+        from backend.app.tarumbeta_ml.src.utils import config
+        from backend.app.tarumbeta_ml.src.utils.column_store import columns_path, load_columns, write_columns
+        from backend.app.tarumbeta_ml.src.utils.table_io import find_table, read_table
+        from backend.app.tarumbeta_ml.src.features.query_vectorizer import BLOCKS, CompiledQueryVectorizer, split_blocks
+        from backend.app.tarumbeta_ml.src.model.index_spec import index_ids, load_spec, stored_vectors
+    except ImportError:
+        import sys
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+        from src.utils import config
+        from src.utils.column_store import columns_path, load_columns, write_columns
+        from src.utils.table_io import find_table, read_table
+        from src.features.query_vectorizer import BLOCKS, CompiledQueryVectorizer, split_blocks
+        from src.model.index_spec import index_ids, load_spec, stored_vectors
+
+# Versioned model bundle: every serving artifact in one directory, no pickles.
+#
+#   bundles/
+#     CURRENT                    <- name of the live version (replaced atomically)
+#     .update.lock               <- flock held from reading CURRENT to publishing (see bundle_lock)
+#     v20260101-120000.123456-1a2b3c/
+#       manifest.json            <- version, dims, block weights, index spec, encoder, sha256 per file
+#       faiss_index.bin          <- FAISS native format (IDMap2 keys = instructor rows)
+#       processors.json          <- one-hot categories + MinMaxScaler affine map
+#       blocks/                  <- unweighted categorical / numerical / text blocks, by key
+#         categorical.npy            (memory-mappable; weights apply at query time, see
+#         numerical.npy               api/block_scorer.py; the index holds the weighted vectors)
+#         text.npy
+#       instructors/             <- instructor column store (utils/column_store.py)
+#       text_encoder/            <- ONNX encoder files, only for the onnx backends
+#       journal/                 <- live index updates made since (api/index_updater.py): one
+#         000001.npz                 delta per update, replayed in order on top of the bundle
+#                                    (appended after the bundle was written: not checksummed)
+#
+# A bundle directory only appears (rename) once it is complete, and CURRENT only ever
+# names complete bundles, so a reader can never load a half-copied set.
+
+FORMAT_VERSION = 2 # 1: one weighted vectors.npy instead of blocks/ (still readable)
+READABLE_FORMATS = (1, 2)
+MANIFEST = 'manifest.json'
+CURRENT = 'CURRENT'
+LOCK_FILE = '.update.lock'
+JOURNAL = 'journal'
+
+class BundleError(RuntimeError):
+    """ Raised for a missing, incomplete or corrupted bundle. """
+
+def new_version():
+    """ Sorts by creation time (pruning relies on it), unique across concurrent writers """
+    now = time.time()
+    return time.strftime('v%Y%m%d-%H%M%S', time.localtime(now)) + f"{now % 1:.6f}"[1:] + '-' + uuid.uuid4().hex[:6]
+
+def write_bundle(index, index_spec, processors, blocks, instructors, text_encoder,
+                 weights, bundles_dir=None, version=None, onnx_dir=None, changes_since_build=0):
+    """
+    Writes a complete bundle and returns its version (not yet live: see publish_bundle).
+    blocks is {block: (n, block dim)} unweighted, instructors a DataFrame or {column: array},
+    text_encoder {'backend', 'model', 'dimension'}. changes_since_build counts the live
+    updates applied since the index was last built (api/index_updater.py compacts on it).
+    """
+    bundles_dir = bundles_dir or config.BUNDLES_DIR
+    version = version or new_version()
+    final_dir = os.path.join(bundles_dir, version)
+    tmp_dir = os.path.join(bundles_dir, f".tmp-{version}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    faiss.write_index(index, os.path.join(tmp_dir, 'faiss_index.bin'))
+    with open(os.path.join(tmp_dir, 'processors.json'), 'w') as f:
+        json.dump(processors, f, indent=2)
+    os.makedirs(os.path.join(tmp_dir, 'blocks'))
+    for block in BLOCKS:
+        np.save(os.path.join(tmp_dir, 'blocks', f"{block}.npy"), np.ascontiguousarray(blocks[block], dtype='float32'))
+    if not isinstance(instructors, pd.DataFrame):
+        instructors = pd.DataFrame({col: np.asarray(values) for col, values in instructors.items()})
+    write_columns(instructors, os.path.join(tmp_dir, 'instructors'))
+    if text_encoder['backend'] != 'torch':
+        _link_tree(onnx_dir or config.ONNX_ENCODER_DIR, os.path.join(tmp_dir, 'text_encoder'))
+
+    cat_dim = sum(len(values) for values in processors['categories'])
+    num_dim = len(processors['num_scale'])
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'dims': {
+            'categorical': cat_dim,
+            'numerical': num_dim,
+            'text': text_encoder['dimension'],
+            'total': cat_dim + num_dim + text_encoder['dimension']
+        },
+        'weights': weights,
+        'index_spec': index_spec,
+        'n_instructors': int(index.ntotal),
+        'changes_since_build': int(changes_since_build),
+        'text_encoder': text_encoder,
+        'files': _checksums(tmp_dir)
+    }
+    block_dims = [np.shape(blocks[block])[1] for block in BLOCKS]
+    if manifest['dims']['total'] != index.d or block_dims != [manifest['dims'][block] for block in BLOCKS]:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise BundleError(f"Dimension mismatch: manifest {manifest['dims']}, index has {index.d}, "
+                          f"blocks have {block_dims}")
+    with open(os.path.join(tmp_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    os.rename(tmp_dir, final_dir)
+    return version
+
+def publish_bundle(version, bundles_dir=None, keep=None):
+    """ Atomically points CURRENT at version, then prunes old bundles. """
+    bundles_dir = bundles_dir or config.BUNDLES_DIR
+    if not os.path.exists(os.path.join(bundles_dir, version, MANIFEST)):
+        raise BundleError(f"No complete bundle '{version}' in {bundles_dir}")
+    tmp_path = os.path.join(bundles_dir, f".{CURRENT}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp_path, os.path.join(bundles_dir, CURRENT))
+    prune_bundles(bundles_dir, keep if keep is not None else config.BUNDLES_KEEP)
+
+@contextmanager
+def bundle_lock(bundles_dir=None):
+    """
+    Exclusive lock on bundles_dir, across processes (flock). Held by every read-CURRENT ->
+    write -> publish sequence (live index updates, package_artifacts), so a publish can't
+    replace a version that another writer's next bundle was not built on.
+    """
+    import fcntl
+    bundles_dir = bundles_dir or config.BUNDLES_DIR
+    os.makedirs(bundles_dir, exist_ok=True)
+    with open(os.path.join(bundles_dir, LOCK_FILE), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def append_delta(version, delta, bundles_dir=None):
+    """
+    Appends one live-update delta ({name: array}, no object arrays) to the journal of bundle
+    `version` and returns its sequence number. Callers hold bundle_lock.
+    """
+    journal_dir = os.path.join(bundle_path(version, bundles_dir), JOURNAL)
+    os.makedirs(journal_dir, exist_ok=True)
+    seq = max(_journal_seqs(journal_dir), default=0) + 1
+    tmp_path = os.path.join(journal_dir, f".{seq:06d}.tmp")
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **delta)
+    os.replace(tmp_path, os.path.join(journal_dir, f"{seq:06d}.npz")) # Readers never see half a delta
+    return seq
+
+def read_deltas(version, bundles_dir=None, after=0):
+    """ [(seq, {name: array})] of the journal of bundle `version` past sequence number `after`, in order """
+    journal_dir = os.path.join(bundle_path(version, bundles_dir), JOURNAL)
+    deltas = []
+    for seq in sorted(seq for seq in _journal_seqs(journal_dir) if seq > after):
+        with np.load(os.path.join(journal_dir, f"{seq:06d}.npz"), allow_pickle=False) as data:
+            deltas.append((seq, {name: data[name] for name in data.files}))
+    return deltas
+
+def journal_length(version, bundles_dir=None):
+    return len(_journal_seqs(os.path.join(bundle_path(version, bundles_dir), JOURNAL)))
+
+def _journal_seqs(journal_dir):
+    if not os.path.isdir(journal_dir):
+        return []
+    return [int(name[:-4]) for name in os.listdir(journal_dir) if name.endswith('.npz') and name[:-4].isdigit()]
+
+def current_version(bundles_dir=None):
+    """ Live version name, or None when no bundle has been published (legacy artifacts) """
+    path = os.path.join(bundles_dir or config.BUNDLES_DIR, CURRENT)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().strip() or None
+
+def bundle_path(version, bundles_dir=None):
+    return os.path.join(bundles_dir or config.BUNDLES_DIR, version)
+
+def read_manifest(bundle_dir, verify=True):
+    """ Loads the manifest; with verify=True every file's size and sha256 are checked. """
+    path = os.path.join(bundle_dir, MANIFEST)
+    if not os.path.exists(path):
+        raise BundleError(f"No manifest in {bundle_dir}")
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') not in READABLE_FORMATS:
+        raise BundleError(f"Unsupported bundle format {manifest.get('format_version')}")
+    if verify:
+        actual = _checksums(bundle_dir, exclude=(MANIFEST,))
+        for name, expected in manifest['files'].items():
+            if name not in actual:
+                raise BundleError(f"Bundle {manifest['version']} is missing {name}")
+            if actual[name] != expected:
+                raise BundleError(f"Checksum mismatch for {name} in bundle {manifest['version']}")
+    return manifest
+
+def prune_bundles(bundles_dir, keep):
+    """ Deletes all but the newest `keep` bundles (never the live one). Open mmaps stay valid. """
+    live = current_version(bundles_dir)
+    versions = sorted(v for v in os.listdir(bundles_dir)
+                      if not v.startswith('.') and os.path.isdir(os.path.join(bundles_dir, v)))
+    for version in versions[:max(len(versions) - keep, 0)]:
+        if version != live:
+            shutil.rmtree(os.path.join(bundles_dir, version), ignore_errors=True)
+
+def _checksums(root, exclude=()):
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        if dirpath == root and JOURNAL in dirnames:
+            dirnames.remove(JOURNAL) # Grows after the manifest is written
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, root)
+            if name in exclude:
+                continue
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            files[name] = {'sha256': digest.hexdigest(), 'bytes': os.path.getsize(path)}
+    return files
+
+def _link_tree(src_dir, dst_dir):
+    """ Hard-links (or copies, across filesystems) a directory's files: bundles share unchanged blobs """
+    os.makedirs(dst_dir)
+    for name in os.listdir(src_dir):
+        src, dst = os.path.join(src_dir, name), os.path.join(dst_dir, name)
+        if os.path.isdir(src):
+            _link_tree(src, dst)
+            continue
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+def loose_blocks(index, vectorizer, mmap_mode=None):
+    """
+    The unweighted instructor blocks of the loose training outputs: the exact
+    instructors_blocks/<block>.npy written by vectorize_semantic.py. Without them (or when
+    they don't cover the index) they are recovered from the index's stored vectors, which
+    is lossy for SQ8 / PQ and loses any block whose weight is 0.
+    """
+    blocks_dir = os.path.join(config.SEMANTIC_MODELS, 'instructors_blocks')
+    dims = {'categorical': vectorizer.cat_dim, 'numerical': vectorizer.num_dim,
+            'text': index.d - vectorizer.cat_dim - vectorizer.num_dim}
+    paths = {block: os.path.join(blocks_dir, f"{block}.npy") for block in BLOCKS}
+    if all(os.path.exists(path) for path in paths.values()):
+        blocks = {block: np.load(path, mmap_mode=mmap_mode) for block, path in paths.items()}
+        ids = index_ids(index)
+        n_keys = int(ids.max()) + 1 if len(ids) else 0
+        rows = {len(matrix) for matrix in blocks.values()}
+        if len(rows) == 1 and rows.pop() >= n_keys and all(blocks[b].shape[1] == dims[b] for b in BLOCKS):
+            return blocks
+        print(f"⚠️ {blocks_dir} does not match faiss_index.bin: recovering the blocks from the index vectors")
+    else:
+        print(f"⚠️ No {blocks_dir}: recovering the blocks from the index vectors (lossy for SQ8 / PQ)")
+    return split_blocks(stored_vectors(index), vectorizer.cat_dim, vectorizer.num_dim)
+
+def package_artifacts(publish=True, bundles_dir=None):
+    """
+    Packages the loose training outputs (faiss_index.bin, encoder.pkl / scaler.pkl, the
+    instructors_blocks/ .npy files, the instructor column store or table) as a bundle.
+    Returns the new version.
+    """
+    import pickle
+
+    index_path = os.path.join(config.SEMANTIC_MODELS, 'faiss_index.bin')
+    index = faiss.read_index(index_path)
+    with open(os.path.join(config.SEMANTIC_MODELS, 'encoder.pkl'), 'rb') as f:
+        encoder = pickle.load(f)
+    with open(os.path.join(config.SEMANTIC_MODELS, 'scaler.pkl'), 'rb') as f:
+        scaler = pickle.load(f)
+    vectorizer = CompiledQueryVectorizer(encoder, scaler)
+
+    table = find_table('instructors_processed')
+    if os.path.exists(columns_path(table)):
+        instructors = load_columns(columns_path(table), mmap=False)
+    else:
+        instructors = read_table(table)
+
+    text_encoder = {
+        'backend': config.TEXT_ENCODER_BACKEND,
+        'model': config.TEXT_ENCODER_MODEL,
+        'dimension': index.d - vectorizer.cat_dim - vectorizer.num_dim
+    }
+    # The bundle keeps Step 5's exact unweighted blocks (the index only holds weighted, maybe quantized, vectors)
+    blocks = loose_blocks(index, vectorizer, mmap_mode='r')
+
+    version = write_bundle(index, load_spec(index_path, default=config.FAISS_INDEX_SPEC), vectorizer.to_dict(),
+                           blocks, instructors, text_encoder, vectorizer.weights, bundles_dir=bundles_dir)
+    if publish:
+        with bundle_lock(bundles_dir): # Not between a live update's rebase and its publish
+            publish_bundle(version, bundles_dir)
+    return version
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Write the loose ML artifacts as a versioned bundle")
+    parser.add_argument('--no-publish', action='store_true', help="write the bundle but leave CURRENT alone")
+    args = parser.parse_args()
+
+    version = package_artifacts(publish=not args.no_publish)
+    print(f"✅ Wrote bundle {version}{'' if args.no_publish else ' (live)'} to {config.BUNDLES_DIR}")
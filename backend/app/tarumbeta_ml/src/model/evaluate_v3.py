@@ -1,15 +1,16 @@
-import pandas as pd
 import numpy as np
 import pickle
 import os
 import sys
 import faiss
-from sentence_transformers import SentenceTransformer
 from sklearn.preprocessing import normalize
 
 # Setup
 sys.path.append('/content/tarumbeta-ml')
 from src.utils import config
+from src.features.embedding_store import open_store
+from src.features.text_encoder import load_text_encoder
+from src.utils.table_io import find_table, read_table
 
 def load_artifacts():
     print("⏳ Loading V3 Artifacts (FAISS + Real Data)...")
@@ -24,20 +25,20 @@ def load_artifacts():
     with open(os.path.join(config.SEMANTIC_MODELS, 'scaler.pkl'), 'rb') as f:
         scaler = pickle.load(f)
         
-    bert = SentenceTransformer('all-MiniLM-L6-v2')
+    bert = load_text_encoder() # The configured backend / model: the one the index was built with
     
     # 3. Load Datasets
-    inst_df = pd.read_csv(os.path.join(config.DATA_PROCESSED, 'instructors_processed.csv'))
-    learn_df = pd.read_csv(os.path.join(config.DATA_PROCESSED, 'learners_processed.csv'))
+    inst_df = read_table(find_table('instructors_processed'))
+    learn_df = read_table(find_table('learners_processed'))
     
     return index, encoder, scaler, bert, inst_df, learn_df
 
-def construct_vectors(df, encoder, scaler, bert):
+def construct_vectors(df, encoder, scaler, bert, store=None):
     # Replicate V3 Logic EXACTLY
     
     # A. Categorical (0.80)
     cat_cols = ['location', 'instrument_type', 'teaching_language', 'skill_level']
-    cat = normalize(encoder.transform(df[cat_cols]), axis=1) * config.WEIGHT_CAT
+    cat = normalize(encoder.transform(df[cat_cols].astype(object)), axis=1) * config.WEIGHT_CAT
     
     # B. Numerical (0.10)
     # Handle missing cols for learners
@@ -47,7 +48,9 @@ def construct_vectors(df, encoder, scaler, bert):
     num = normalize(scaler.transform(df[num_cols]), axis=1) * config.WEIGHT_NUM
     
     # C. Text (0.10)
-    txt = normalize(bert.encode(df['bio_keywords'].tolist()), axis=1) * config.WEIGHT_TXT
+    texts = df['bio_keywords'].tolist()
+    txt = store.encode(texts, bert.encode) if store is not None else bert.encode(texts)
+    txt = normalize(txt, axis=1) * config.WEIGHT_TXT
     
     # D. Stack & Normalize
     vecs = np.hstack([cat, num, txt]).astype('float32')
@@ -62,36 +65,29 @@ def evaluate(n_samples=500):
     test_set = learn_df.sample(n_samples, random_state=42)
     print(f"\n🧪 Evaluating on {n_samples} random learners...")
     
-    # Vectorize
-    query_vecs = construct_vectors(test_set, encoder, scaler, bert)
+    # Vectorize (learner bios already embedded by the pipeline come from the store, read-only)
+    store = open_store(readonly=True)
+    query_vecs = construct_vectors(test_set, encoder, scaler, bert, store)
+    if store is not None:
+        print(f"⏱️  {store.summary()}")
     
     # Search
     distances, indices = index.search(query_vecs, k=5)
     
     # Calculate Metrics
-    precision_scores = []
-    top1_hits = 0
-    
     print("\n📝 Checking Constraints (Location + Instrument)...")
     
-    for i in range(n_samples):
-        learner = test_set.iloc[i]
-        l_loc = learner['location']
-        l_inst = learner['instrument_type']
-        
-        # Check Top 5
-        matches = inst_df.iloc[indices[i]]
-        # A "Hit" is exact Location match AND exact Instrument match
-        hits = (matches['location'] == l_loc) & (matches['instrument_type'] == l_inst)
-        
-        precision_scores.append(hits.sum() / 5.0)
-        
-        # Check Top 1
-        if hits.iloc[0]:
-            top1_hits += 1
-            
-    avg_precision = np.mean(precision_scores)
-    top1_acc = top1_hits / n_samples
+    # Vectorized: gather the matched instructors' columns for all (learner, rank) pairs at once
+    matched_loc = inst_df['location'].to_numpy()[indices]           # (n_samples, 5)
+    matched_inst = inst_df['instrument_type'].to_numpy()[indices]
+    
+    # A "Hit" is exact Location match AND exact Instrument match
+    hits = (matched_loc == test_set['location'].to_numpy()[:, None]) & \
+           (matched_inst == test_set['instrument_type'].to_numpy()[:, None])
+    hits &= indices != -1
+    
+    avg_precision = hits.sum(axis=1).mean() / 5.0 # Average % of the Top 5 that are perfect
+    top1_acc = hits[:, 0].mean()                   # Is the Top 1 perfect?
     
     print("-" * 40)
     print(f"📊 TARUMBETA V3 PERFORMANCE REPORT")
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+
+# Setup path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.utils import config
+from src.features.text_encoder import ENCODER_CONFIG, ONNX_MODEL_FILES
+
+def export_onnx_encoder(model_name=config.TEXT_ENCODER_MODEL, out_dir=config.ONNX_ENCODER_DIR, opset=17):
+    """
+    Exports the transformer of a SentenceTransformer to ONNX (token embeddings out; pooling and
+    normalization stay in OnnxTextEncoder), then writes a dynamically int8-quantized copy.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    print(f"📦 Exporting {model_name} to ONNX...")
+    st_model = SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0]
+    module_names = [type(m).__name__ for m in st_model]
+    if module_names[1:2] != ['Pooling'] or not _is_mean_pooling(st_model[1].get_config_dict()):
+        raise ValueError(f"Expected Transformer -> Pooling(mean) [-> Normalize], got {module_names}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    hf_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+
+    # 1. fp32 graph with dynamic batch / sequence axes
+    sample = tokenizer(['warm up export'], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['token_embeddings'] = {0: 'batch', 1: 'sequence'}
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    fp32_path = os.path.join(out_dir, ONNX_MODEL_FILES['onnx'])
+    with torch.no_grad():
+        torch.onnx.export(TokenEmbeddings(hf_model), tuple(sample[name] for name in input_names), fp32_path,
+                          input_names=input_names, output_names=['token_embeddings'],
+                          dynamic_axes=dynamic_axes, opset_version=opset, dynamo=False)
+    print(f"   ✅ fp32: {fp32_path} ({os.path.getsize(fp32_path) / 1e6:.1f} MB)")
+
+    # 2. int8 weights for MatMul/Gemm, activations quantized on the fly
+    int8_path = os.path.join(out_dir, ONNX_MODEL_FILES['onnx_int8'])
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8, per_channel=True)
+    print(f"   ✅ int8: {int8_path} ({os.path.getsize(int8_path) / 1e6:.1f} MB)")
+
+    # 3. Tokenizer (fast tokenizer JSON: no transformers import at serving time) + settings
+    tokenizer.backend_tokenizer.save(os.path.join(out_dir, 'tokenizer.json'))
+    settings = {
+        'model_name': model_name,
+        'dimension': st_model.get_sentence_embedding_dimension(),
+        'max_seq_length': st_model.max_seq_length,
+        'pooling': 'mean',
+        'normalize': 'Normalize' in module_names,
+        'opset': opset
+    }
+    with open(os.path.join(out_dir, ENCODER_CONFIG), 'w') as f:
+        json.dump(settings, f, indent=2)
+
+    # 4. Sanity check against the torch path
+    from src.features.text_encoder import OnnxTextEncoder
+    texts = ['Beginner guitar chords and strumming', 'Classical piano theory for exams']
+    reference = st_model.encode(texts)
+    for backend, model_file in ONNX_MODEL_FILES.items():
+        emb = OnnxTextEncoder(out_dir, model_file).encode(texts)
+        print(f"   {backend:<10} min cosine vs torch: {np.min(np.sum(emb * reference, axis=1)):.6f}")
+    print(f"✅ ONNX encoder written to {out_dir}")
+
+def _is_mean_pooling(pooling):
+    """ Pooling config in either the sentence-transformers 3.x or the later format """
+    if 'pooling_mode' in pooling:
+        return pooling['pooling_mode'] == 'mean'
+    modes = [k for k, v in pooling.items() if k.startswith('pooling_mode_') and v]
+    return modes == ['pooling_mode_mean_tokens']
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the MiniLM text encoder to (quantized) ONNX")
+    parser.add_argument('--model', default=config.TEXT_ENCODER_MODEL)
+    parser.add_argument('--out', default=config.ONNX_ENCODER_DIR)
+    parser.add_argument('--opset', type=int, default=17)
+    args = parser.parse_args()
+    export_onnx_encoder(args.model, args.out, args.opset)
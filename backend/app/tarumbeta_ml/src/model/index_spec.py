@@ -0,0 +1,114 @@
+import json
+import os
+import numpy as np
+import faiss
+
+# Index spec -> FAISS factory string. See config.FAISS_INDEX_SPEC for the accepted specs.
+INDEX_TYPES = {
+    'flat': lambda spec, nlist: 'Flat',
+    'ivf_flat': lambda spec, nlist: f"IVF{nlist},Flat",
+    'hnsw': lambda spec, nlist: f"HNSW{spec.get('M', 32)},Flat",
+    'ivf_sq8': lambda spec, nlist: f"IVF{nlist},SQ8",
+}
+
+def resolve_nlist(spec, n_vectors):
+    """ 'auto' nlist is ~4*sqrt(N), capped so every list gets >= 39 training points (FAISS minimum). """
+    nlist = spec.get('nlist', 'auto')
+    if nlist == 'auto':
+        nlist = int(4 * n_vectors ** 0.5)
+    return max(1, min(int(nlist), n_vectors // 39))
+
+def factory_string(spec, n_vectors):
+    index_type = spec.get('type', 'flat')
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}'. Expected one of {sorted(INDEX_TYPES)}")
+    return INDEX_TYPES[index_type](spec, resolve_nlist(spec, n_vectors))
+
+def build_index(vectors, spec, ids=None):
+    """
+    Builds, trains and fills an inner-product index from already L2-normalized vectors.
+    With ids (int64 instructor keys) the index is wrapped in IDMap2, so searches return
+    those keys instead of row positions.
+    """
+    n_vectors, dimension = vectors.shape
+    factory = factory_string(spec, n_vectors)
+    if ids is not None:
+        factory = 'IDMap2,' + factory
+    index = faiss.index_factory(dimension, factory, faiss.METRIC_INNER_PRODUCT)
+
+    if spec.get('type') == 'hnsw':
+        base_index(index).hnsw.efConstruction = spec.get('ef_construction', 80)
+    if not index.is_trained:
+        index.train(vectors)
+    if ids is not None:
+        index.add_with_ids(vectors, np.asarray(ids, dtype='int64'))
+    else:
+        index.add(vectors)
+
+    apply_search_params(index, spec)
+    return index
+
+def apply_search_params(index, spec):
+    """ Sets the query-time knobs (nprobe for IVF, efSearch for HNSW). No-op for flat indexes. """
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        ivf.nprobe = min(spec.get('nprobe', 8), ivf.nlist)
+
+    hnsw_index = base_index(index)
+    if hasattr(hnsw_index, 'hnsw'):
+        hnsw_index.hnsw.efSearch = spec.get('ef_search', 64)
+
+def spec_path(index_path):
+    return os.path.splitext(index_path)[0] + '.json'
+
+def save_spec(spec, index_path):
+    with open(spec_path(index_path), 'w') as f:
+        json.dump(spec, f, indent=2)
+
+def load_spec(index_path, default=None):
+    """ Reads the spec saved next to the index; indexes built before specs existed are flat. """
+    path = spec_path(index_path)
+    if not os.path.exists(path):
+        return dict(default or {'type': 'flat'})
+    with open(path) as f:
+        return json.load(f)
+
+def base_index(index):
+    """ The concrete index, unwrapped from an IDMap/IDMap2 if present """
+    index = faiss.downcast_index(index)
+    if hasattr(index, 'id_map'):
+        index = faiss.downcast_index(index.index)
+    return index
+
+def index_ids(index):
+    """ int64 key of every stored vector, in storage order (row positions for plain indexes) """
+    index = faiss.downcast_index(index)
+    if hasattr(index, 'id_map'):
+        return faiss.vector_to_array(index.id_map)
+    return np.arange(index.ntotal, dtype='int64')
+
+def stored_vectors(index):
+    """
+    (max key + 1, d) float32 array of the indexed vectors, addressed by key, for direct
+    gathers. Zero-copy for flat indexes whose keys are 0..n-1; other types are reconstructed
+    once (exact for HNSW/IVF-Flat, decoded for SQ8). Keys that are not indexed stay zero.
+    """
+    base = base_index(index)
+    if isinstance(base, faiss.IndexFlat):
+        vectors = faiss.rev_swig_ptr(base.get_xb(), base.ntotal * base.d).reshape(base.ntotal, base.d)
+    else:
+        try:
+            faiss.extract_index_ivf(base).make_direct_map()
+        except RuntimeError:
+            pass
+        vectors = base.reconstruct_n(0, base.ntotal)
+
+    ids = index_ids(index)
+    if np.array_equal(ids, np.arange(len(ids))):
+        return vectors
+    by_key = np.zeros((ids.max() + 1 if len(ids) else 0, base.d), dtype='float32')
+    by_key[ids] = vectors
+    return by_key
@@ -7,17 +7,34 @@ import faiss
 # Setup path
 sys.path.append('/content/tarumbeta-ml')
 from src.utils import config
+from src.model.index_spec import build_index, factory_string, save_spec
+from src.model.bundle import package_artifacts
+from src.features.query_vectorizer import compose_blocks
+from src.utils.table_io import find_table, read_table, table_columns
 
-def train_faiss_model():
-    print("🚀 Building FAISS Index (High-Performance Engine)...")
+def train_faiss_model(index_spec=None):
+    index_spec = index_spec or config.FAISS_INDEX_SPEC
+    print(f"🚀 Building FAISS Index (High-Performance Engine, {index_spec['type']})...")
     
-    # 1. Load the Weighted Vectors (from Step 5)
+    # 1. Load the Unweighted Blocks (from Step 5, memory-mapped) and apply the weights
+    blocks_dir = os.path.join(config.SEMANTIC_MODELS, 'instructors_blocks')
+    blocks_path = blocks_dir + '.npz' # Older Step 5 output
     vec_path = os.path.join(config.SEMANTIC_MODELS, 'instructors_vec.pkl')
-    if not os.path.exists(vec_path):
-        raise FileNotFoundError(f"❌ Missing {vec_path}. Did you run Step 5?")
-        
-    with open(vec_path, 'rb') as f:
-        vectors = pickle.load(f)
+    weights = {'categorical': config.WEIGHT_CAT, 'numerical': config.WEIGHT_NUM, 'text': config.WEIGHT_TXT}
+    if os.path.isdir(blocks_dir):
+        blocks = {block: np.load(os.path.join(blocks_dir, f"{block}.npy"), mmap_mode='r') for block in weights}
+        vectors = compose_blocks(blocks, weights)
+        print(f"   Weights: {weights}")
+    elif os.path.exists(blocks_path):
+        with np.load(blocks_path) as blocks:
+            vectors = compose_blocks(blocks, weights)
+        print(f"   Weights: {weights}")
+    elif os.path.exists(vec_path):
+        # Output of an older Step 5, with the weights already baked in
+        with open(vec_path, 'rb') as f:
+            vectors = pickle.load(f)
+    else:
+        raise FileNotFoundError(f"❌ Missing {blocks_dir}. Did you run Step 5?")
     
     print(f"   Loaded {vectors.shape[0]} vectors of dimension {vectors.shape[1]}.")
     
@@ -29,16 +46,30 @@ def train_faiss_model():
     print("   ✅ Vectors L2 Normalized (Fixes Model 2 Bug).")
     
     # 3. Build the Index
-    dimension = vectors.shape[1]
-    index = faiss.IndexFlatIP(dimension)
-    index.add(vectors)
+    # 'flat' is the exact IndexFlatIP; IVF / HNSW / SQ8 are approximate (see config.FAISS_INDEX_SPEC)
+    print(f"   Index type: {factory_string(index_spec, vectors.shape[0])}")
+    # Stable integer keys (IDMap2): key == row of instructors_processed, whose profile_id
+    # column maps it to instructor_profiles.id. Search results then need no name lookup.
+    # Rows the incremental updater marked inactive (removed instructors) are left out.
+    instructor_keys = np.arange(vectors.shape[0], dtype='int64')
+    inst_path = find_table('instructors_processed')
+    if 'active' in table_columns(inst_path): # Only that column is read (Parquet)
+        active = read_table(inst_path, columns=['active'])['active']
+        instructor_keys = instructor_keys[active.to_numpy(dtype=bool)]
+    index = build_index(np.ascontiguousarray(vectors[instructor_keys]), index_spec, ids=instructor_keys)
     
     # 4. Save the Index
-    # We save it as a binary file optimized for FAISS
+    # We save it as a binary file optimized for FAISS, plus the spec so serving
+    # applies the same nprobe / efSearch
     index_path = os.path.join(config.SEMANTIC_MODELS, 'faiss_index.bin')
     faiss.write_index(index, index_path)
+    save_spec(index_spec, index_path)
     
     print(f"✅ FAISS Index saved to {index_path}")
+    
+    # 5. Package and publish a versioned bundle: running workers hot-swap to it
+    version = package_artifacts(publish=True)
+    print(f"✅ Published bundle {version} to {config.BUNDLES_DIR}")
     print("   The Tarumbeta V3 Engine is ready for queries.")
 
 if __name__ == "__main__":
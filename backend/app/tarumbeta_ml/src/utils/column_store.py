@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+import numpy as np
+
+# Columnar instructor metadata: one .npy file per column plus meta.json.
+# Strings are stored as fixed-width unicode so every column can be memory-mapped:
+# gunicorn workers then share the page cache instead of each holding a parsed DataFrame.
+
+META_FILE = 'meta.json'
+
+def write_columns(df, out_dir):
+    """ Writes a DataFrame as a memory-mappable column directory (atomic directory swap). """
+    tmp_dir = out_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = {}
+    for col in df.columns:
+        values = _column_values(df[col])
+        np.save(os.path.join(tmp_dir, f"{col}.npy"), values, allow_pickle=False)
+        columns[col] = values.dtype.str
+
+    _finish(tmp_dir, out_dir, len(df), columns)
+
+class ColumnWriter:
+    """
+    write_columns for a table that arrives in chunks (the streaming ETL): each chunk is
+    spilled to per-column part files, and close() copies them into the final .npy files
+    one part at a time, so memory is bounded by a chunk rather than the table. Text
+    columns get the widest width seen in any chunk.
+    """
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.tmp_dir = out_dir + '.tmp'
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir)
+        self.parts = {} # column -> [(part file, n_rows, dtype)]
+        self.n_rows = 0
+        self.n_chunks = 0
+
+    def append(self, df):
+        for col in df.columns:
+            values = _column_values(df[col])
+            path = os.path.join(self.tmp_dir, f"{col}.part{self.n_chunks}.npy")
+            np.save(path, values, allow_pickle=False)
+            self.parts.setdefault(col, []).append((path, len(values), values.dtype))
+        self.n_rows += len(df)
+        self.n_chunks += 1
+
+    def close(self):
+        columns = {}
+        for col, parts in self.parts.items():
+            kinds = {dtype.kind == 'U' for _, _, dtype in parts}
+            if len(kinds) > 1:
+                raise ValueError(f"❌ Column '{col}' is text in some chunks and numeric in others")
+            dtype = np.result_type(*[dtype for _, _, dtype in parts])
+            # Plain appends after the .npy header (a memmap'd copy would hold the whole column's pages)
+            with open(os.path.join(self.tmp_dir, f"{col}.npy"), 'wb') as f:
+                np.lib.format.write_array_header_1_0(f, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                                         'fortran_order': False, 'shape': (self.n_rows,)})
+                for path, _, _ in parts:
+                    np.load(path).astype(dtype, copy=False).tofile(f)
+                    os.remove(path)
+            columns[col] = dtype.str
+        _finish(self.tmp_dir, self.out_dir, self.n_rows, columns)
+
+def _column_values(series):
+    values = series.to_numpy()
+    if values.dtype.kind not in 'biuf': # Text -> fixed-width unicode
+        if series.dtype.name == 'category': # Parquet's dictionary-encoded columns
+            series = series.astype(object)
+        values = series.fillna('').astype(str).to_numpy().astype('U')
+    return values
+
+def _finish(tmp_dir, out_dir, n_rows, columns):
+    with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+        json.dump({'n_rows': n_rows, 'columns': columns}, f, indent=2)
+
+    # Swap in the new directory; readers holding the old mmaps keep their (unlinked) files
+    old_dir = out_dir + '.old'
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.rename(out_dir, old_dir)
+    os.rename(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def load_columns(col_dir, mmap=True):
+    """ Returns {column: array}. With mmap=True arrays are read-only views of the page cache. """
+    with open(os.path.join(col_dir, META_FILE)) as f:
+        meta = json.load(f)
+    mode = 'r' if mmap else None
+    return {
+        col: np.load(os.path.join(col_dir, f"{col}.npy"), mmap_mode=mode, allow_pickle=False)
+        for col in meta['columns']
+    }
+
+def columns_path(csv_path):
+    """ instructors_processed.csv -> instructors_processed_columns/ """
+    return os.path.splitext(csv_path)[0] + '_columns'
+
+if __name__ == "__main__":
+    # Convert the processed instructor table in place (for artifacts built before the column store)
+    import sys
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    from src.utils.table_io import find_table, read_table
+
+    table = find_table('instructors_processed')
+    write_columns(read_table(table), columns_path(table))
+    print(f"✅ Wrote column store to {columns_path(table)}")
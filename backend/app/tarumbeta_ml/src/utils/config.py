@@ -25,3 +25,123 @@ WEIGHT_TXT = 0.10
 
 # 3. Reproducibility
 RANDOM_SEED = 42
+
+# 4. Serving Caches
+# Learner bios are built from a small vocabulary, so the same strings repeat constantly.
+EMBEDDING_CACHE_SIZE = 4096    # Max cached bio embeddings (LRU beyond this)
+EMBEDDING_CACHE_TTL = 6 * 3600 # Seconds before a cached embedding is re-encoded
+
+# 5. FAISS Index Type
+# 'flat' is exact but scans every instructor; the others are approximate and sub-linear.
+#   {'type': 'flat'}
+#   {'type': 'ivf_flat', 'nlist': 'auto', 'nprobe': 8}      # 'auto' -> ~4*sqrt(N) lists
+#   {'type': 'hnsw', 'M': 32, 'ef_construction': 80, 'ef_search': 64}
+#   {'type': 'ivf_sq8', 'nlist': 'auto', 'nprobe': 8}       # 8-bit scalar quantized, 4x smaller
+# The spec used at build time is saved next to the index, so serving picks up nprobe/efSearch.
+FAISS_INDEX_SPEC = {'type': 'flat'}
+
+# 6. Hard-Constraint Filtering (recommend(..., filtered=True))
+# Only instructors in the learner's (location, instrument, skill, language) cell are scored.
+# When that cell holds fewer than top_k instructors, constraints are dropped in this order.
+FILTER_FIELDS = ['location', 'instrument_type', 'skill_level', 'teaching_language']
+FILTER_RELAXATION_ORDER = ['teaching_language', 'skill_level', 'location']
+
+# 7. Shared Memory Serving
+# Memory-map the FAISS index and the instructor column store so gunicorn workers share
+# one copy through the page cache (see backend/gunicorn.conf.py).
+MMAP_ARTIFACTS = True
+
+# 8. Incremental Index Updates (api/index_updater.py)
+# Instructor upserts/removals patch the live index; once the changes since the last full
+# build exceed this fraction of the index it is rebuilt from scratch (re-trains IVF lists,
+# re-links HNSW, drops removed vectors).
+INDEX_COMPACT_FRACTION = 0.10
+# Live updates are journaled as small deltas on the live bundle (other workers replay them);
+# past this many, or at a compaction, the next update writes a full bundle instead.
+INDEX_JOURNAL_MAX = 256
+
+# 9. Micro-Batching (api/micro_batcher.py)
+# Concurrent get_matches() calls wait up to MAX_WAIT_MS for each other and then share one
+# encoder call and one FAISS search. A lone request pays at most MAX_WAIT_MS extra.
+MICRO_BATCHING = True
+MICRO_BATCH_MAX_SIZE = 32
+MICRO_BATCH_MAX_WAIT_MS = 2.0
+# A caller stops waiting for its batch after this long (a stuck batch is a 500, not a hung worker)
+MICRO_BATCH_RESULT_TIMEOUT_S = 30.0
+
+# 10. Text Encoder Backend (features/text_encoder.py)
+# 'torch' runs sentence-transformers; 'onnx' / 'onnx_int8' run the exported graph on ONNX
+# Runtime (build it with src/model/export_onnx_encoder.py). Instructor vectors and learner
+# queries must come from the same backend, so re-run vectorize_semantic.py after switching.
+TEXT_ENCODER_BACKEND = 'torch'
+TEXT_ENCODER_MODEL = 'all-MiniLM-L6-v2'
+ONNX_ENCODER_DIR = os.path.join(SEMANTIC_MODELS, "minilm_onnx")
+
+# 11. Model Bundles (model/bundle.py)
+# Serving loads the bundle named in bundles/CURRENT (falling back to the loose artifacts
+# above when none is published). Workers poll CURRENT and hot-swap to a new version.
+BUNDLES_DIR = os.path.join(SEMANTIC_MODELS, "bundles")
+BUNDLES_KEEP = 3               # Older bundles are pruned on publish (the live one never is)
+BUNDLE_VERIFY_CHECKSUMS = True # sha256 every file before a bundle goes live
+BUNDLE_WATCH_SECONDS = 10      # CURRENT poll interval; 0 disables the file watch
+
+# 12. Exact Scoring Engine (api/factorized_scorer.py)
+# Filtered cells and per-request weight overrides are always scored exactly, by the
+# factorized scorer. 'factorized' also uses it instead of the FAISS index for the
+# unfiltered default-weight search (exact even when FAISS_INDEX_SPEC is approximate).
+SCORING_ENGINE = 'faiss' # 'faiss' or 'factorized'
+
+# 13. Match Explanations (api/explanations.py)
+# recommend(..., explain=True) returns each hit's score breakdown; reasons and the
+# recommendation strength are read off it instead of re-comparing fields per instructor.
+EXPLAIN_TEXT_SIMILARITY = 0.5 # Bio cosine above which "similar goals" is given as a reason
+
+# 14. Result Cache (api/result_cache.py)
+# Finished result lists keyed on the canonical model input (the four categorical fields +
+# the normalized bio) and the request options. Dropped whenever a new bundle / index
+# update goes live. 0 disables it.
+RESULT_CACHE_SIZE = 2048
+RESULT_CACHE_TTL = 600 # seconds
+
+# 15. Diversity Reranking (api/diversity.py, recommend(..., diverse=True))
+# MMR over a MMR_POOL_FACTOR x top_k pool of the most relevant instructors: 1.0 is pure
+# relevance. Instructors with the same profile / name as a pick, or a bio embedding with a
+# cosine of at least MMR_DUPLICATE_SIMILARITY to its bio, are dropped as duplicates.
+MMR_POOL_FACTOR = 4
+MMR_LAMBDA = 0.7
+MMR_DUPLICATE_SIMILARITY = 0.98
+
+# 16. Offline Data Pipelines (src/etl)
+# The instructor ETL streams the raw catalog in chunks of this many rows (memory is per chunk)
+ETL_CHUNK_SIZE = 50_000
+# Synthetic learner corpora beyond this many rows are written in shards of this size
+LEARNER_SHARD_SIZE = 1_000_000
+
+# 17. Embedding Store (features/embedding_store.py)
+# On-disk text embeddings keyed by (text encoder, normalized text): the pipeline only encodes
+# bios it has never seen, and serving reads the store (read-only) behind the LRU cache.
+EMBEDDING_STORE_DIR = os.path.join(SEMANTIC_MODELS, "embedding_store")
+EMBEDDING_STORE_DTYPE = 'float32' # 'float16' halves the store (cosines move by ~1e-4)
+EMBEDDING_STORE_ONLINE = True
+
+# 18. Offline Encoding (features/parallel_encoder.py)
+# Texts are sorted by token length into ENCODE_BUCKET_WIDTH-token buckets; each batch holds up to
+# ENCODE_TOKEN_BUDGET padded tokens (short bios get big batches). Tasks of ENCODE_TASK_SIZE texts
+# go to ENCODE_WORKERS processes of ENCODE_THREADS_PER_WORKER threads each (workers x threads
+# should not exceed the cores; None = cpu_count // threads). Below ENCODE_MIN_PARALLEL texts
+# the pool isn't worth starting.
+ENCODE_WORKERS = None
+ENCODE_THREADS_PER_WORKER = 1
+ENCODE_TOKEN_BUDGET = 8192
+ENCODE_MAX_BATCH = 512
+ENCODE_BUCKET_WIDTH = 8
+ENCODE_TASK_SIZE = 4096
+ENCODE_MIN_PARALLEL = 20_000
+ENCODE_START_METHOD = 'spawn' # torch / ONNX Runtime thread pools don't survive fork
+
+# 19. Pipeline Tables (utils/table_io.py)
+# ETL -> vectorize -> train -> serve exchange 'parquet' tables (typed; the categorical columns
+# dictionary-encoded) or the original 'csv'. Readers take whichever exists, this format first.
+TABLE_FORMAT = 'parquet'
+PARQUET_COMPRESSION = 'zstd'
+CATEGORICAL_COLUMNS = ['location', 'instrument_type', 'skill_level', 'teaching_language']
@@ -0,0 +1,115 @@
+import os
+import pandas as pd
+
+# Ensure we can find the config
+try:
+    from app.tarumbeta_ml.src.utils import config
+except ImportError:
+    try:
+        from backend.app.tarumbeta_ml.src.utils import config
+    except ImportError:
+        import sys
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+        from src.utils import config
+
+# The tables the pipeline stages hand each other (instructors_processed, learners_processed):
+#   .parquet : typed columns, config.CATEGORICAL_COLUMNS dictionary-encoded, compressed (pyarrow)
+#   .csv     : the original text format, still read for artifacts built before Parquet
+# The file extension picks the format. Vectors are .npy (memory-mappable), and serving
+# reads instructors from the column store (utils/column_store.py).
+
+TABLE_EXTENSIONS = {'parquet': '.parquet', 'csv': '.csv'}
+
+def table_path(name, fmt=None, directory=None):
+    """ Where stage outputs go: datasets/processed/<name>.<config.TABLE_FORMAT> """
+    return os.path.join(directory or config.DATA_PROCESSED, name + TABLE_EXTENSIONS[fmt or config.TABLE_FORMAT])
+
+def find_table(name, directory=None):
+    """ The existing <name> table, config.TABLE_FORMAT first; the configured path if there is none """
+    formats = [config.TABLE_FORMAT] + [fmt for fmt in TABLE_EXTENSIONS if fmt != config.TABLE_FORMAT]
+    for fmt in formats:
+        path = table_path(name, fmt, directory)
+        if os.path.exists(path):
+            return path
+    return table_path(name, directory=directory)
+
+def table_format(path):
+    ext = os.path.splitext(path)[1]
+    for fmt, fmt_ext in TABLE_EXTENSIONS.items():
+        if ext == fmt_ext:
+            return fmt
+    raise ValueError(f"❌ Unknown table format '{ext}' ({path}); expected one of {list(TABLE_EXTENSIONS.values())}")
+
+def read_table(path, columns=None):
+    """ DataFrame of a .parquet / .csv table; columns limits what is read (Parquet skips the rest) """
+    if table_format(path) == 'parquet':
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+def table_columns(path):
+    """ Column names, without reading the rows """
+    if table_format(path) == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def with_categoricals(df, categorical=None):
+    """ config.CATEGORICAL_COLUMNS as pandas categoricals: Parquet stores them dictionary-encoded """
+    categorical = config.CATEGORICAL_COLUMNS if categorical is None else categorical
+    cols = [c for c in categorical if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype)]
+    if not cols:
+        return df
+    return df.assign(**{c: df[c].astype('category') for c in cols})
+
+def write_table(df, path, categorical=None):
+    """ Writes df as path's format (atomic rename) """
+    tmp_path = path + '.tmp'
+    if table_format(path) == 'parquet':
+        with_categoricals(df, categorical).to_parquet(tmp_path, index=False, compression=config.PARQUET_COMPRESSION)
+    else:
+        df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+class TableWriter:
+    """
+    write_table for a table that arrives in chunks (the streaming ETL): CSV chunks are
+    appended; Parquet chunks become row groups of one file. Each row group carries its
+    own dictionaries (chunks may see different categories); readers unify them.
+    """
+
+    def __init__(self, path, columns, categorical=None):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.format = table_format(path)
+        self.columns = columns
+        self.categorical = categorical
+        self._writer = None
+        self._empty = None # Types of an empty chunk are unknown: written only if no rows ever come
+        if self.format == 'csv':
+            pd.DataFrame(columns=columns).to_csv(self.tmp_path, index=False)
+
+    def append(self, df):
+        if self.format == 'csv':
+            df.to_csv(self.tmp_path, mode='a', header=False, index=False)
+            return
+        if not len(df):
+            self._empty = df
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(with_categoricals(df, self.categorical), preserve_index=False)
+        if self._writer is None:
+            # int32 dictionary indices, whatever the first chunk's category count needed
+            schema = pa.schema([f.with_type(pa.dictionary(pa.int32(), f.type.value_type))
+                                if pa.types.is_dictionary(f.type) else f for f in table.schema],
+                               metadata=table.schema.metadata)
+            self._writer = pq.ParquetWriter(self.tmp_path, schema, compression=config.PARQUET_COMPRESSION)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        elif self.format == 'parquet':
+            empty = self._empty if self._empty is not None else pd.DataFrame(columns=self.columns)
+            with_categoricals(empty, self.categorical).to_parquet(self.tmp_path, index=False)
+        os.replace(self.tmp_path, self.path)
@@ -0,0 +1,33 @@
+"""
+Tarumbeta Gunicorn Configuration
+Usage: gunicorn -c gunicorn.conf.py run:app
+
+preload_app imports the app (and loads the ML matcher) once in the master. Workers are
+forked afterwards and share the model weights copy-on-write; the FAISS index and the
+instructor column store are memory-mapped, so they share the page cache either way.
+"""
+import os
+import threading
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 4))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = 120
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+if preload_app:
+    # Load in the master before forking (see create_app). The dummy encode is left to each
+    # worker: torch thread pools started before fork() are not safe to reuse in children.
+    os.environ.setdefault('ML_WARMUP', 'sync')
+
+def post_fork(server, worker):
+    from app.tarumbeta_ml.src.api.inference_semantic import recommender
+
+    if recommender.is_ready():
+        threading.Thread(target=recommender.warm_up, name='ml-warmup', daemon=True).start()
+    else:
+        # Not preloaded (or the master failed to load): each worker loads on its own
+        recommender.start_warmup()
+    # Each worker polls bundles/CURRENT and hot-swaps to newly published model versions
+    recommender.start_watch()
@@ -0,0 +1,59 @@
+"""
+Links the processed ML instructors to their database profiles.
+Writes a profile_id column (instructor_profiles.id) into the instructors_processed table
+(Parquet, or the CSV of an older pipeline) and its column store, so the matcher resolves hits by primary key instead of by name.
+
+Matching by normalized full name happens here, once, offline: names that are ambiguous
+(duplicated on either side) are reported and left unlinked rather than guessed.
+Rows are not reordered, so FAISS keys (= rows) stay valid and no retraining is needed.
+"""
+import sys
+import os
+# Add backend to path so imports work
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from collections import Counter
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.utils.supabase_client import supabase
+from app.tarumbeta_ml.src.utils.column_store import columns_path, write_columns
+from app.tarumbeta_ml.src.utils.table_io import find_table, read_table, write_table
+
+def normalize_name(name):
+    return " ".join(str(name).split()).lower()
+
+def link_instructor_profiles():
+    table = find_table('instructors_processed')
+    df = read_table(table)
+
+    print("Fetching instructor profiles...")
+    response = supabase.table('instructor_profiles').select('id, users!inner(full_name)').execute()
+    profiles = response.data or []
+
+    db_counts = Counter(normalize_name(p['users']['full_name']) for p in profiles)
+    db_ids = {normalize_name(p['users']['full_name']): p['id'] for p in profiles}
+
+    names = df['name'].map(normalize_name)
+    ml_counts = names.value_counts()
+
+    ambiguous = {
+        name for name in db_ids
+        if db_counts[name] > 1 or ml_counts.get(name, 0) > 1
+    }
+    unique_ids = {name: pid for name, pid in db_ids.items() if name not in ambiguous}
+
+    df['profile_id'] = names.map(unique_ids).fillna('')
+    write_table(df, table)
+    write_columns(df, columns_path(table))
+
+    linked = int((df['profile_id'] != '').sum())
+    print(f"✅ Linked {linked} of {len(df)} ML instructors to {len(profiles)} DB profiles")
+    if ambiguous:
+        print(f"⚠️ {len(ambiguous)} ambiguous names left unlinked:")
+        for name in sorted(ambiguous):
+            print(f"    {name} (DB: {db_counts[name]}, ML: {ml_counts.get(name, 0)})")
+
+if __name__ == "__main__":
+    link_instructor_profiles()
@@ -0,0 +1,81 @@
+"""
+Memory report for the ML matcher under gunicorn.
+Starts gunicorn with 1, 4 and 8 workers, with and without preload_app, waits until
+/ready answers, and sums RSS / PSS / private memory over the master and its workers
+(from /proc/<pid>/smaps_rollup, Linux only).
+
+PSS splits shared pages between the processes mapping them, so total PSS is the real
+footprint; total RSS double-counts shared pages and shows what sharing saves.
+"""
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def smaps_rollup(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024 # MB
+    return fields
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+def wait_until_ready(port, workers, timeout=600):
+    # Every worker has to be ready, so require a run of consecutive 200s
+    deadline = time.time() + timeout
+    streak = 0
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=5) as r:
+                streak = streak + 1 if r.status == 200 else 0
+        except Exception:
+            streak = 0
+        if streak >= workers * 4:
+            return
+        time.sleep(0.25)
+    raise TimeoutError("gunicorn did not become ready")
+
+def measure(workers, preload, port):
+    env = dict(os.environ, GUNICORN_PRELOAD=str(preload), PORT=str(port), WEB_CONCURRENCY=str(workers))
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(port, workers)
+        time.sleep(2) # Let the per-worker warm-up threads finish
+        pids = [proc.pid] + child_pids(proc.pid)
+        totals = {'Rss': 0.0, 'Pss': 0.0, 'Private': 0.0}
+        for pid in pids:
+            m = smaps_rollup(pid)
+            totals['Rss'] += m.get('Rss', 0)
+            totals['Pss'] += m.get('Pss', 0)
+            totals['Private'] += m.get('Private_Clean', 0) + m.get('Private_Dirty', 0)
+        return len(pids) - 1, totals
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=60)
+
+def run_report(worker_counts=(1, 4, 8), port=8765):
+    print("🧠 Tarumbeta ML memory report (MB, master + workers)")
+    print("-" * 72)
+    print(f"{'workers':>8}{'preload':>9}{'total RSS':>12}{'total PSS':>12}{'private':>10}{'PSS/worker':>12}")
+    for workers in worker_counts:
+        for preload in (False, True):
+            n, t = measure(workers, preload, port)
+            print(f"{n:>8}{str(preload):>9}{t['Rss']:>12.0f}{t['Pss']:>12.0f}"
+                  f"{t['Private']:>10.0f}{t['Pss'] / max(n, 1):>12.0f}")
+    print("-" * 72)
+
+if __name__ == "__main__":
+    counts = [int(c) for c in sys.argv[1:]] or [1, 4, 8]
+    run_report(counts)
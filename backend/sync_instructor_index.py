@@ -0,0 +1,52 @@
+"""
+Background job: brings the ML index in line with the instructor_profiles table.
+Upserts every DB instructor (only the ones that changed are encoded and journaled, not the
+whole dataset), removes indexed profiles that no longer exist, then, if anything changed,
+compacts the index into a fresh bundle.
+Run it from cron instead of re-running the full ETL + vectorize + train pipeline.
+Running servers replay each batch's delta on their next bundle watch tick and hot-swap to
+the compacted bundle (see api/index_updater.py).
+"""
+import sys
+import os
+# Add backend to path so imports work
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.utils.supabase_client import supabase
+from app.routes.matching import instructor_index_row
+from app.tarumbeta_ml.src.api.inference_semantic import (
+    recommender, upsert_instructors, remove_instructors, compact_index, get_model_stats
+)
+
+def sync_instructor_index(batch_size=256):
+    print("Fetching instructor profiles...")
+    response = supabase.table('instructor_profiles').select(
+        '*, users!instructor_profiles_user_id_fkey(full_name, location)'
+    ).execute()
+    rows = [instructor_index_row(p) for p in response.data or []]
+
+    recommender.ensure_ready()
+    for start in range(0, len(rows), batch_size):
+        upsert_instructors(rows[start:start + batch_size])
+    print(f"✅ Upserted {get_model_stats()['index_updates']['upserts']} changed instructors (of {len(rows)})")
+
+    # Linked profiles that were deleted from the DB
+    table = recommender.instructors
+    indexed = {pid for pid in table.profile_id.tolist() if pid}
+    stale = indexed - {row['profile_id'] for row in rows}
+    if stale:
+        removed = remove_instructors(sorted(stale))
+        print(f"🗑️ Removed {len(removed)} deleted instructors")
+
+    updates = get_model_stats()['index_updates']
+    if updates['upserts'] + updates['removals'] == 0:
+        print("✅ Index already up to date")
+        return
+    compact_index()
+    print(f"✅ Index compacted: {get_model_stats()['index_size']} instructors")
+
+if __name__ == "__main__":
+    sync_instructor_index()
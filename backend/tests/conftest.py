@@ -0,0 +1,108 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.utils import config
+from app.tarumbeta_ml.src.api.block_scorer import BlockScorer
+from app.tarumbeta_ml.src.api.constraint_filter import ConstraintPartitions
+from app.tarumbeta_ml.src.api.inference_semantic import SemanticRecommender
+from app.tarumbeta_ml.src.api.instructor_table import InstructorTable
+from app.tarumbeta_ml.src.features.query_vectorizer import CAT_COLS, NUM_COLS, CompiledQueryVectorizer, compose_blocks
+from app.tarumbeta_ml.src.model.index_spec import build_index
+
+# Shared test data and stand-ins. Plain helpers rather than pytest fixtures, so each test
+# file's __main__ runner can use them too (`from conftest import ...`).
+
+WEIGHTS = {'categorical': config.WEIGHT_CAT, 'numerical': config.WEIGHT_NUM, 'text': config.WEIGHT_TXT}
+
+class _TextEncoder:
+    """ Deterministic stand-in for the sentence encoder: one fixed direction per word """
+    def encode(self, texts, **kwargs):
+        out = np.zeros((len(texts), 8), dtype='float32')
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                out[i, sum(map(ord, word)) % 8] += 1.0
+        return out
+
+def _instructors(extra=()):
+    """ Four hand-written instructors (plus extra rows), bios encoded by _TextEncoder """
+    rows = [
+        ('Ann', 'Nairobi', 'Guitar', 'Beginner', 'English', 20, 4.0, 'acoustic chords'),
+        ('Ben', 'Nairobi', 'Piano', 'Intermediate', 'English', 40, 3.0, 'classical scales'),
+        ('Cy', 'Mombasa', 'Guitar', 'Beginner', 'Swahili', 30, 2.0, 'rock riffs'),
+        ('Di', 'Mombasa', 'Drums', 'Advanced', 'English', 50, 5.0, 'jazz grooves'),
+    ] + list(extra)
+    return pd.DataFrame(rows, columns=['name'] + CAT_COLS[:2] + ['skill_level', 'teaching_language']
+                        + NUM_COLS + ['bio_keywords'])
+
+def _random_instructors(n=60, seed=0):
+    """ n random instructors with bios "bio <i>", embedded by _text(n, 1) """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'name': [f"Instructor {i}" for i in range(n)],
+        'location': rng.choice(['Nairobi', 'Mombasa', 'Kisumu'], n),
+        'instrument_type': rng.choice(['Guitar', 'Piano', 'Drums'], n),
+        'skill_level': rng.choice(['Beginner', 'Intermediate', 'Advanced'], n),
+        'teaching_language': rng.choice(['English', 'Swahili'], n),
+        'hourly_rate': rng.integers(10, 60, n).astype(float),
+        'rating': rng.integers(0, 50, n) / 10,
+        'bio_keywords': [f"bio {i}" for i in range(n)]
+    })
+    df.loc[0, ['hourly_rate', 'rating']] = [10.0, 0.0] # MinMax-scales to an all-zero numeric block
+    return df
+
+def _learner(**overrides):
+    profile = {'location': 'Nairobi', 'instrument_type': 'Drums', 'skill_level': 'Advanced',
+               'teaching_language': 'Swahili', 'bio_keywords': 'afro beats'}
+    profile.update(overrides)
+    return profile
+
+def _vectorizer(df):
+    return CompiledQueryVectorizer(OneHotEncoder(sparse_output=False, handle_unknown='ignore').fit(df[CAT_COLS]),
+                                   MinMaxScaler().fit(df[NUM_COLS]))
+
+def _text(n, seed):
+    return np.random.default_rng(seed).standard_normal((n, 16)).astype('float32')
+
+def _blocks(df, vectorizer, text):
+    return vectorizer.blocks(df.to_dict('records'), text, num_values=df[NUM_COLS].to_numpy())
+
+def _setup(n=60):
+    df = _random_instructors(n)
+    vectorizer = _vectorizer(df)
+    blocks = _blocks(df, vectorizer, _text(n, 1))
+    learners = df.sample(5, random_state=2).to_dict('records')
+    query_blocks = vectorizer.blocks(learners, _text(5, 3))
+    return df, vectorizer, blocks, query_blocks
+
+def _recommender(df, vectorizer, blocks, weights, index_spec=None, bert_model=None):
+    """
+    A loaded recommender whose index was built with `weights`. bert_model defaults to a stub
+    that embeds each of df's bios as _setup() did (_text(len(df), 1)).
+    """
+    index_spec = index_spec or {'type': 'flat'}
+    if bert_model is None:
+        texts = dict(zip(df['bio_keywords'], _text(len(df), 1)))
+
+        class _BioEncoder:
+            def encode(self, batch, **kwargs):
+                return np.stack([texts.get(t, np.ones(16, dtype='float32')) for t in batch])
+
+        bert_model = _BioEncoder()
+
+    recommender = SemanticRecommender(autoload=False)
+    columns = {col: df[col].to_numpy() for col in df.columns}
+    recommender.publish(
+        bert_model=bert_model, index_spec=index_spec,
+        query_vectorizer=CompiledQueryVectorizer.from_dict(vectorizer.to_dict(), weights=weights),
+        index=build_index(compose_blocks(blocks, weights), index_spec, ids=np.arange(len(df))),
+        blocks=BlockScorer(blocks), instructors=InstructorTable(columns),
+        partitions=ConstraintPartitions(columns, config.FILTER_FIELDS, config.FILTER_RELAXATION_ORDER))
+    recommender.status = 'ready'
+    recommender._ready.set()
+    return recommender
@@ -0,0 +1,135 @@
+import sys
+import os
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.api.block_scorer import BlockScorer, resolve_weights
+from app.tarumbeta_ml.src.api.explanations import match_reasons, recommendation_strength
+from app.tarumbeta_ml.src.features.query_vectorizer import BLOCKS, CAT_COLS, NUM_COLS, compose_blocks, split_blocks
+from conftest import WEIGHTS, _random_instructors, _recommender, _setup, _text
+
+def test_blocks_round_trip_through_weighted_vectors():
+    _, vectorizer, blocks, _ = _setup()
+    assert not blocks['numerical'][0].any()
+    vectors = compose_blocks(blocks, WEIGHTS)
+    recovered = split_blocks(vectors, vectorizer.cat_dim, vectorizer.num_dim)
+    for block in BLOCKS:
+        np.testing.assert_allclose(recovered[block], blocks[block], atol=1e-6)
+
+def test_scores_match_recomposed_vectors_for_any_weights():
+    _, vectorizer, blocks, query_blocks = _setup()
+    scorer = BlockScorer(blocks)
+    ids = np.arange(5, 40)
+    for weights in (WEIGHTS, {'categorical': 0.5, 'numerical': 0.2, 'text': 0.7},
+                    {'categorical': 1.0, 'numerical': 0.0, 'text': 0.0}):
+        expected = compose_blocks(query_blocks, weights) @ compose_blocks(blocks, weights)[ids].T
+        np.testing.assert_allclose(scorer.scores(query_blocks, weights, ids), expected, atol=1e-5)
+
+    # Default weights reproduce the vectorizer's (index) layout
+    df = _random_instructors()
+    np.testing.assert_allclose(scorer.vectors(WEIGHTS), vectorizer.transform(
+        df.to_dict('records'), _text(len(df), 1), num_values=df[NUM_COLS].to_numpy()), atol=1e-6)
+
+def test_resolve_weights():
+    assert resolve_weights(None, WEIGHTS) == WEIGHTS
+    assert resolve_weights({'text': 0.5}, WEIGHTS) == dict(WEIGHTS, text=0.5)
+    assert resolve_weights((('text', 0.5),), WEIGHTS) == dict(WEIGHTS, text=0.5)
+    # Client-supplied: anything but block -> number is a ValueError (never an AttributeError / TypeError)
+    for bad in ({'style': 1.0}, {'text': -1}, {'categorical': 0, 'numerical': 0, 'text': 0},
+                ['text', 0.3], 'text', 0.3, {'text': '0.3'}, {'text': [1]}, {'text': True}, {'text': float('nan')}):
+        try:
+            resolve_weights(bad, WEIGHTS)
+            assert False, f"expected ValueError for {bad}"
+        except ValueError:
+            pass
+
+def test_query_time_weights_match_an_index_built_with_them():
+    df, vectorizer, blocks, _ = _setup()
+    override = {'categorical': 0.4, 'numerical': 0.1, 'text': 0.9}
+    serving = _recommender(df, vectorizer, blocks, WEIGHTS)
+    rebuilt = _recommender(df, vectorizer, blocks, override)
+    learners = [dict(row, bio_keywords=f"bio {i}") for i, row in enumerate(df.sample(6, random_state=4).to_dict('records'))]
+
+    for filtered in (False, True):
+        got = serving.recommend_batch(learners, top_k=5, filtered=filtered, weights=override)
+        expected = rebuilt.recommend_batch(learners, top_k=5, filtered=filtered)
+        for g, e in zip(got, expected):
+            assert [r['instructor_id'] for r in g] == [r['instructor_id'] for r in e]
+            np.testing.assert_allclose([r['match_score'] for r in g], [r['match_score'] for r in e], atol=1e-3)
+
+    # A sweep: one scoring pass, same answer as each weighting on its own
+    grid = [WEIGHTS, override, {'text': 0.0}]
+    sweep = serving.sweep_weights(learners[0], grid, top_k=5)
+    for weights, results in zip(grid, sweep):
+        assert [r['instructor_id'] for r in results] == \
+               [r['instructor_id'] for r in serving.recommend(learners[0], top_k=5, weights=weights)]
+
+def test_explained_results_break_down_their_scores():
+    df, vectorizer, blocks, _ = _setup()
+    serving = _recommender(df, vectorizer, blocks, WEIGHTS)
+    learners = [dict(row, bio_keywords=f"bio {i}") for i, row in enumerate(df.sample(4, random_state=5).to_dict('records'))]
+
+    for filtered, weights in ((False, None), (True, None), (False, {'text': 0.6})):
+        plain = serving.recommend_batch(learners, top_k=5, filtered=filtered, weights=weights)
+        explained = serving.recommend_batch(learners, top_k=5, filtered=filtered, weights=weights, explain=True)
+        for learner, p, e in zip(learners, plain, explained):
+            # Same hits; the breakdown only adds a field
+            assert [r['instructor_id'] for r in p] == [r['instructor_id'] for r in e]
+            for r in e:
+                b = r['score_breakdown']
+                assert abs(b['categorical'] + b['numerical'] + b['text'] - r['match_score']) < 1e-3
+                instructor = df.iloc[int(r['instructor_id'][3:])]
+                assert b['matched_fields'] == [f for f in CAT_COLS if instructor[f] == learner[f]]
+                reasons = match_reasons(b, learner)
+                assert (f"Teaches {learner['instrument_type']}" in reasons) == ('instrument_type' in b['matched_fields'])
+                if len(b['matched_fields']) == len(CAT_COLS):
+                    assert recommendation_strength(b) == "Excellent Match"
+
+def test_explained_scores_are_exact_under_a_quantized_index():
+    df, vectorizer, blocks, _ = _setup()
+    serving = _recommender(df, vectorizer, blocks, WEIGHTS, {'type': 'ivf_sq8', 'nlist': 1})
+    learners = [dict(row, bio_keywords=f"bio {i}") for i, row in enumerate(df.sample(4, random_state=7).to_dict('records'))]
+
+    plain = serving.recommend_batch(learners, top_k=5)
+    explained = serving.recommend_batch(learners, top_k=5, explain=True)
+    query_blocks = serving._query_blocks(serving._state, learners)
+    for i, (p, e) in enumerate(zip(plain, explained)):
+        assert [r['instructor_id'] for r in p] == [r['instructor_id'] for r in e] # The SQ8 search's hits
+        ids = [int(r['instructor_id'][3:]) for r in e]
+        exact = serving.blocks.scores({b: query_blocks[b][i:i + 1] for b in BLOCKS}, WEIGHTS, ids)[0]
+        # match_score is the exact score its breakdown explains, not the SQ8 estimate
+        np.testing.assert_allclose([r['match_score'] for r in e], exact, atol=1e-4)
+        for r in e:
+            b = r['score_breakdown']
+            assert abs(b['categorical'] + b['numerical'] + b['text'] - r['match_score']) < 2e-4
+
+def test_candidate_restricted_search_ranks_exactly_the_candidates():
+    df, vectorizer, blocks, _ = _setup()
+    df['profile_id'] = [f"p{i}" for i in range(len(df))]
+    serving = _recommender(df, vectorizer, blocks, WEIGHTS)
+    learners = [dict(row, bio_keywords=f"bio {i}") for i, row in enumerate(df.sample(3, random_state=6).to_dict('records'))]
+    candidates = [f"p{i}" for i in (3, 17, 29, 41, 58)] + ['not-indexed']
+
+    got = serving.recommend_batch(learners, top_k=10, candidates=candidates)
+    expected = serving.blocks.scores(serving._query_blocks(serving._state, learners), WEIGHTS, [3, 17, 29, 41, 58])
+    for results, scores in zip(got, expected):
+        # Every indexed candidate, nobody else, in score order
+        assert sorted(r['profile_id'] for r in results) == sorted(candidates[:-1])
+        np.testing.assert_allclose([r['match_score'] for r in results], np.sort(scores)[::-1], atol=1e-4)
+
+    # Rows with an 'id' (as InstructorMatcher passes them) work too; top_k still applies
+    top = serving.recommend(learners[0], top_k=2, candidates=[{'id': c} for c in candidates])
+    assert [r['profile_id'] for r in top] == [r['profile_id'] for r in got[0][:2]]
+    assert serving.recommend(learners[0], candidates=['not-indexed']) == []
+
+if __name__ == "__main__":
+    test_blocks_round_trip_through_weighted_vectors()
+    test_scores_match_recomposed_vectors_for_any_weights()
+    test_resolve_weights()
+    test_query_time_weights_match_an_index_built_with_them()
+    test_explained_results_break_down_their_scores()
+    test_explained_scores_are_exact_under_a_quantized_index()
+    test_candidate_restricted_search_ranks_exactly_the_candidates()
+    print("✅ Block scorer tests passed!")
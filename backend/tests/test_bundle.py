@@ -0,0 +1,273 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.utils import config
+from app.tarumbeta_ml.src.api.inference_semantic import SemanticRecommender
+from app.tarumbeta_ml.src.api.index_updater import IndexUpdater
+from app.tarumbeta_ml.src.features.query_vectorizer import CAT_COLS, NUM_COLS, CompiledQueryVectorizer, compose_blocks
+from app.tarumbeta_ml.src.model.bundle import (BundleError, bundle_lock, bundle_path, current_version,
+                                               journal_length, loose_blocks, package_artifacts, publish_bundle,
+                                               read_manifest, write_bundle)
+from app.tarumbeta_ml.src.model.index_spec import build_index, save_spec
+from conftest import WEIGHTS, _TextEncoder, _blocks, _instructors, _learner, _vectorizer
+
+TEXT_ENCODER = {'backend': 'torch', 'model': 'test-encoder', 'dimension': 8}
+
+def _write(bundles_dir, df, vectorizer=None):
+    vectorizer = vectorizer or _vectorizer(df)
+    blocks = _blocks(df, vectorizer, _TextEncoder().encode(df['bio_keywords'].tolist()))
+    index = build_index(compose_blocks(blocks, WEIGHTS), {'type': 'flat'}, ids=np.arange(len(df)))
+    return write_bundle(index, {'type': 'flat'}, vectorizer.to_dict(), blocks, df, TEXT_ENCODER, WEIGHTS,
+                        bundles_dir=bundles_dir)
+
+def _serving(bundles_dir):
+    """ A recommender on the published bundle, with the stub encoder standing in for the torch one """
+    recommender = SemanticRecommender(autoload=False, bundles_dir=bundles_dir)
+    manifest = read_manifest(bundle_path(current_version(bundles_dir), bundles_dir))
+    recommender.publish(bert_model=_TextEncoder(), manifest=manifest) # Same encoder spec: reused on load
+    recommender.reload()
+    return recommender
+
+EVE = ('Eve', 'Nairobi', 'Drums', 'Advanced', 'Swahili', 25, 4.5, 'afro beats')
+
+def test_write_verify_and_detect_corruption(tmp_path):
+    bundles_dir = str(tmp_path)
+    version = _write(bundles_dir, _instructors())
+    assert current_version(bundles_dir) is None # Written, not live
+
+    manifest = read_manifest(bundle_path(version, bundles_dir))
+    assert manifest['dims'] == {'categorical': 10, 'numerical': 2, 'text': 8, 'total': 20}
+    assert manifest['n_instructors'] == 4 and manifest['weights'] == WEIGHTS
+    assert not any(name.endswith('.pkl') for name in manifest['files'])
+
+    publish_bundle(version, bundles_dir)
+    assert current_version(bundles_dir) == version
+
+    with open(os.path.join(bundle_path(version, bundles_dir), 'blocks', 'text.npy'), 'r+b') as f:
+        f.seek(-4, os.SEEK_END)
+        f.write(b'\x00\x00\x80\x7f')
+    try:
+        read_manifest(bundle_path(version, bundles_dir))
+        assert False, "expected BundleError"
+    except BundleError as e:
+        assert 'text.npy' in str(e)
+
+def test_prune_never_removes_the_live_bundle(tmp_path):
+    bundles_dir = str(tmp_path)
+    versions = [_write(bundles_dir, _instructors()) for _ in range(4)]
+    publish_bundle(versions[0], bundles_dir, keep=2)
+    assert sorted(os.listdir(bundles_dir)) == sorted(['CURRENT', versions[0]] + versions[2:])
+
+def test_processors_round_trip():
+    df = _instructors()
+    vectorizer = _vectorizer(df)
+    restored = CompiledQueryVectorizer.from_dict(vectorizer.to_dict(), weights=WEIGHTS)
+    profiles = df.to_dict('records') + [{}]
+    text = _TextEncoder().encode([p.get('bio_keywords', '') for p in profiles])
+    assert np.array_equal(vectorizer.transform(profiles, text), restored.transform(profiles, text))
+
+def test_hot_swap_keeps_in_flight_state(tmp_path):
+    bundles_dir = str(tmp_path)
+    v1 = _write(bundles_dir, _instructors())
+    publish_bundle(v1, bundles_dir)
+    recommender = _serving(bundles_dir)
+    assert recommender.version == v1 and recommender.is_ready()
+    before = recommender._state # What a request that started before the swap holds
+
+    v2 = _write(bundles_dir, _instructors(extra=[EVE]))
+    publish_bundle(v2, bundles_dir)
+    assert recommender.reload() is True
+    assert recommender.reload() is False
+    assert recommender.recommend(_learner(), top_k=1)[0]['name'] == 'Eve'
+    assert recommender.last_reload['from'] == v1 and recommender.last_reload['to'] == v2
+
+    assert before.index.ntotal == 4
+    ann = before.blocks.vectors(WEIGHTS, [0])
+    assert before.instructors.format_rows(*before.index.search(ann, 1))[0][0]['name'] == 'Ann'
+
+def test_inconsistent_bundle_is_refused(tmp_path):
+    bundles_dir = str(tmp_path)
+    publish_bundle(_write(bundles_dir, _instructors()), bundles_dir)
+    recommender = _serving(bundles_dir)
+    live = recommender.version
+
+    # A bundle indexed with one city fewer, but shipping the live (wider) processors
+    df = _instructors()
+    bad = _write(bundles_dir, df[df['location'] == 'Nairobi'])
+    with open(os.path.join(bundle_path(live, bundles_dir), 'processors.json')) as f:
+        processors = f.read()
+    with open(os.path.join(bundle_path(bad, bundles_dir), 'processors.json'), 'w') as f:
+        f.write(processors)
+
+    for verify, expected in ((True, 'Checksum mismatch'), (False, 'inconsistent')):
+        config.BUNDLE_VERIFY_CHECKSUMS = verify
+        try:
+            recommender.reload(bad)
+            assert False, "expected BundleError"
+        except BundleError as e:
+            assert expected in str(e)
+        finally:
+            config.BUNDLE_VERIFY_CHECKSUMS = True
+    assert recommender.version == live and recommender.reload_error.startswith(bad)
+
+def _worker(bundles_dir, compact_fraction=10):
+    """ A serving worker: recommender plus its index updater, caught up as after a load """
+    recommender = _serving(bundles_dir)
+    updater = IndexUpdater(recommender, compact_fraction=compact_fraction)
+    updater.sync()
+    return recommender, updater
+
+def test_updates_journal_a_delta_on_the_live_bundle(tmp_path):
+    bundles_dir = str(tmp_path / 'bundles')
+    live = _write(bundles_dir, _instructors())
+    publish_bundle(live, bundles_dir)
+    recommender, updater = _worker(bundles_dir)
+    early_worker, early_updater = _worker(bundles_dir)
+
+    row = dict(zip(_instructors().columns, EVE), profile_id='uuid-1')
+    assert updater.upsert([row]) == [4]
+    # One small delta, no new bundle: nobody reloads anything
+    assert current_version(bundles_dir) == recommender.version == live
+    assert journal_length(live, bundles_dir) == 1
+    read_manifest(bundle_path(live, bundles_dir)) # The journal is outside the checksummed files
+    # The same values again: nothing to encode or journal, same key
+    assert updater.upsert([row]) == [4] and journal_length(live, bundles_dir) == 1
+
+    # A worker that was already serving replays it in place (its watch tick), a new one after its load
+    assert early_updater.sync() == 1 and early_worker.version == live
+    late_worker, _ = _worker(bundles_dir)
+    for worker in (early_worker, late_worker):
+        assert worker.recommend(_learner(), top_k=1)[0]['profile_id'] == 'uuid-1'
+        assert worker.index.ntotal == 5
+
+def test_full_journal_and_compaction_fold_into_a_bundle(tmp_path):
+    bundles_dir = str(tmp_path / 'bundles')
+    live = _write(bundles_dir, _instructors())
+    publish_bundle(live, bundles_dir)
+    recommender, updater = _worker(bundles_dir)
+    eve = dict(zip(_instructors().columns, EVE), profile_id='uuid-1')
+
+    saved = config.INDEX_JOURNAL_MAX
+    config.INDEX_JOURNAL_MAX = 1
+    try:
+        updater.upsert([eve])
+        updater.upsert([dict(eve, name='Fay', profile_id='uuid-2')]) # Journal full: the next bundle
+    finally:
+        config.INDEX_JOURNAL_MAX = saved
+    folded = current_version(bundles_dir)
+    assert folded != live and recommender.version == folded and journal_length(folded, bundles_dir) == 0
+    assert recommender.manifest['changes_since_build'] == 2 and recommender.index.ntotal == 6
+
+    # A compaction is a fresh build every worker hot-swaps to, not a delta
+    updater.compact_fraction = 0.1
+    updater.remove(['uuid-2'])
+    compacted = current_version(bundles_dir)
+    assert compacted != folded and journal_length(compacted, bundles_dir) == 0
+    reader, reader_updater = _worker(bundles_dir)
+    assert reader.manifest['changes_since_build'] == 0 == reader_updater.changes_since_build
+    assert reader.index.ntotal == 5 and updater.rebuilds == 1
+
+def test_workers_updating_one_bundles_dir_lose_no_update(tmp_path):
+    import threading
+    bundles_dir = str(tmp_path / 'bundles')
+    live = _write(bundles_dir, _instructors())
+    publish_bundle(live, bundles_dir)
+    (worker_a, updater_a), (worker_b, updater_b) = _worker(bundles_dir), _worker(bundles_dir) # No watch ticks
+
+    eve = dict(zip(_instructors().columns, EVE), profile_id='uuid-1')
+    fay = dict(eve, name='Fay', location='Mombasa', profile_id='uuid-2')
+    assert updater_a.upsert([eve]) == [4]
+    # b is behind: it replays a's delta first (a new key, not a's key 4 again)
+    assert updater_b.upsert([fay]) == [5]
+    assert worker_b.index.ntotal == 6
+
+    # A third worker sees both updates, and the compaction count covers both workers' changes
+    reader, reader_updater = _worker(bundles_dir)
+    assert reader.recommend(_learner(), top_k=1)[0]['profile_id'] == 'uuid-1'
+    assert reader.recommend(_learner(location='Mombasa'), top_k=1)[0]['profile_id'] == 'uuid-2'
+    assert reader_updater.changes_since_build == 2 and reader.index.ntotal == 6
+
+    # Writers wait for the bundles_dir lock (here held as another process would hold it)
+    with bundle_lock(bundles_dir):
+        writer = threading.Thread(target=updater_a.remove, args=(['uuid-2'],))
+        writer.start()
+        writer.join(0.5)
+        assert writer.is_alive() and journal_length(live, bundles_dir) == 2
+    writer.join()
+    assert worker_a.index.ntotal == 5 and journal_length(live, bundles_dir) == 3
+
+def test_loose_blocks_are_the_exact_step5_files(tmp_path):
+    df = _instructors()
+    vectorizer = _vectorizer(df)
+    blocks = _blocks(df, vectorizer, _TextEncoder().encode(df['bio_keywords'].tolist()))
+    # A text weight of 0: the index vectors no longer carry the text block at all
+    index = build_index(compose_blocks(blocks, dict(WEIGHTS, text=0.0)), {'type': 'flat'}, ids=np.arange(len(df)))
+    saved = config.SEMANTIC_MODELS
+    config.SEMANTIC_MODELS = str(tmp_path)
+    try:
+        assert not loose_blocks(index, vectorizer)['text'].any() # Recovered from the index: lost
+        os.makedirs(tmp_path / 'instructors_blocks')
+        for block, matrix in blocks.items():
+            np.save(tmp_path / 'instructors_blocks' / f"{block}.npy", matrix)
+        exact = loose_blocks(index, vectorizer, mmap_mode='r')
+        for block in blocks:
+            assert isinstance(exact[block], np.memmap) # Shared page cache, not a per-worker copy
+            np.testing.assert_array_equal(exact[block], blocks[block])
+        # Blocks that don't cover the index's keys (stale Step 5 output) are not used
+        np.save(tmp_path / 'instructors_blocks' / 'text.npy', blocks['text'][:2])
+        assert not loose_blocks(index, vectorizer)['text'].any()
+    finally:
+        config.SEMANTIC_MODELS = saved
+
+def test_package_keeps_the_exact_blocks_of_a_quantized_index(tmp_path):
+    import pickle
+    import faiss
+    df = pd.concat([_instructors()] * 10, ignore_index=True)
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore').fit(df[CAT_COLS])
+    scaler = MinMaxScaler().fit(df[NUM_COLS])
+    vectorizer = CompiledQueryVectorizer(encoder, scaler)
+    blocks = _blocks(df, vectorizer, _TextEncoder().encode(df['bio_keywords'].tolist()))
+    blocks = {block: matrix.astype('float32') for block, matrix in blocks.items()} # As Step 5 saves them
+    spec = {'type': 'ivf_sq8', 'nlist': 1}
+    index = build_index(compose_blocks(blocks, WEIGHTS), spec, ids=np.arange(len(df)))
+    os.makedirs(tmp_path / 'instructors_blocks')
+    for block, matrix in blocks.items():
+        np.save(tmp_path / 'instructors_blocks' / f"{block}.npy", matrix)
+    faiss.write_index(index, str(tmp_path / 'faiss_index.bin'))
+    save_spec(spec, str(tmp_path / 'faiss_index.bin'))
+    for name, fitted in (('encoder.pkl', encoder), ('scaler.pkl', scaler)):
+        with open(tmp_path / name, 'wb') as f:
+            pickle.dump(fitted, f)
+    df.to_csv(tmp_path / 'instructors_processed.csv', index=False)
+
+    saved = config.SEMANTIC_MODELS, config.DATA_PROCESSED, config.TEXT_ENCODER_BACKEND
+    config.SEMANTIC_MODELS = config.DATA_PROCESSED = str(tmp_path)
+    config.TEXT_ENCODER_BACKEND = 'torch'
+    try:
+        bundles_dir = str(tmp_path / 'bundles')
+        version = package_artifacts(publish=False, bundles_dir=bundles_dir)
+    finally:
+        config.SEMANTIC_MODELS, config.DATA_PROCESSED, config.TEXT_ENCODER_BACKEND = saved
+    for block, matrix in blocks.items(): # Not SQ8-decoded: bit-for-bit what Step 5 wrote
+        np.testing.assert_array_equal(np.load(os.path.join(bundle_path(version, bundles_dir), 'blocks',
+                                                           f"{block}.npy")), matrix)
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_processors_round_trip()
+    for test in (test_write_verify_and_detect_corruption, test_prune_never_removes_the_live_bundle,
+                 test_hot_swap_keeps_in_flight_state, test_inconsistent_bundle_is_refused,
+                 test_updates_journal_a_delta_on_the_live_bundle, test_full_journal_and_compaction_fold_into_a_bundle,
+                 test_workers_updating_one_bundles_dir_lose_no_update,
+                 test_loose_blocks_are_the_exact_step5_files,
+                 test_package_keeps_the_exact_blocks_of_a_quantized_index):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✅ Bundle tests passed!")
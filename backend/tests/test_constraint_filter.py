@@ -0,0 +1,73 @@
+import sys
+import os
+import pandas as pd
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.api.constraint_filter import ConstraintPartitions
+
+FIELDS = ['location', 'instrument_type', 'skill_level', 'teaching_language']
+RELAXATION = ['teaching_language', 'skill_level', 'location']
+
+def _instructors():
+    rows = [
+        ('Nairobi', 'Guitar', 'Beginner', 'English'),
+        ('Nairobi', 'Guitar', 'Beginner', 'English'),
+        ('Nairobi', 'Guitar', 'Beginner', 'Swahili'),
+        ('Nairobi', 'Guitar', 'Advanced', 'English'),
+        ('Mombasa', 'Guitar', 'Beginner', 'English'),
+        ('Mombasa', 'Piano', 'Beginner', 'English'),
+    ]
+    return pd.DataFrame(rows, columns=FIELDS)
+
+def _learner(**overrides):
+    profile = {'location': 'Nairobi', 'instrument_type': 'Guitar',
+               'skill_level': 'Beginner', 'teaching_language': 'English'}
+    profile.update(overrides)
+    return profile
+
+def test_strict_cell():
+    partitions = ConstraintPartitions(_instructors(), FIELDS, RELAXATION)
+    ids, fields = partitions.candidates(_learner(), k=2)
+    assert list(ids) == [0, 1]
+    assert fields == tuple(FIELDS)
+
+def test_relaxation_order():
+    partitions = ConstraintPartitions(_instructors(), FIELDS, RELAXATION)
+
+    # Drop language first...
+    ids, fields = partitions.candidates(_learner(), k=3)
+    assert list(ids) == [0, 1, 2]
+    assert fields == ('location', 'instrument_type', 'skill_level')
+
+    # ...then skill...
+    ids, fields = partitions.candidates(_learner(), k=4)
+    assert list(ids) == [0, 1, 2, 3]
+    assert fields == ('location', 'instrument_type')
+
+    # ...then location; the instrument is kept longest
+    ids, fields = partitions.candidates(_learner(), k=5)
+    assert list(ids) == [0, 1, 2, 3, 4]
+    assert fields == ('instrument_type',)
+
+    # Nothing left to relax -> search everything
+    ids, fields = partitions.candidates(_learner(), k=6)
+    assert ids is None and fields == ()
+
+def test_unconstrained_fields_are_skipped():
+    partitions = ConstraintPartitions(_instructors(), FIELDS, RELAXATION)
+    ids, fields = partitions.candidates(_learner(skill_level='all', teaching_language=None), k=4)
+    assert list(ids) == [0, 1, 2, 3]
+    assert fields == ('location', 'instrument_type')
+
+    # Location + language with skill skipped is not a precomputed level
+    ids, fields = partitions.candidates(_learner(skill_level='all', teaching_language='Swahili'), k=1)
+    assert list(ids) == [2]
+    assert fields == ('location', 'instrument_type', 'teaching_language')
+
+if __name__ == "__main__":
+    test_strict_cell()
+    test_relaxation_order()
+    test_unconstrained_fields_are_skipped()
+    print("✅ Constraint filter tests passed!")
@@ -0,0 +1,56 @@
+import sys
+import os
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.api.diversity import mmr_select
+from conftest import WEIGHTS, _recommender, _setup
+
+def _unit(rows):
+    rows = np.asarray(rows, dtype='float32')
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+def test_mmr_prefers_distinct_candidates():
+    vectors = _unit([[1, 0, 0], [1, 0.01, 0], [0, 1, 0], [0, 0, 1]])
+    relevance = np.array([0.9, 0.89, 0.8, 0.5])
+
+    # Pure relevance is plain top-k; the near-copy of the first pick drops below a distinct one
+    assert mmr_select(relevance, vectors, 3, lambda_=1.0).tolist() == [0, 1, 2]
+    assert mmr_select(relevance, vectors, 3, lambda_=0.7).tolist() == [0, 2, 3]
+    # Above the duplicate threshold it is suppressed outright, so the pool can run out
+    duplicates = vectors[:2] @ vectors[:2].T >= 0.98
+    assert mmr_select(relevance[:2], vectors[:2], 2, duplicates=duplicates).tolist() == [0]
+
+def test_mmr_suppresses_shared_identities():
+    vectors = _unit(np.eye(4))
+    relevance = np.array([0.9, 0.8, 0.7, 0.6])
+    assert mmr_select(relevance, vectors, 4, identities=np.array([0, 0, 1, 1])).tolist() == [0, 2]
+    assert len(mmr_select(relevance[:0], vectors[:0], 5)) == 0
+
+def test_diverse_recommendations_have_distinct_names():
+    df, vectorizer, blocks, _ = _setup()
+    df['name'] = [f"Instructor {i % 20}" for i in range(len(df))] # Every name three times
+    serving = _recommender(df, vectorizer, blocks, WEIGHTS)
+    learners = [dict(row, bio_keywords=f"bio {i}") for i, row in enumerate(df.sample(4, random_state=8).to_dict('records'))]
+
+    for filtered in (False, True):
+        plain = serving.recommend_batch(learners, top_k=5, filtered=filtered)
+        diverse = serving.recommend_batch(learners, top_k=5, filtered=filtered, diverse=True)
+        for ranked, picked in zip(plain, diverse):
+            names = [r['name'] for r in picked]
+            assert len(names) == 5 and len(set(n.lower() for n in names)) == 5
+            # Scores stay the model's relevance scores, led by the best of the pool
+            assert all(r['match_score'] <= picked[0]['match_score'] for r in picked)
+            if not filtered:
+                assert picked[0] == ranked[0]
+            else:
+                # The cell is relaxed until it holds the whole pool
+                assert len(picked[0].get('matched_on', [])) <= len(ranked[0].get('matched_on', []))
+
+if __name__ == "__main__":
+    test_mmr_prefers_distinct_candidates()
+    test_mmr_suppresses_shared_identities()
+    test_diverse_recommendations_have_distinct_names()
+    print("✅ Diversity tests passed!")
@@ -0,0 +1,108 @@
+import sys
+import os
+import threading
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.api.embedding_cache import EmbeddingCache
+
+class FakeEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(t), i] for i, t in enumerate(texts)], dtype='float32')
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_hit_skips_encoder():
+    cache = EmbeddingCache(max_size=10, lowercase=True) # An uncased encoder's cache
+    encoder = FakeEncoder()
+
+    first = cache.get_or_encode(['Chords  fingerpicking ', 'Jazz'], encoder.encode)
+    # Same texts modulo case/whitespace must not reach the encoder again
+    second = cache.get_or_encode(['chords fingerpicking', 'JAZZ'], encoder.encode)
+
+    assert len(encoder.calls) == 1
+    np.testing.assert_array_equal(first, second)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 2)
+
+def test_case_is_part_of_the_key_by_default():
+    # A cased encoder embeds "Jazz" and "jazz" differently: they must not share an entry
+    cache = EmbeddingCache(max_size=10)
+    encoder = FakeEncoder()
+
+    cache.get_or_encode(['Jazz  piano'], encoder.encode)
+    cache.get_or_encode(['jazz piano', 'Jazz piano '], encoder.encode)
+
+    assert encoder.calls == [['Jazz  piano'], ['jazz piano']] # Whitespace still doesn't matter
+    assert cache.stats()['size'] == 2
+
+def test_duplicates_in_batch_encoded_once():
+    cache = EmbeddingCache(max_size=10, lowercase=True)
+    encoder = FakeEncoder()
+
+    out = cache.get_or_encode(['Rock', 'pop', 'rock '], encoder.encode)
+
+    assert encoder.calls == [['Rock', 'pop']] # The first original text of each key
+    assert out.shape == (3, 2)
+    np.testing.assert_array_equal(out[0], out[2])
+
+def test_lru_eviction():
+    cache = EmbeddingCache(max_size=2)
+    encoder = FakeEncoder()
+
+    cache.get_or_encode(['a', 'b'], encoder.encode)
+    cache.get('a')                                 # 'b' is now least recently used
+    cache.get_or_encode(['c'], encoder.encode)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.stats()['evictions'] == 1
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = EmbeddingCache(max_size=10, ttl_seconds=60, clock=clock)
+    encoder = FakeEncoder()
+
+    cache.get_or_encode(['hobby'], encoder.encode)
+    clock.now = 61
+    cache.get_or_encode(['hobby'], encoder.encode)
+
+    assert len(encoder.calls) == 2
+    assert cache.stats()['expirations'] == 1
+
+def test_concurrent_access():
+    cache = EmbeddingCache(max_size=50)
+    encoder = FakeEncoder()
+    texts = [f"goal {i % 20}" for i in range(200)]
+
+    def worker():
+        for t in texts:
+            cache.get_or_encode([t], encoder.encode)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 8 * len(texts)
+    assert stats['size'] == 20
+
+if __name__ == "__main__":
+    test_hit_skips_encoder()
+    test_case_is_part_of_the_key_by_default()
+    test_duplicates_in_batch_encoded_once()
+    test_lru_eviction()
+    test_ttl_expiry()
+    test_concurrent_access()
+    print("✅ Embedding cache tests passed!")
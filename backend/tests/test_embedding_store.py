@@ -0,0 +1,139 @@
+import sys
+import os
+import json
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.features.embedding_store import (KEYS_FILE, META_FILE, VECTORS_FILE, EmbeddingStore,
+                                                           open_store, store_path)
+
+class CountingEncoder:
+    """ Deterministic 8-d embeddings; records every text it is asked to encode """
+    def __init__(self):
+        self.seen = []
+
+    def encode(self, texts):
+        self.seen.extend(texts)
+        return np.array([np.random.default_rng(sum(map(ord, t))).standard_normal(8) for t in texts], dtype='float32')
+
+def test_encodes_each_unseen_text_once(tmp_path):
+    bert = CountingEncoder()
+    store = EmbeddingStore(str(tmp_path / 'store'), 'torch:test')
+    first = store.encode(['Jazz Piano', ' Jazz  Piano', 'Benga Guitar', 'Jazz Piano'], bert.encode)
+    assert bert.seen == ['Jazz Piano', 'Benga Guitar'] # Deduped on the normalized key; originals encoded
+    assert first.shape == (4, 8) and first.dtype == np.float32
+    np.testing.assert_array_equal(first[0], first[1])
+
+    second = store.encode(['Benga Guitar', 'Gospel Voice'], bert.encode)
+    assert bert.seen[2:] == ['Gospel Voice']
+    np.testing.assert_array_equal(second[0], first[2])
+    report = store.report()
+    assert (report['texts'], report['unique'], report['stored'], report['encoded'], report['size']) == (6, 4, 1, 3, 3)
+    assert report['saved_seconds'] >= 0
+
+def test_case_and_encoder_are_part_of_the_key(tmp_path):
+    bert = CountingEncoder()
+    store = EmbeddingStore(str(tmp_path / 'store'), 'torch:test')
+    cased = store.encode(['Jazz Piano', 'jazz piano'], bert.encode)
+    assert bert.seen == ['Jazz Piano', 'jazz piano'] # A cased encoder embeds them differently
+    assert not np.array_equal(cased[0], cased[1])
+    # Rows copied into another encoder's directory never match its lookups
+    other = tmp_path / 'other'
+    other.mkdir()
+    for name in (KEYS_FILE, VECTORS_FILE, META_FILE):
+        (other / name).write_bytes((tmp_path / 'store' / name).read_bytes())
+    meta = json.loads((other / META_FILE).read_text())
+    (other / META_FILE).write_text(json.dumps(dict(meta, model_id='onnx:test')))
+    EmbeddingStore(str(other), 'onnx:test', readonly=True).encode(['Jazz Piano'], bert.encode)
+    assert bert.seen[2:] == ['Jazz Piano']
+
+def test_older_key_format_is_never_served(tmp_path):
+    bert = CountingEncoder()
+    path = store_path('torch:test-model', str(tmp_path))
+    open_store('torch', 'test-model', root=str(tmp_path)).encode(['Jazz Piano'], bert.encode)
+    # A store written before keys held the model id and case (no 'key_format' in meta.json)
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    del meta['key_format']
+    with open(os.path.join(path, META_FILE), 'w') as f:
+        json.dump(meta, f)
+
+    assert open_store('torch', 'test-model', root=str(tmp_path), readonly=True) is None
+    try:
+        EmbeddingStore(path, 'torch:test-model', readonly=True)
+        raise AssertionError("a reader must refuse an older key format")
+    except ValueError:
+        pass
+    writer = open_store('torch', 'test-model', root=str(tmp_path))
+    assert len(writer) == 0 and not os.path.exists(os.path.join(path, VECTORS_FILE))
+    writer.encode(['Jazz Piano'], bert.encode)
+    assert bert.seen == ['Jazz Piano', 'Jazz Piano'] and len(open_store('torch', 'test-model', root=str(tmp_path))) == 1
+
+def test_reopened_store_serves_without_encoding(tmp_path):
+    bert = CountingEncoder()
+    texts = ['Jazz Piano', 'Benga Guitar']
+    expected = open_store('torch', 'test-model', root=str(tmp_path)).encode(texts, bert.encode)
+
+    reader = open_store('torch', 'test-model', root=str(tmp_path), readonly=True)
+    np.testing.assert_array_equal(reader.encode(texts, bert.encode), expected)
+    assert len(bert.seen) == 2 and reader.report()['encoded'] == 0
+    # Another encoder never sees these embeddings; a readonly reader never creates a store
+    assert open_store('torch', 'other-model', root=str(tmp_path), readonly=True) is None
+
+def test_readonly_store_does_not_write(tmp_path):
+    bert = CountingEncoder()
+    EmbeddingStore(str(tmp_path / 'store'), 'torch:test').encode(['Jazz Piano'], bert.encode)
+    reader = EmbeddingStore(str(tmp_path / 'store'), 'torch:test', readonly=True)
+    reader.encode(['Flute Basics'], bert.encode)
+    reader.encode(['Flute Basics'], bert.encode)
+    assert bert.seen == ['Jazz Piano', 'Flute Basics', 'Flute Basics']
+    assert len(EmbeddingStore(str(tmp_path / 'store'), 'torch:test')) == 1
+
+def test_float16_store_and_model_mismatch(tmp_path):
+    bert = CountingEncoder()
+    path = str(tmp_path / 'store')
+    fresh = EmbeddingStore(path, 'torch:test', dtype='float16').encode(['Jazz Piano'], bert.encode)
+    stored = EmbeddingStore(path, 'torch:test').encode(['Jazz Piano'], bert.encode)
+    assert os.path.getsize(os.path.join(path, VECTORS_FILE)) == 8 * 2
+    np.testing.assert_allclose(stored, fresh, atol=1e-2)
+    try:
+        EmbeddingStore(path, 'onnx:test')
+        raise AssertionError("a store must refuse another encoder's model id")
+    except ValueError:
+        pass
+
+def test_interrupted_append_is_dropped(tmp_path):
+    bert = CountingEncoder()
+    path = str(tmp_path / 'store')
+    EmbeddingStore(path, 'torch:test').encode(['Jazz Piano', 'Benga Guitar'], bert.encode)
+    # A crash after the vectors were written but before their keys
+    with open(os.path.join(path, VECTORS_FILE), 'ab') as f:
+        f.write(np.ones(8 * 3, dtype='float32').tobytes())
+    with open(os.path.join(path, KEYS_FILE), 'ab') as f:
+        f.write(b'x' * 5)
+
+    store = EmbeddingStore(path, 'torch:test')
+    assert len(store) == 2
+    store.encode(['Gospel Voice', 'Jazz Piano'], bert.encode)
+    assert bert.seen[2:] == ['Gospel Voice']
+    assert os.path.getsize(os.path.join(path, VECTORS_FILE)) == 3 * 8 * 4
+    np.testing.assert_array_equal(EmbeddingStore(path, 'torch:test').encode(['Gospel Voice'], bert.encode)[0],
+                                  CountingEncoder().encode(['Gospel Voice'])[0])
+
+def test_store_path_is_per_model(tmp_path):
+    root = str(tmp_path)
+    assert store_path('torch:all-MiniLM-L6-v2', root) != store_path('onnx:all-MiniLM-L6-v2:0123', root)
+    assert os.path.dirname(store_path('onnx:a/b', root)) == root
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_encodes_each_unseen_text_once, test_case_and_encoder_are_part_of_the_key,
+                 test_older_key_format_is_never_served, test_reopened_store_serves_without_encoding,
+                 test_readonly_store_does_not_write, test_float16_store_and_model_mismatch,
+                 test_interrupted_append_is_dropped, test_store_path_is_per_model):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✅ Embedding store tests passed!")
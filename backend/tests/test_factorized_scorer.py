@@ -0,0 +1,109 @@
+import sys
+import os
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.utils import config
+from app.tarumbeta_ml.src.api.block_scorer import BlockScorer
+from app.tarumbeta_ml.src.api.factorized_scorer import FactorizedScorer, field_codes
+
+FIELD_SIZES = [6, 5, 2, 3]
+DEFAULT = {'categorical': config.WEIGHT_CAT, 'numerical': config.WEIGHT_NUM, 'text': config.WEIGHT_TXT}
+
+def _blocks(n, rng, unknown_rate=0.05):
+    """ Unit blocks as CompiledQueryVectorizer.blocks() builds them, with some unknown fields """
+    cat = np.zeros((n, sum(FIELD_SIZES)), dtype='float32')
+    offsets = np.cumsum([0] + FIELD_SIZES[:-1])
+    for offset, size in zip(offsets, FIELD_SIZES):
+        known = np.flatnonzero(rng.random(n) > unknown_rate)
+        cat[known, offset + rng.integers(0, size, len(known))] = 1.0
+    num = rng.random((n, 2)).astype('float32')
+    num[::17] = 0 # All-zero numeric block (min rate, zero rating)
+    text = rng.standard_normal((n, 24)).astype('float32')
+    blocks = {'categorical': cat, 'numerical': num, 'text': text}
+    for name, block in blocks.items():
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        blocks[name] = block / np.where(norms == 0, 1, norms)
+    return blocks
+
+def _dense_top_k(store, query_blocks, weights, k, ids):
+    scores = store.scores(query_blocks, weights, ids)
+    top = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+    return np.take_along_axis(scores, top, axis=1), ids[top]
+
+def test_field_codes_round_trip():
+    rng = np.random.default_rng(0)
+    blocks = _blocks(50, rng, unknown_rate=0.3)
+    codes = field_codes(blocks['categorical'], FIELD_SIZES)
+    assert (codes == -1).any()
+    offsets = np.cumsum([0] + FIELD_SIZES[:-1])
+    for f, offset in enumerate(offsets):
+        known = codes[:, f] >= 0
+        assert (blocks['categorical'][known, offset + codes[known, f]] > 0).all()
+
+def test_matches_dense_scores_for_any_weights_and_subsets():
+    rng = np.random.default_rng(1)
+    store = BlockScorer(_blocks(2000, rng))
+    scorer = FactorizedScorer(store, FIELD_SIZES, min_candidates=8)
+    query_blocks = _blocks(25, rng, unknown_rate=0.2)
+
+    for weights in (DEFAULT, {'categorical': 0.3, 'numerical': 0.3, 'text': 0.9},
+                    {'categorical': 1.0, 'numerical': 0.0, 'text': 0.0}):
+        for ids in (np.arange(2000), np.sort(rng.choice(2000, 300, replace=False))):
+            scores, top_ids = scorer.search(query_blocks, weights, 10, ids)
+            expected_scores, expected_ids = _dense_top_k(store, query_blocks, weights, 10, ids)
+            for got, expected in zip(scores, expected_scores):
+                np.testing.assert_allclose(got, expected, atol=1e-5)
+            # Ids agree except where exact scores tie (text weight 0 leaves many ties)
+            if weights['text'] > 0:
+                agree = np.mean([np.array_equal(a, b) for a, b in zip(top_ids, expected_ids)])
+                assert agree > 0.95
+
+def test_bound_skips_most_text_products():
+    rng = np.random.default_rng(2)
+    store = BlockScorer(_blocks(5000, rng))
+    scorer = FactorizedScorer(store, FIELD_SIZES)
+    scorer.search(_blocks(20, rng), DEFAULT, 10)
+    assert scorer.stats()['text_scored_fraction'] < 0.25
+
+def test_small_candidate_sets():
+    rng = np.random.default_rng(3)
+    store = BlockScorer(_blocks(30, rng))
+    scorer = FactorizedScorer(store, FIELD_SIZES)
+    scores, ids = scorer.search(_blocks(2, rng), DEFAULT, 12, ids=np.array([4, 9, 11]))
+    assert [sorted(i.tolist()) for i in ids] == [[4, 9, 11], [4, 9, 11]]
+    assert all(np.all(np.diff(s) <= 0) for s in scores)
+    scores, ids = scorer.search(_blocks(1, rng), DEFAULT, 5, ids=np.zeros(0, dtype='int64'))
+    assert len(ids[0]) == 0
+
+def test_explain_decomposes_the_search_scores():
+    rng = np.random.default_rng(4)
+    store = BlockScorer(_blocks(500, rng))
+    scorer = FactorizedScorer(store, FIELD_SIZES)
+    query_blocks = _blocks(6, rng, unknown_rate=0.2)
+    weights = {'categorical': 0.6, 'numerical': 0.2, 'text': 0.5}
+    scores, ids = scorer.search(query_blocks, weights, 8)
+    ids = np.stack(ids)
+    ids[0, 5:] = -1 # Empty slots are skipped
+
+    parts = scorer.explain(query_blocks, weights, ids)
+    total = parts['categorical'] + parts['numerical'] + parts['text']
+    valid = ids >= 0
+    np.testing.assert_allclose(total[valid], np.stack(scores)[valid], atol=1e-5)
+    assert not total[~valid].any() and not parts['matched'][~valid].any()
+
+    # Matched fields are exactly the equal known codes
+    q_codes = field_codes(query_blocks['categorical'], FIELD_SIZES)
+    i_codes = scorer.codes[ids[valid]]
+    expected = (i_codes == np.repeat(q_codes, valid.sum(axis=1), axis=0)) & (i_codes >= 0)
+    assert (parts['matched'][valid] == expected).all()
+
+if __name__ == "__main__":
+    test_field_codes_round_trip()
+    test_matches_dense_scores_for_any_weights_and_subsets()
+    test_bound_skips_most_text_products()
+    test_small_candidate_sets()
+    test_explain_decomposes_the_search_scores()
+    print("✅ Factorized scorer tests passed!")
@@ -0,0 +1,40 @@
+import sys
+import os
+import glob
+import pandas as pd
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.etl.generate_learners import COLUMNS, run_learner_generation, shard_dir
+
+def test_shards_concatenate_to_the_single_file(tmp_path):
+    single = str(tmp_path / 'single.csv')
+    sharded = str(tmp_path / 'sharded.csv')
+    run_learner_generation(2500, seed=5, out_path=single, shard_size=10_000)
+    run_learner_generation(2500, seed=5, out_path=sharded, shard_size=1000)
+
+    parts = sorted(glob.glob(os.path.join(shard_dir(sharded), 'part-*.csv')))
+    assert len(parts) == 3
+    whole = pd.read_csv(single)
+    pd.testing.assert_frame_equal(pd.concat(map(pd.read_csv, parts), ignore_index=True), whole)
+
+    assert list(whole.columns) == COLUMNS
+    assert whole['learner_id'].tolist()[:2] == ['L0000', 'L0001'] and whole['learner_id'].is_unique
+    # Each bio names the learner's own instrument
+    assert all(f" {inst} for " in bio for inst, bio in zip(whole['instrument_type'], whole['bio_keywords']))
+
+def test_seed_changes_the_corpus(tmp_path):
+    paths = [str(tmp_path / f"{seed}.csv") for seed in (1, 2)]
+    for seed, path in zip((1, 2), paths):
+        run_learner_generation(200, seed=seed, out_path=path)
+    a, b = (pd.read_csv(path) for path in paths)
+    assert (a['learner_id'] == b['learner_id']).all() and not a.equals(b)
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_shards_concatenate_to_the_single_file, test_seed_changes_the_corpus):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✅ Learner generator tests passed!")
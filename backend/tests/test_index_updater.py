@@ -0,0 +1,107 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.api.index_updater import IndexUpdater, LiveUpdateError
+from conftest import _TextEncoder, _blocks, _instructors, _learner, _recommender, _vectorizer
+
+def _serving(spec):
+    """ A loaded recommender on _instructors(), its bios embedded by _TextEncoder """
+    df = _instructors()
+    vectorizer = _vectorizer(df)
+    bert_model = _TextEncoder()
+    blocks = _blocks(df, vectorizer, bert_model.encode(df['bio_keywords'].tolist()))
+    return _recommender(df, vectorizer, blocks, vectorizer.weights, spec, bert_model=bert_model)
+
+def _new_instructor(**overrides):
+    row = {'profile_id': 'uuid-1', 'name': 'Eve', 'location': 'Nairobi', 'instrument_type': 'Drums',
+           'skill_level': 'Advanced', 'teaching_language': 'Swahili', 'hourly_rate': 25,
+           'rating': 4.5, 'bio_keywords': 'afro beats'}
+    row.update(overrides)
+    return row
+
+def _updater(recommender, tmp_path):
+    return IndexUpdater(recommender, persist=False, compact_fraction=10)
+
+def test_upsert_appends_then_replaces_in_place(tmp_path):
+    for spec in ({'type': 'flat'}, {'type': 'hnsw'}):
+        recommender = _serving(spec)
+        updater = _updater(recommender, tmp_path)
+
+        assert updater.upsert([_new_instructor()]) == [4]
+        top = recommender.recommend(_learner(), top_k=1)[0]
+        assert (top['instructor_id'], top['profile_id']) == ('ML-4', 'uuid-1')
+
+        # Same profile_id -> same key, old vector gone
+        assert updater.upsert([_new_instructor(location='Mombasa', name='Eve M')]) == [4]
+        assert recommender.index.ntotal == 5
+        for filtered in (False, True):
+            top = recommender.recommend(_learner(location='Mombasa'), top_k=1, filtered=filtered)[0]
+            assert (top['name'], top['location']) == ('Eve M', 'Mombasa')
+
+def test_remove_keeps_keys_stable(tmp_path):
+    recommender = _serving({'type': 'flat'})
+    updater = _updater(recommender, tmp_path)
+    updater.upsert([_new_instructor(), _new_instructor(profile_id='uuid-2', name='Fay')])
+
+    assert updater.remove(['uuid-1', 'unknown']) == [4]
+    assert updater.remove(['uuid-1']) == []
+    assert recommender.index.ntotal == 5
+
+    results = recommender.recommend(_learner(), top_k=5) + recommender.recommend(_learner(), top_k=5, filtered=True)
+    assert 'uuid-1' not in {r['profile_id'] for r in results}
+    assert recommender.recommend(_learner(), top_k=1)[0]['instructor_id'] == 'ML-5'
+
+def test_update_waits_for_a_state_swap_in_progress(tmp_path):
+    import threading
+    recommender = _serving({'type': 'flat'})
+    updater = _updater(recommender, tmp_path)
+
+    # Held as reload() holds it while it loads and swaps in another bundle
+    with recommender.state_lock():
+        writer = threading.Thread(target=updater.upsert, args=([_new_instructor()],))
+        writer.start()
+        writer.join(0.5)
+        assert writer.is_alive() and recommender.index.ntotal == 4
+        recommender.publish(version='reloaded') # The swap the update must build on, not overwrite
+    writer.join()
+    assert recommender.index.ntotal == 5 and recommender.version == 'reloaded'
+
+def test_persisted_update_without_bundle_is_refused():
+    # Serving the loose artifacts: the other workers would never see the update
+    recommender = _serving({'type': 'flat'})
+    updater = IndexUpdater(recommender, compact_fraction=10)
+    index = recommender.index
+
+    for update in (lambda: updater.upsert([_new_instructor()]), lambda: updater.remove(['uuid-1']),
+                   updater.compact):
+        try:
+            update()
+            assert False, "expected LiveUpdateError"
+        except LiveUpdateError as e:
+            assert 'bundle' in str(e)
+    assert recommender.index is index and index.ntotal == 4
+    assert updater.stats()['upserts'] == 0
+
+def test_compaction_after_threshold(tmp_path):
+    recommender = _serving({'type': 'flat'})
+    updater = _updater(recommender, tmp_path)
+    updater.compact_fraction = 0.4
+
+    updater.upsert([_new_instructor()])
+    assert updater.rebuilds == 0
+    updater.upsert([_new_instructor(profile_id=f"uuid-{i}") for i in range(2, 5)])
+    assert updater.rebuilds == 1 and updater.changes_since_build == 0
+    assert recommender.index.ntotal == 8
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_upsert_appends_then_replaces_in_place, test_remove_keeps_keys_stable,
+                 test_update_waits_for_a_state_swap_in_progress, test_compaction_after_threshold):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    test_persisted_update_without_bundle_is_refused()
+    print("✅ Index updater tests passed")
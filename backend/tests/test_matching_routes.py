@@ -0,0 +1,148 @@
+import sys
+import os
+import types
+import importlib
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+class FakeQuery:
+    """ Chainable stand-in for a supabase query: every filter is ignored, execute() returns rows """
+    def __init__(self, rows, inserted):
+        self.rows = rows
+        self.inserted = inserted
+
+    def select(self, *args):
+        return self
+
+    def in_(self, column, values):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def insert(self, rows):
+        self.inserted.extend(rows)
+        return self
+
+    def update(self, values):
+        return self
+
+    def execute(self):
+        return types.SimpleNamespace(data=self.rows)
+
+class FakeSupabase:
+    """ Accepts any bearer token as user 'learner-1'; only the tables given in `tables` can be queried """
+    def __init__(self, tables=None):
+        self.auth = types.SimpleNamespace(get_user=lambda token: types.SimpleNamespace(
+            user=types.SimpleNamespace(id='learner-1')))
+        self.tables = tables or {}
+        self.inserted = []
+
+    def table(self, name):
+        if name not in self.tables:
+            raise AssertionError(f"unexpected query on {name}")
+        return FakeQuery(self.tables[name], self.inserted)
+
+def _client(supabase=None):
+    # The real client needs credentials (and a network): the routes import this module's `supabase`
+    fake = types.ModuleType('app.utils.supabase_client')
+    fake.supabase = supabase or FakeSupabase()
+    sys.modules['app.utils.supabase_client'] = fake
+    sys.modules.pop('app.utils.auth_helpers', None)
+    sys.modules.pop('app.routes.matching', None)
+    matching = importlib.import_module('app.routes.matching') # Fresh: binds this fake `supabase`
+
+    app = Flask(__name__)
+    app.register_blueprint(matching.bp, url_prefix='/api/matching')
+    return app.test_client()
+
+LEARNER = {'instrument_type': 'Guitar', 'experience_level': 'Beginner', 'budget': 1500, 'location': 'Nairobi',
+           'learning_goals': 'fingerpicking'}
+
+def test_malformed_match_weights_are_a_400():
+    client = _client()
+    for bad in (['text', 0.3], 'text', 0.3, {'text': [1]}, {'text': '0.3'}, {'style': 1.0}, {'text': -1}):
+        response = client.post('/api/matching/find-instructors', json=dict(LEARNER, match_weights=bad),
+                               headers={'Authorization': 'Bearer token'})
+        assert response.status_code == 400, (bad, response.status_code, response.get_json())
+        assert 'weight' in response.get_json()['error'].lower()
+
+def _hit(i):
+    return {'instructor_id': f"ML-{i}", 'profile_id': f"profile-{i}", 'name': f"Instructor {i}",
+            'hourly_rate': 2000, 'rating': 4.0, 'bio_short': 'fingerpicking', 'match_score': 1 - i / 100,
+            'score_breakdown': {'matched_fields': ['instrument_type'], 'text_similarity': 0.2}}
+
+def test_find_instructors_asks_the_model_for_12_distinct_matches():
+    from app.tarumbeta_ml.src.api import inference_semantic
+    profiles = [{'id': f"profile-{i}", 'users': {'id': f"user-{i}", 'full_name': f"Instructor {i}",
+                                                 'email': f"i{i}@example.com", 'avatar_url': None}}
+                for i in range(12)]
+    supabase = FakeSupabase({'instructor_profiles': profiles, 'instructor_matches': []})
+    client = _client(supabase)
+
+    calls = []
+    def get_matches(profile, top_k=5, **options):
+        calls.append(dict(options, top_k=top_k))
+        return [_hit(i) for i in range(top_k)]
+
+    original = inference_semantic.get_matches
+    inference_semantic.get_matches = get_matches
+    try:
+        response = client.post('/api/matching/find-instructors', json=LEARNER,
+                               headers={'Authorization': 'Bearer token'})
+    finally:
+        inference_semantic.get_matches = original
+
+    assert response.status_code == 200, response.get_json()
+    assert calls == [{'top_k': 12, 'filtered': True, 'weights': None, 'explain': True, 'diverse': True}]
+    body = response.get_json()
+    assert body['total_found'] == 12
+    assert [m['instructor_id'] for m in body['matches']] == [f"profile-{i}" for i in range(5)]
+    assert len(supabase.inserted) == 5
+
+def test_live_update_without_bundle_is_a_503():
+    client = _client()
+    from app.routes import matching
+    from app.tarumbeta_ml.src.api import inference_semantic
+
+    def refuse(*args):
+        raise inference_semantic.LiveUpdateError("Live index updates need a published bundle")
+    matching.sync_instructor_index = refuse
+    response = client.put('/api/matching/index/instructor', headers={'Authorization': 'Bearer token'})
+    assert response.status_code == 503, (response.status_code, response.get_json())
+    assert 'bundle' in response.get_json()['detail']
+
+def test_review_rating_update_never_waits_for_the_index():
+    import threading
+    from app.tarumbeta_ml.src.api import inference_semantic
+    _client(FakeSupabase({'reviews': [{'rating': 4}, {'rating': 5}], 'instructor_profiles': []}))
+    from app.routes import matching
+    sys.modules.pop('app.routes.reviews', None)
+    reviews = importlib.import_module('app.routes.reviews')
+
+    release, synced = threading.Event(), []
+    def slow_failing_sync(user_id):
+        release.wait(5)
+        synced.append(user_id)
+        raise RuntimeError("index unavailable")
+    matching.sync_instructor_index = slow_failing_sync
+    original = inference_semantic.get_readiness
+    inference_semantic.get_readiness = lambda: {'ready': True}
+    try:
+        reviews.update_instructor_rating('instructor-1') # Returns while the re-index is still blocked
+        assert synced == []
+        release.set()
+        matching._reindex_queue.join()
+    finally:
+        inference_semantic.get_readiness = original
+    assert synced == ['instructor-1']
+
+if __name__ == "__main__":
+    test_malformed_match_weights_are_a_400()
+    test_find_instructors_asks_the_model_for_12_distinct_matches()
+    test_live_update_without_bundle_is_a_503()
+    test_review_rating_update_never_waits_for_the_index()
+    print("✅ Matching route tests passed!")
@@ -0,0 +1,92 @@
+import sys
+import os
+import threading
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.api.micro_batcher import MicroBatcher
+
+class _Recorder:
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self.release = threading.Event()
+
+    def __call__(self, items, scale=1):
+        self.release.wait(5)
+        self.calls.append((list(items), scale))
+        if self.fail_on in items:
+            raise ValueError("bad item")
+        return [item * scale for item in items]
+
+def _submit_all(batcher, items, **options):
+    # Submitted back to back: they all land within one max_wait window
+    return [batcher.submit(item, **options) for item in items]
+
+def test_concurrent_items_share_a_batch():
+    run = _Recorder()
+    batcher = MicroBatcher(run, max_batch_size=8, max_wait_ms=50)
+    futures = _submit_all(batcher, range(5))
+    run.release.set()
+
+    assert [f.result(timeout=5) for f in futures] == [0, 1, 2, 3, 4]
+    assert run.calls == [([0, 1, 2, 3, 4], 1)]
+    stats = batcher.stats()
+    assert stats['batches'] == 1 and stats['batch_size_histogram'] == {'5': 1}
+
+def test_max_batch_size_splits_batches():
+    run = _Recorder()
+    batcher = MicroBatcher(run, max_batch_size=2, max_wait_ms=50)
+    futures = _submit_all(batcher, range(5))
+    run.release.set()
+
+    assert [f.result(timeout=5) for f in futures] == [0, 1, 2, 3, 4]
+    assert all(len(items) <= 2 for items, _ in run.calls)
+    assert sum(len(items) for items, _ in run.calls) == 5
+
+def test_options_are_batched_separately():
+    run = _Recorder()
+    batcher = MicroBatcher(run, max_batch_size=8, max_wait_ms=50)
+    plain = _submit_all(batcher, [1, 2])
+    scaled = _submit_all(batcher, [1, 2], scale=10)
+    run.release.set()
+
+    assert [f.result(timeout=5) for f in plain] == [1, 2]
+    assert [f.result(timeout=5) for f in scaled] == [10, 20]
+    assert sorted(scale for _, scale in run.calls) == [1, 10]
+
+def test_errors_reach_every_caller_of_the_batch():
+    run = _Recorder(fail_on=2)
+    batcher = MicroBatcher(run, max_batch_size=8, max_wait_ms=50)
+    futures = _submit_all(batcher, [1, 2])
+    run.release.set()
+
+    for future in futures:
+        try:
+            future.result(timeout=5)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+    # The worker keeps serving after a failed batch
+    assert batcher.submit(3).result(timeout=5) == 3
+
+def test_a_short_batch_fails_every_caller():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=8, max_wait_ms=50)
+    futures = _submit_all(batcher, [1, 2, 3])
+
+    for future in futures: # None is left pending, so no caller blocks forever
+        try:
+            future.result(timeout=5)
+            assert False, "expected RuntimeError"
+        except RuntimeError:
+            pass
+
+if __name__ == "__main__":
+    test_concurrent_items_share_a_batch()
+    test_max_batch_size_splits_batches()
+    test_options_are_batched_separately()
+    test_errors_reach_every_caller_of_the_batch()
+    test_a_short_batch_fails_every_caller()
+    print("✅ Micro-batcher tests passed!")
@@ -0,0 +1,60 @@
+import sys
+import os
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.features.parallel_encoder import ParallelEncoder, encode_bucketed, length_batches
+
+class WordEncoder:
+    """ Deterministic 4-d embeddings (no tokenizer: lengths come from the word-count proxy) """
+    def __init__(self, threads=None):
+        self.threads = threads
+        self.batches = []
+
+    def encode(self, texts, batch_size=32):
+        self.batches.append(len(texts))
+        return np.array([[len(t), t.count(' '), sum(map(ord, t)) % 97, self.threads or 0] for t in texts],
+                        dtype='float32')
+
+def load_word_encoder(backend=None, model_name=None, onnx_dir=None, threads=None):
+    return WordEncoder(threads)
+
+TEXTS = [" ".join(["word"] * (i % 37 + 1)) + f" {i}" for i in range(300)]
+
+def test_batches_cover_every_text_within_the_token_budget():
+    lengths = np.array([len(t.split()) + 2 for t in TEXTS])
+    batches = length_batches(lengths, token_budget=128, max_batch=16, bucket_width=8)
+    assert sorted(np.concatenate(batches).tolist()) == list(range(len(TEXTS)))
+    for batch in batches:
+        width = -(-lengths[batch].max() // 8) * 8
+        assert len(batch) <= 16 and (len(batch) * width <= 128 or len(batch) == 1)
+        assert lengths[batch].max() - lengths[batch].min() < 8 # One bucket per batch
+    # Longest first; short texts get the bigger batches
+    assert lengths[batches[0]].max() == lengths.max()
+    assert len(batches[-1]) >= len(batches[0])
+
+def test_bucketed_encoding_keeps_input_order():
+    encoder = WordEncoder()
+    emb, tokens = encode_bucketed(encoder, TEXTS, token_budget=256, max_batch=64, bucket_width=4)
+    np.testing.assert_array_equal(emb, WordEncoder().encode(TEXTS))
+    assert tokens == sum(len(t.split()) + 2 for t in TEXTS) and len(encoder.batches) > 1
+
+def test_process_pool_matches_serial():
+    serial = ParallelEncoder(workers=1, threads=2, loader=load_word_encoder)
+    expected = serial.encode(TEXTS)
+    assert (expected[:, 3] == 2).all() # All workers x threads threads in-process
+
+    with ParallelEncoder(workers=2, threads=1, task_size=70, min_parallel=0, loader=load_word_encoder) as pool:
+        emb = pool.encode(TEXTS)
+        report = pool.report()
+    np.testing.assert_array_equal(emb[:, :3], expected[:, :3])
+    assert (emb[:, 3] == 1).all() # Each worker pinned to its own thread count
+    assert report['texts'] == len(TEXTS) and report['sentences_per_second'] > 0
+
+if __name__ == "__main__":
+    test_batches_cover_every_text_within_the_token_budget()
+    test_bucketed_encoding_keeps_input_order()
+    test_process_pool_matches_serial()
+    print("✅ Parallel encoder tests passed!")
@@ -0,0 +1,67 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, normalize
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.utils import config
+from app.tarumbeta_ml.src.features.query_vectorizer import CompiledQueryVectorizer, CAT_COLS, NUM_COLS
+
+def _fit_processors():
+    # Same fitting as vectorize_semantic.py (minus BERT)
+    df_inst = pd.read_csv(os.path.join(config.DATA_PROCESSED, 'instructors_processed.csv'))
+    df_learn = pd.read_csv(os.path.join(config.DATA_PROCESSED, 'learners_processed.csv'))
+    combined = pd.concat([df_inst[CAT_COLS], df_learn[CAT_COLS]], axis=0, ignore_index=True)
+
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore').fit(combined)
+    scaler = MinMaxScaler().fit(df_inst[NUM_COLS])
+    return encoder, scaler, df_learn
+
+def _sklearn_vectorize(df, text_matrix, encoder, scaler):
+    # The pre-compiled recommend() path, kept here as the reference
+    cat = normalize(encoder.transform(df[CAT_COLS]), axis=1, norm='l2') * config.WEIGHT_CAT
+    num = normalize(scaler.transform(df[NUM_COLS]), axis=1, norm='l2') * config.WEIGHT_NUM
+    txt = normalize(text_matrix, axis=1, norm='l2') * config.WEIGHT_TXT
+    vecs = np.hstack([cat, num, txt]).astype('float32')
+    return normalize(vecs, axis=1, norm='l2')
+
+def test_compiled_vectorizer_parity():
+    encoder, scaler, df_learn = _fit_processors()
+    compiled = CompiledQueryVectorizer(encoder, scaler)
+
+    profiles = df_learn.head(200).to_dict('records')
+    # Unknown categories must encode to zeros, exactly like handle_unknown='ignore'
+    profiles.append({'location': 'Atlantis', 'instrument_type': 'Guitar',
+                     'teaching_language': 'Klingon', 'skill_level': 'Beginner'})
+    profiles.append({'location': 'Atlantis', 'instrument_type': 'Theremin',
+                     'teaching_language': 'Klingon', 'skill_level': 'Grandmaster'})
+
+    rng = np.random.default_rng(config.RANDOM_SEED)
+    text_matrix = rng.standard_normal((len(profiles), 384)).astype('float32')
+
+    df = pd.DataFrame(profiles)[CAT_COLS]
+    df['hourly_rate'] = 0
+    df['rating'] = 0
+
+    expected = _sklearn_vectorize(df, text_matrix, encoder, scaler)
+    actual = compiled.transform(profiles, text_matrix)
+
+    assert actual.dtype == np.float32
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, atol=1e-6)
+
+def test_compiled_num_block_parity():
+    encoder, scaler, _ = _fit_processors()
+    compiled = CompiledQueryVectorizer(encoder, scaler)
+
+    values = np.array([[0, 0], [20, 4.5], [200, 0.0], [95, 3.1]], dtype='float64')
+    expected = normalize(scaler.transform(pd.DataFrame(values, columns=NUM_COLS)), axis=1) * config.WEIGHT_NUM
+    np.testing.assert_allclose(compiled.num_block(values), expected, atol=1e-9)
+
+if __name__ == "__main__":
+    test_compiled_vectorizer_parity()
+    test_compiled_num_block_parity()
+    print("✅ Compiled vectorizer matches the sklearn path")
@@ -0,0 +1,85 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.api.result_cache import ResultCache
+from app.tarumbeta_ml.src.api.inference_semantic import canonical_query
+from conftest import WEIGHTS, _recommender, _setup
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_hits_return_copies_and_count_saved_time():
+    cache = ResultCache(max_size=10)
+    cache.put_many(['a'], [[{'name': 'x', 'score_breakdown': {'matched_fields': ['location']}}]], 0, 0.02)
+
+    first, missing = cache.get_many(['a', 'b'], 0)
+    assert missing is None
+    first[0]['score_breakdown']['matched_fields'].append('mutated')
+    second, = cache.get_many(['a'], 0)
+    assert second[0]['score_breakdown']['matched_fields'] == ['location']
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (2, 1, 0.6667)
+    assert stats['latency_saved_ms'] == 40.0
+
+def test_ttl_and_lru():
+    clock = FakeClock()
+    cache = ResultCache(max_size=2, ttl_seconds=60, clock=clock)
+    cache.put_many(['a', 'b'], [[1], [2]], 0, 0.0)
+    cache.get_many(['a'], 0) # 'b' is now least recently used
+    cache.put_many(['c'], [[3]], 0, 0.0)
+    assert cache.get_many(['a', 'b', 'c'], 0) == [[1], None, [3]]
+    assert cache.stats()['evictions'] == 1
+
+    clock.now = 61
+    assert cache.get_many(['a'], 0) == [None]
+    assert cache.stats()['expirations'] == 1
+
+def test_new_state_invalidates_and_old_state_is_ignored():
+    cache = ResultCache(max_size=10)
+    cache.put_many(['a'], [[1]], 5, 0.0)
+    # A request still running on an older state neither reads nor writes
+    assert cache.get_many(['a'], 4) == [None]
+    cache.put_many(['b'], [[2]], 4, 0.0)
+    assert cache.get_many(['a', 'b'], 5) == [[1], None]
+
+    assert cache.get_many(['a'], 6) == [None]
+    assert cache.stats()['invalidations'] == 1 and cache.stats()['size'] == 0
+
+def test_recommender_serves_repeats_from_cache():
+    df, vectorizer, blocks, _ = _setup()
+    serving = _recommender(df, vectorizer, blocks, WEIGHTS)
+    learner = dict(df.iloc[3], bio_keywords="bio 3", budget=20)
+
+    first = serving.recommend(learner, top_k=5, filtered=True)
+    # Budget isn't model input and the bio is compared as the embedding cache keys it (case kept:
+    # the stub encoder is cased)
+    again = serving.recommend(dict(learner, budget=50, bio_keywords="  bio   3 "), top_k=5, filtered=True)
+    assert again == first
+    assert serving.result_cache.stats()['hits'] == 1
+    assert canonical_query(learner) == canonical_query(dict(learner, genre='Jazz'))
+
+    # Different options are different entries
+    serving.recommend(learner, top_k=5)
+    serving.recommend(learner, top_k=5, filtered=True, weights={'text': 0.5})
+    assert serving.result_cache.stats()['hits'] == 1
+
+    # A new state (index update, bundle reload) invalidates
+    serving.publish(blocks=serving.blocks)
+    serving.recommend(learner, top_k=5, filtered=True)
+    stats = serving.result_cache.stats()
+    assert stats['hits'] == 1 and stats['invalidations'] == 1
+
+if __name__ == "__main__":
+    test_hits_return_copies_and_count_saved_time()
+    test_ttl_and_lru()
+    test_new_state_invalidates_and_old_state_is_ignored()
+    test_recommender_serves_repeats_from_cache()
+    print("✅ Result cache tests passed!")
@@ -0,0 +1,46 @@
+import sys
+import os
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ml_models.rule_scorer import InstructorColumns, compatibility_scores, simple_scores, top_k_positions
+from app.ml_models.benchmark_rule_scorer import (LEARNER, loop_compatibility_score, loop_simple_score,
+                                                 synthetic_instructors)
+
+def test_columnar_scores_equal_the_per_instructor_rules():
+    instructors = synthetic_instructors(500, seed=1)
+    # Edge cases: no location / days / style on either side
+    instructors[0]['users']['location'] = None
+    instructors[1]['available_days'] = []
+    instructors[2]['teaching_style'] = None
+    columns = InstructorColumns(instructors)
+
+    learners = [LEARNER, dict(LEARNER, location='', preferred_schedule=None, learning_style=None),
+                dict(LEARNER, instrument_type='Harp', preferred_schedule={'days': ['mon', 'holiday']}),
+                dict(LEARNER, location='nairobi', budget=2000, experience_level='advanced')]
+    for learner in learners:
+        np.testing.assert_array_equal(compatibility_scores(columns, learner),
+                                      [loop_compatibility_score(learner, inst) for inst in instructors])
+        np.testing.assert_array_equal(simple_scores(columns, learner),
+                                      [loop_simple_score(learner, inst) for inst in instructors])
+
+def test_top_k_positions_match_a_stable_sort():
+    rng = np.random.default_rng(2)
+    scores = rng.integers(0, 5, 200) / 4 # Lots of ties
+    expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+    for k in (1, 7, 50, 200, None):
+        assert top_k_positions(scores, k).tolist() == expected[:k]
+    assert len(top_k_positions(scores, 0)) == 0
+
+def test_empty_instructor_list():
+    columns = InstructorColumns([])
+    assert len(compatibility_scores(columns, LEARNER)) == 0
+    assert len(top_k_positions(simple_scores(columns, LEARNER), 5)) == 0
+
+if __name__ == "__main__":
+    test_columnar_scores_equal_the_per_instructor_rules()
+    test_top_k_positions_match_a_stable_sort()
+    test_empty_instructor_list()
+    print("✅ Rule scorer tests passed!")
@@ -0,0 +1,63 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.utils.table_io import TableWriter, find_table, read_table, table_columns, write_table
+from app.tarumbeta_ml.src.utils.column_store import load_columns, write_columns
+
+def _instructors(cities, offset=0):
+    n = len(cities)
+    return pd.DataFrame({
+        'name': [f"Instructor {offset + i}" for i in range(n)],
+        'location': cities,
+        'instrument_type': ['Piano'] * n,
+        'hourly_rate': np.arange(n, dtype='float64') + 20,
+        'bio_keywords': [f"Bio {offset + i}" for i in range(n)]
+    })
+
+def test_parquet_keeps_types_and_dictionary_encodes(tmp_path):
+    df = _instructors(['Nairobi', 'Mombasa', 'Nairobi'])
+    path = str(tmp_path / 'instructors_processed.parquet')
+    write_table(df, path)
+
+    back = read_table(path)
+    assert back['location'].dtype.name == 'category' and back['hourly_rate'].dtype == np.float64
+    assert back['location'].tolist() == df['location'].tolist()
+    assert table_columns(path) == list(df.columns)
+    assert read_table(path, columns=['name']).columns.tolist() == ['name']
+    # The column store converts the categoricals back to fixed-width text
+    write_columns(back, str(tmp_path / 'cols'))
+    assert load_columns(str(tmp_path / 'cols'))['location'].tolist() == df['location'].tolist()
+
+def test_chunked_writer_matches_one_write(tmp_path):
+    chunks = [_instructors(['Nairobi', 'Kisumu']), _instructors([]), _instructors(['Thika'], offset=2)]
+    for ext in ('.parquet', '.csv'):
+        path = str(tmp_path / f"chunked{ext}")
+        writer = TableWriter(path, list(chunks[0].columns))
+        for chunk in chunks:
+            writer.append(chunk)
+        writer.close()
+        back = read_table(path)
+        assert back['location'].astype(str).tolist() == ['Nairobi', 'Kisumu', 'Thika']
+        assert back['hourly_rate'].tolist() == [20.0, 21.0, 20.0]
+
+def test_find_table_prefers_the_configured_format(tmp_path):
+    directory = str(tmp_path)
+    assert find_table('learners_processed', directory).endswith('learners_processed.parquet') # Nothing yet
+    write_table(_instructors(['Nairobi']), os.path.join(directory, 'learners_processed.csv'))
+    assert find_table('learners_processed', directory).endswith('.csv') # Older CSV artifacts still load
+    write_table(_instructors(['Nairobi']), os.path.join(directory, 'learners_processed.parquet'))
+    assert find_table('learners_processed', directory).endswith('.parquet')
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_parquet_keeps_types_and_dictionary_encodes, test_chunked_writer_matches_one_write,
+                 test_find_table_prefers_the_configured_format):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✅ Table IO tests passed!")
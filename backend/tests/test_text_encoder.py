@@ -0,0 +1,52 @@
+import sys
+import os
+import types
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tarumbeta_ml.src.features.text_encoder import load_text_encoder, lowercases_input, mean_pool
+
+def test_mean_pool_ignores_padding():
+    tokens = np.array([[[1.0, 0.0], [3.0, 4.0], [100.0, 100.0]],
+                       [[0.0, 2.0], [0.0, 0.0], [0.0, 0.0]]], dtype='float32')
+    mask = np.array([[1, 1, 0], [1, 0, 0]])
+
+    pooled = mean_pool(tokens, mask, normalize=False)
+    assert np.allclose(pooled, [[2.0, 2.0], [0.0, 2.0]])
+
+def test_mean_pool_normalizes_like_sentence_transformers():
+    rng = np.random.default_rng(0)
+    tokens = rng.standard_normal((4, 7, 16)).astype('float32')
+    mask = (np.arange(7)[None, :] < np.array([[7], [3], [1], [5]])).astype('int64')
+
+    pooled = mean_pool(tokens, mask)
+    expected = np.stack([tokens[i, :mask[i].sum()].mean(axis=0) for i in range(4)])
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    assert pooled.dtype == np.float32
+    assert np.allclose(pooled, expected, atol=1e-6)
+
+    # An all-padding row stays zero instead of dividing by zero
+    assert np.all(mean_pool(tokens[:1], np.zeros((1, 7), dtype='int64')) == 0)
+
+def test_unknown_backend():
+    try:
+        load_text_encoder('tensorflow')
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+def test_lowercases_input_only_for_uncased_tokenizers():
+    uncased = types.SimpleNamespace(tokenizer=types.SimpleNamespace(do_lower_case=True)) # e.g. MiniLM
+    cased = types.SimpleNamespace(tokenizer=types.SimpleNamespace(do_lower_case=False))
+    assert lowercases_input(uncased)
+    assert not lowercases_input(cased)
+    assert not lowercases_input(types.SimpleNamespace()) # Unknown: keep case
+
+if __name__ == "__main__":
+    test_mean_pool_ignores_padding()
+    test_mean_pool_normalizes_like_sentence_transformers()
+    test_unknown_backend()
+    test_lowercases_input_only_for_uncased_tokenizers()
+    print("✅ Text encoder tests passed!")